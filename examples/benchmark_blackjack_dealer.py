@@ -0,0 +1,75 @@
+"""Times resolving the BlackJack dealer hand from the upcard, as
+BlackJack.play does when the player stays. Compares dealing and evaluating
+one card at a time, BlackJack.play_dealer, which finds the cards to deal in
+one pass over the upcoming cards, and the same pass done with numpy over
+the peeked cards. The dealer draws at most max_rounds - 1 cards, so numpy
+calls cost more than the Python loop over them."""
+import time
+
+import numpy as np
+
+from pogym.envs.blackjack import CARD_VALUES, BlackJack
+
+HANDS = 20_000
+REPEATS = 5
+
+
+def one_at_a_time(env):
+    deck = env.deck
+    while deck.value("dealer") < 17 and deck.hand_size("dealer") < env.max_rounds:
+        deck.deal("dealer", 1)
+    return deck.value("dealer")
+
+
+def vectorized(env, card_values=np.array(CARD_VALUES)):
+    deck = env.deck
+    total, has_ace = deck.hand_states["dealer"]
+    dealer_value = deck.value("dealer")
+    max_draws = env.max_rounds - deck.hand_size("dealer")
+    if dealer_value >= 17 or max_draws <= 0:
+        return dealer_value
+    ranks = deck.ranks_idx[deck.peek(max_draws)]
+    totals = total + np.cumsum(card_values[ranks])
+    aces = has_ace | (np.cumsum(ranks == 0) > 0)
+    values = np.where(aces & (totals < 11), totals + 10, totals)
+    stops = values >= 17
+    num_draws = int(stops.argmax()) + 1 if stops.any() else len(values)
+    deck.deal("dealer", num_draws, one_at_a_time=True)
+    return int(values[num_draws - 1])
+
+
+def main():
+    np.random.seed(0)
+    env = BlackJack(info_level="none")
+    states = []
+    for i in range(HANDS):
+        env.reset()
+        env.deck.deal("dealer", 1)
+        states.append(env.deck.get_state())
+
+    print(f"{'method':<16}{'us per hand':>12}")
+    targets = None
+    for name, play in [
+        ("one_at_a_time", one_at_a_time),
+        ("play_dealer", BlackJack.play_dealer),
+        ("vectorized", vectorized),
+    ]:
+        # The best of a few repeats, as a hand only takes microseconds
+        best = float("inf")
+        for repeat in range(REPEATS):
+            elapsed = 0.0
+            values = []
+            for state in states:
+                env.deck.set_state(state)
+                start = time.perf_counter()
+                values.append(play(env))
+                elapsed += time.perf_counter() - start
+            best = min(best, elapsed)
+        if targets is None:
+            targets = values
+        assert values == targets, f"{name} does not match one_at_a_time"
+        print(f"{name:<16}{1e6 * best / HANDS:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
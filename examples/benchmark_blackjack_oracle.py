@@ -0,0 +1,56 @@
+"""Times BlackJack.oracle_action per decision over a few episodes, split by
+the phase the decision is made in, with and without oracle_bets. Bet
+decisions need the value of the next game over every hand and upcard, which
+is computed once per game; hit and stay decisions are served from the
+values computed for the bet. With oracle_bets, the value is computed on
+reset and in the step that ends the previous game, so the steps are timed
+as well."""
+import time
+
+import numpy as np
+
+from pogym.envs.blackjack import BlackJack, Phase
+
+EPISODES = 5
+
+
+def print_times(name, times):
+    t = np.array(times)
+    print(
+        f"{name:<10}{t.size:>10}{t.mean():>10.3f}{np.median(t):>10.3f}{t.max():>10.3f}"
+    )
+
+
+def main():
+    for oracle_bets in [False, True]:
+        np.random.seed(0)
+        env = BlackJack(oracle_bets=oracle_bets)
+        env.get_oracle()
+        times = {phase: [] for phase in Phase}
+        step_times = []
+        for episode in range(EPISODES):
+            env.reset()
+            done = False
+            while not done:
+                phase = env.action_phase
+                start = time.perf_counter()
+                action = env.oracle_action()
+                times[phase].append(1e3 * (time.perf_counter() - start))
+                start = time.perf_counter()
+                obs, reward, done, info = env.step(action)
+                step_times.append(1e3 * (time.perf_counter() - start))
+
+        print(f"oracle_bets={oracle_bets}")
+        print(
+            f"{'phase':<10}{'decisions':>10}{'mean ms':>10}{'p50 ms':>10}{'max ms':>10}"
+        )
+        for phase, phase_times in times.items():
+            if phase_times:
+                print_times(phase.name, phase_times)
+        print_times("all", [t for phase_times in times.values() for t in phase_times])
+        print_times("step", step_times)
+        print()
+
+
+if __name__ == "__main__":
+    main()
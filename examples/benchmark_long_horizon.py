@@ -0,0 +1,77 @@
+"""Times reset and step of the Repeat* environments as the horizon grows,
+with and without long_horizon. With long_horizon, both should stay flat."""
+import time
+
+import numpy as np
+
+from pogym.envs.repeat_backwards import RepeatBackwards
+from pogym.envs.repeat_first import RepeatFirst
+from pogym.envs.repeat_previous import RepeatPrevious
+
+HORIZONS = [1_000, 10_000, 100_000, 1_000_000]
+STEPS = 20_000
+
+
+def run(env, policy):
+    """Returns the reset time in ms and the mean step time in us over
+    STEPS steps, resetting whenever an episode ends"""
+    start = time.perf_counter()
+    env.reset()
+    reset_ms = 1e3 * (time.perf_counter() - start)
+    start = time.perf_counter()
+    for i in range(STEPS):
+        obs, reward, done, info = env.step(policy(env))
+        if done:
+            env.reset()
+    step_us = 1e6 * (time.perf_counter() - start) / STEPS
+    return reset_ms, step_us
+
+
+def repeat_first(env):
+    return env.card
+
+
+def repeat_previous(env):
+    # The card k steps back is the next to be overwritten in the ring
+    cursor = env.state["cursor"][0] + 1
+    if cursor < env.k:
+        return 0
+    return env.state["ring"][0, cursor % env.k]
+
+
+def repeat_backwards(env):
+    return 0
+
+
+def main():
+    np.random.seed(0)
+    print(f"{'env':<16}{'horizon':>10}{'mode':>14}{'reset ms':>10}{'step us':>10}")
+    for horizon in HORIZONS:
+        num_decks = max(horizon // 52, 1)
+        envs = {
+            "RepeatFirst": lambda lh: (
+                RepeatFirst(num_decks=num_decks, long_horizon=lh),
+                repeat_first,
+            ),
+            "RepeatPrevious": lambda lh: (
+                RepeatPrevious(num_decks=num_decks, k=16, long_horizon=lh),
+                repeat_previous,
+            ),
+            "RepeatBackwards": lambda lh: (
+                RepeatBackwards(game_len=horizon, long_horizon=lh),
+                repeat_backwards,
+            ),
+        }
+        for name, make in envs.items():
+            for long_horizon in [False, True]:
+                env, policy = make(long_horizon)
+                reset_ms, step_us = run(env, policy)
+                mode = "long_horizon" if long_horizon else "default"
+                print(
+                    f"{name:<16}{horizon:>10}{mode:>14}"
+                    f"{reset_ms:>10.2f}{step_us:>10.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
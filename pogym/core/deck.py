@@ -1,5 +1,7 @@
+import abc
 import copy
-from typing import Callable, List
+import functools
+from typing import Callable, Dict, List, Tuple
 
 import gym
 import numpy as np
@@ -67,12 +69,82 @@ COLORS = np.array(["b", "r"])
 DECK_SIZE = 52
 
 
+@functools.lru_cache(maxsize=None)
+def card_tables(num_decks: int) -> Dict[str, np.ndarray]:
+    """Returns the per-card rank/suit/color tables for a shoe of num_decks
+    decks. The tables are read-only and shared by every deck of that size."""
+    num_cards = DECK_SIZE * num_decks
+    tables = {
+        "ranks": np.tile(RANKS.repeat(SUITS.size), num_decks),
+        "ranks_idx": np.tile(np.arange(RANKS.size).repeat(SUITS.size), num_decks),
+        "suits": np.tile(np.tile(SUITS, RANKS.size), num_decks),
+        "suits_idx": np.tile(np.tile(np.arange(SUITS.size), RANKS.size), num_decks),
+        "colors": np.tile(COLORS, num_cards // 2),
+        "colors_idx": np.tile(np.arange(COLORS.size), num_cards // 2),
+    }
+    for table in tables.values():
+        assert table.size == num_cards
+        table.flags.writeable = False
+    return tables
+
+
+@functools.lru_cache(maxsize=None)
+def full_counts(num_decks: int) -> Dict[str, np.ndarray]:
+    """Returns the read-only number of cards of each rank/suit/color in a
+    full shoe of num_decks decks"""
+    counts = {
+        "ranks": np.full(RANKS.size, SUITS.size * num_decks),
+        "suits": np.full(SUITS.size, RANKS.size * num_decks),
+        "colors": np.full(COLORS.size, DECK_SIZE * num_decks // COLORS.size),
+    }
+    for count in counts.values():
+        count.flags.writeable = False
+    return counts
+
+
+class HandEvaluator(abc.ABC):
+    """Computes the value of a hand incrementally as cards are dealt, rather
+    than from the entire hand each time. The state of a hand is a fixed-length
+    tuple of ints. Subclasses set fields and implement init, add and value.
+    """
+
+    # The deck fields passed to add, one array per field
+    fields: List[str] = ["ranks_idx"]
+
+    @abc.abstractmethod
+    def init(self) -> Tuple[int, ...]:
+        """Returns the state of an empty hand"""
+
+    @abc.abstractmethod
+    def add(self, state: Tuple[int, ...], *cards: np.ndarray) -> Tuple[int, ...]:
+        """Returns the state of the hand after adding the given cards,
+        where cards holds one array per field"""
+
+    @abc.abstractmethod
+    def value(self, state: Tuple[int, ...]) -> int:
+        """Returns the value of a hand in the given state"""
+
+
 class Deck:
     """An object that represents a collection of cards.
 
-    A deck can represent a single deck or multiple decks
+    A deck can represent a single deck or multiple decks. The per-card
+    tables (ranks, suits, ...) are shared between decks, so each deck
+    only stores its shuffled order, cursor and hands.
+
+    Args:
+        num_decks: The number of individual decks combined into a single deck
+        shuffle: Whether to shuffle the deck on creation
+        lazy: If true, shuffling is deferred and each card is drawn by an
+            incremental Fisher-Yates step when it is dealt, so a shuffle costs
+            O(cards dealt) instead of O(num_cards). The order of dealt cards
+            has the same distribution as with a full shuffle, but the cards
+            left in idx[:len(deck)] are only partially shuffled.
     """
 
+    keys = ["idx", "ranks", "suits", "colors"]
+    idx_keys = ["ranks_idx", "suits_idx", "colors_idx", "idx"]
+
     def get_obs_space(self, fields=["colors", "suits", "ranks"]):
         space = []
         for f in fields:
@@ -90,36 +162,78 @@ class Deck:
 
         return gym.spaces.Tuple(space)
 
-    def __init__(self, num_decks=1, shuffle=True):
+    def __init__(self, num_decks=1, shuffle=True, lazy=False):
         self.num_decks = num_decks
+        self.lazy = lazy
         self.num_cards = DECK_SIZE * num_decks
         self.idx = np.arange(self.num_cards)
 
-        self.ranks = np.tile(RANKS.repeat(SUITS.size), num_decks)
-        self.ranks_idx = np.tile(np.arange(RANKS.size).repeat(SUITS.size), num_decks)
-
-        self.suits = np.tile(np.tile(SUITS, RANKS.size), num_decks)
-        self.suits_idx = np.tile(np.tile(np.arange(SUITS.size), RANKS.size), num_decks)
-
-        self.colors = np.tile(COLORS, self.num_cards // 2)
-        self.colors_idx = np.tile(np.arange(COLORS.size), self.num_cards // 2)
+        tables = card_tables(num_decks)
+        self.ranks = tables["ranks"]
+        self.ranks_idx = tables["ranks_idx"]
+        self.suits = tables["suits"]
+        self.suits_idx = tables["suits_idx"]
+        self.colors = tables["colors"]
+        self.colors_idx = tables["colors_idx"]
+        # Per-player card buffers that can hold the entire deck, and the
+        # number of cards currently held. Unused slots are kept at zero.
         self.hands = {}
+        self.hand_lens = {}
+        # Incremental hand values, see define_hand_evaluator
+        self.evaluator = None
+        self.hand_states = {}
         # The length of the deck, which decreases as cards
         # are drawn/dealt
         self.deck_len = self.num_cards
+        # Positions of idx from shuffled_from onwards are in their final
+        # shuffled order. Only lazy decks have unshuffled positions.
+        self.shuffled_from = 0
         if shuffle:
-            np.random.shuffle(self.idx)
-
-        assert self.idx.size == self.num_cards
-        assert self.ranks.size == self.num_cards
-        assert self.suits.size == self.num_cards
-        assert self.colors.size == self.num_cards
-        assert self.ranks_idx.size == self.num_cards
-        assert self.suits_idx.size == self.num_cards
-        assert self.colors_idx.size == self.num_cards
-
-        self.keys = ["idx", "ranks", "suits", "colors"]
-        self.idx_keys = ["ranks_idx", "suits_idx", "colors_idx", "idx"]
+            self.shuffle()
+
+        # Number of cards of each rank/suit/color left in the deck,
+        # updated incrementally as cards are dealt
+        self.counts = {k: v.copy() for k, v in full_counts(num_decks).items()}
+
+    def reset_counts(self) -> None:
+        """Sets the remaining rank/suit/color counts to those of a full deck"""
+        for k, v in full_counts(self.num_decks).items():
+            self.counts[k][:] = v
+
+    def remaining_counts(self, field: str = "ranks") -> np.ndarray:
+        """Returns the number of cards of each rank, suit or color that
+        are left in the deck. These are updated as cards are dealt, so this
+        does not scan the deck."""
+        assert field in self.counts, f"{field} is not in {list(self.counts)}"
+        return self.counts[field].copy()
+
+    def remaining_probs(self, field: str = "ranks") -> np.ndarray:
+        """Returns the probability that the next card dealt has each
+        rank, suit or color"""
+        if self.deck_len == 0:
+            return np.zeros(self.counts[field].size)
+        return self.counts[field] / self.deck_len
+
+    def prob_rank_above(self, rank_idx: int) -> float:
+        """Returns the probability that the next card dealt has a rank
+        greater than rank_idx"""
+        if self.deck_len == 0:
+            return 0.0
+        return self.counts["ranks"][rank_idx + 1 :].sum() / self.deck_len
+
+    def prob_rank_below(self, rank_idx: int) -> float:
+        """Returns the probability that the next card dealt has a rank
+        less than rank_idx"""
+        if self.deck_len == 0:
+            return 0.0
+        return self.counts["ranks"][:rank_idx].sum() / self.deck_len
+
+    def prob_rank_equal(self, rank_idx: int) -> float:
+        """Returns the probability that the next card dealt has a rank
+        equal to rank_idx"""
+        if self.deck_len == 0:
+            return 0.0
+        return self.counts["ranks"][rank_idx] / self.deck_len
 
     def define_hand_value(
         self, fn: Callable[[List[str]], int], fields: List[str]
@@ -131,19 +245,75 @@ class Deck:
             assert f in self.keys, f"{f} is not {self.keys}"
         self.value_fn_args = fields
 
+    def define_hand_evaluator(self, evaluator: HandEvaluator) -> None:
+        """Pass in a HandEvaluator that updates the value of each hand as
+        cards are dealt. Once defined, value() returns the evaluator's value
+        instead of calling the function passed to define_hand_value"""
+        for f in evaluator.fields:
+            assert f in [*self.keys, *self.idx_keys], f"{f} is not a valid key"
+        self.evaluator = evaluator
+        for player in self.hands:
+            self.rebuild_hand_state(player)
+
+    def rebuild_hand_state(self, player: str) -> None:
+        """Recomputes the evaluator state of a hand from the cards it holds"""
+        idx = self.hand_view(player)
+        self.hand_states[player] = self.evaluator.add(
+            self.evaluator.init(),
+            *[getattr(self, f)[idx] for f in self.evaluator.fields],
+        )
+
     def clone(self) -> "Deck":
-        return copy.deepcopy(self)
+        # Do not copy the shared, read-only card tables
+        memo = {id(t): t for t in card_tables(self.num_decks).values()}
+        return copy.deepcopy(self, memo)
+
+    def get_state(self) -> np.ndarray:
+        """Returns a flat int array holding the deck cursors, hand lengths,
+        hand evaluator states, remaining counts, shuffled order and hand
+        buffers. This is much cheaper than clone, and is restored using
+        set_state on a deck with the same players."""
+        header = [self.deck_len, self.shuffled_from, *self.hand_lens.values()]
+        if self.evaluator is not None:
+            for state in self.hand_states.values():
+                header.extend(state)
+        return np.concatenate(
+            [header, *self.counts.values(), self.idx, *self.hands.values()]
+        )
+
+    def set_state(self, state: np.ndarray) -> None:
+        """Restores the deck to a state returned by get_state"""
+        self.deck_len = int(state[0])
+        self.shuffled_from = int(state[1])
+        offset = 2
+        for player in self.hand_lens:
+            self.hand_lens[player] = int(state[offset])
+            offset += 1
+        if self.evaluator is not None:
+            state_size = len(self.evaluator.init())
+            for player in self.hand_states:
+                self.hand_states[player] = tuple(
+                    state[offset : offset + state_size].tolist()
+                )
+                offset += state_size
+        for arr in [*self.counts.values(), self.idx, *self.hands.values()]:
+            arr[:] = state[offset : offset + arr.size]
+            offset += arr.size
+        assert offset == state.size, "State does not match this deck"
 
     def value(self, player: str) -> int:
         """Returns the value of a players hand by calling the function passed
-        to define_hand_value"""
+        to define_hand_value, or from the evaluator passed to
+        define_hand_evaluator"""
+        if self.evaluator is not None:
+            return self.evaluator.value(self.hand_states[player])
         assert hasattr(
             self, "value_fn"
         ), "Must specify a value fn using define_hand_value first!"
 
         args = []
+        idx = self.hand_view(player)
         for arg in self.value_fn_args:
-            idx = self.hands[player]
             args.append(self[arg][idx])
 
         # Numpy will attempt to unpack an ndarray
@@ -170,86 +340,195 @@ class Deck:
         return self.deck_len
 
     def __getitem__(self, item):
+        """Returns a card table, or the idx of the cards in the hand of a
+        player as a new list. See hand_view to read a hand without copying
+        it"""
         assert item in [*self.keys, *self.idx_keys, *self.hands.keys()]
         if item in [*self.keys, *self.idx_keys]:
             return getattr(self, item)
         else:
-            return self.hands[item]
+            return self.hand_view(item).tolist()
+
+    def hand_view(self, player: str) -> np.ndarray:
+        """Returns the idx of the cards in the hand of a player as a read-only
+        view of the hand buffer of the deck, which changes as cards are
+        dealt and discarded"""
+        view = self.hands[player][: self.hand_lens[player]]
+        view.flags.writeable = False
+        return view
 
     def add_players(self, *players: List[str]) -> None:
         for player in players:
-            self.hands[player] = []
+            self.hands[player] = np.zeros(self.num_cards, dtype=np.int64)
+            self.hand_lens[player] = 0
+            if self.evaluator is not None:
+                self.hand_states[player] = self.evaluator.init()
 
-    def deal(self, player: str, num_cards: int = 1) -> None:
+    def deal(self, player: str, num_cards: int = 1, one_at_a_time=False) -> None:
         """Deals a number of cards to the specified player
-        from the deck"""
+        from the deck. If one_at_a_time, the cards are placed in the hand in
+        the order that dealing them one by one would, i.e. the order of
+        peek."""
         new_len = self.deck_len - num_cards
         if new_len < 0:
             raise DeckEmptyError()
 
-        self.hands[player] += self.idx[new_len : self.deck_len].tolist()
+        if new_len < self.shuffled_from:
+            self.shuffle_to(new_len)
+        cards = self.idx[new_len : self.deck_len]
+        if one_at_a_time:
+            cards = cards[::-1]
+        hand_len = self.hand_lens[player]
+        self.hands[player][hand_len : hand_len + num_cards] = cards
+        self.hand_lens[player] = hand_len + num_cards
         self.deck_len = new_len
+        if self.evaluator is not None:
+            self.hand_states[player] = self.evaluator.add(
+                self.hand_states[player],
+                *[getattr(self, f)[cards] for f in self.evaluator.fields],
+            )
+        ranks, suits = self.counts["ranks"], self.counts["suits"]
+        colors = self.counts["colors"]
+        if num_cards < 4:
+            # Indexing is several times faster than a ufunc for a few cards
+            for card in cards.tolist():
+                ranks[self.ranks_idx[card]] -= 1
+                suits[self.suits_idx[card]] -= 1
+                colors[self.colors_idx[card]] -= 1
+        else:
+            ranks -= np.bincount(self.ranks_idx[cards], minlength=ranks.size)
+            suits -= np.bincount(self.suits_idx[cards], minlength=suits.size)
+            colors -= np.bincount(self.colors_idx[cards], minlength=colors.size)
 
     def discard_hands(self, *players: List[str]):
         """Discards the cards in the hand of a player. Note that
         these cards do not go back into the deck. Call reset()
         to fold the hands back into the deck"""
         for player in players:
-            self.hands[player].clear()
+            self.hands[player][: self.hand_lens[player]] = 0
+            self.hand_lens[player] = 0
+            if self.evaluator is not None:
+                self.hand_states[player] = self.evaluator.init()
 
     def discard_all(self):
         """Discards the cards in all player hands. Note that
         these cards do not go back into the deck. Call reset()
         to fold the hands back into the deck"""
-        for player in self.hands:
-            self.hands[player].clear()
+        self.discard_hands(*self.hands)
 
     def discard(self, player: str, hand_idx: int):
         """Discards one card in the players hand at the specified idx.
         Note this idx refers to the idx of the card in the hand, rather
         than the idx of the card in the deck"""
-        self.hands[player].pop(hand_idx)
+        hand = self.hands[player]
+        hand_len = self.hand_lens[player]
+        if hand_idx < 0:
+            hand_idx += hand_len
+        if not 0 <= hand_idx < hand_len:
+            raise IndexError(f"No card at idx {hand_idx} in hand of {player}")
+        hand[hand_idx : hand_len - 1] = hand[hand_idx + 1 : hand_len]
+        hand[hand_len - 1] = 0
+        self.hand_lens[player] = hand_len - 1
+        if self.evaluator is not None:
+            self.rebuild_hand_state(player)
 
     def reset(self, shuffle=True):
         """Empties the hands of all players and places cards
         back into the deck in their original position. Optionally
         shuffles the deck afterwards"""
-        for hands in self.hands.values():
-            hands.clear()
+        self.discard_all()
         self.deck_len = self.num_cards
+        self.reset_counts()
         if shuffle:
+            self.shuffle()
+        else:
+            self.shuffled_from = 0
+
+    def shuffle(self) -> None:
+        """Shuffles the entire deck. For lazy decks, this only marks
+        every position as unshuffled."""
+        if self.lazy:
+            self.shuffled_from = self.num_cards
+        else:
             np.random.shuffle(self.idx)
+            self.shuffled_from = 0
+
+    def shuffle_to(self, start: int) -> None:
+        """Fixes the shuffled order of positions [start, shuffled_from) of
+        a lazy deck, using one Fisher-Yates step per position"""
+        if start >= self.shuffled_from:
+            return
+        idx = self.idx
+        # Position pos is swapped with a uniformly chosen position in [0, pos]
+        highs = np.arange(self.shuffled_from, start, -1)
+        for pos, swap in zip(
+            range(self.shuffled_from - 1, start - 1, -1),
+            np.random.randint(0, highs).tolist(),
+        ):
+            idx[pos], idx[swap] = idx[swap], idx[pos]
+        self.shuffled_from = start
+
+    def peek(self, num_cards: int = 1) -> np.ndarray:
+        """Returns the idx of the next cards in the deck, in the order
+        they would be dealt one at a time, without dealing them"""
+        num_cards = min(num_cards, self.deck_len)
+        start = self.deck_len - num_cards
+        self.shuffle_to(start)
+        return self.idx[start : self.deck_len][::-1]
 
     def show(
-        self, player: str, fields: List[str] = ["colors", "suits", "ranks"], pad_to=None
-    ) -> List[np.ndarray]:
+        self,
+        player: str,
+        fields: List[str] = ["colors", "suits", "ranks"],
+        pad_to=None,
+        out=None,
+    ) -> np.ndarray:
         """Shows the hand of the player, returning the fields specified of the cards
-        they hold. Optionally zero-pad to a size."""
+        they hold. Optionally zero-pad to a size. If out is given, the result is
+        written into it instead, and it must be of shape (len(fields), width)."""
+        if pad_to is None:
+            pad_to = self.hand_lens[player]
+        assert pad_to >= self.hand_lens[player], "Cannot pad to less than hand size"
+        assert pad_to <= self.num_cards, "Cannot pad to more than the deck size"
+        # Unused slots of the hand buffer are zero, so they double as padding
+        hand_idx = self.hands[player][:pad_to]
+        if out is not None:
+            for i, f in enumerate(fields):
+                assert f in [*self.idx_keys, *self.keys], f"{f} is not a valid key"
+                if f == "idx":
+                    out[i] = hand_idx
+                else:
+                    np.take(getattr(self, f), hand_idx, out=out[i], mode="clip")
+            return out
+
         reprs = []
-        if pad_to is not None:
-            padding = [0] * (pad_to - len(self.hands[player]))
-        else:
-            padding = []
-        hand_idx = np.array(self.hands[player] + padding, dtype=np.int64)
         for f in fields:
             assert f in [*self.idx_keys, *self.keys], f"{f} is not a valid key"
-            arr = getattr(self, f)
             # Special case, do not double index indices
             if f == "idx":
-                reprs.append(np.array(hand_idx))
+                reprs.append(hand_idx)
             else:
                 # Requires indexing
-                reprs.append(arr[hand_idx])
+                reprs.append(getattr(self, f)[hand_idx])
 
         return np.stack(reprs)
 
     def hand_size(self, player: str) -> int:
-        return len(self.hands[player])
+        return self.hand_lens[player]
+
+    def last_card(self, player: str, field: str = "idx") -> int:
+        """Returns a field of the card most recently dealt to the player,
+        without copying the hand"""
+        assert field in self.idx_keys, f"{field} is not in {self.idx_keys}"
+        card = self.hands[player][self.hand_lens[player] - 1].item()
+        if field == "idx":
+            return card
+        return getattr(self, field)[card].item()
 
     def visualize(self, player: str) -> str:
         """Returns a string visualization of a player's hand, for printing
         to the terminal"""
-        if len(self[player]) == 0:
+        if self.hand_lens[player] == 0:
             return "\n".join([""] * 10)
         ranks, suits = self.show(player, ["ranks", "suits"])
         return ascii_version_of_card(ranks, suits)
@@ -262,3 +541,234 @@ class Deck:
         suits = self["suits"][idx]
         ranks = self["ranks"][idx]
         return ascii_version_of_card(ranks, suits)
+
+
+class BatchedDeck:
+    """A batch of independent decks, stored as the rows of a single array.
+
+    Each row behaves like a Deck, but cards are shuffled, dealt, shown and
+    discarded across all rows at once. Hands are fixed-width buffers with a
+    per-row length. Most methods take an optional boolean mask of shape
+    (num_envs,) that restricts the operation to a subset of rows.
+
+    Args:
+        num_envs: The number of independent decks (rows)
+        num_decks: The number of individual decks combined into each row
+        shuffle: Whether to shuffle the rows on creation
+        max_hand_size: The capacity of each hand buffer, defaults to the
+            number of cards in a row
+    """
+
+    keys = Deck.keys
+    idx_keys = Deck.idx_keys
+    get_obs_space = Deck.get_obs_space
+
+    def __init__(self, num_envs, num_decks=1, shuffle=True, max_hand_size=None):
+        self.num_envs = num_envs
+        self.num_decks = num_decks
+        self.num_cards = DECK_SIZE * num_decks
+        self.max_hand_size = self.num_cards if max_hand_size is None else max_hand_size
+        self.idx = np.tile(np.arange(self.num_cards), (num_envs, 1))
+
+        tables = card_tables(num_decks)
+        self.ranks = tables["ranks"]
+        self.ranks_idx = tables["ranks_idx"]
+        self.suits = tables["suits"]
+        self.suits_idx = tables["suits_idx"]
+        self.colors = tables["colors"]
+        self.colors_idx = tables["colors_idx"]
+        # Per-player (num_envs, max_hand_size) card buffers and their lengths
+        self.hands = {}
+        self.hand_lens = {}
+        # The length of each deck, which decreases as cards
+        # are drawn/dealt
+        self.deck_len = np.full(num_envs, self.num_cards)
+        if shuffle:
+            self.shuffle()
+
+    def __getitem__(self, item):
+        """Returns a card table, or a copy of the hands of a player, of shape
+        (num_envs, max_hand_size). See hand_view to read the hands without
+        copying them"""
+        assert item in [*self.keys, *self.idx_keys, *self.hands.keys()]
+        if item in [*self.keys, *self.idx_keys]:
+            return getattr(self, item)
+        else:
+            return self.hands[item].copy()
+
+    def hand_view(self, player: str) -> np.ndarray:
+        """Returns the hands of a player as a read-only view of the hand
+        buffer of the deck, which changes as cards are dealt and discarded.
+        Slots past the end of a hand are zero."""
+        view = self.hands[player][:]
+        view.flags.writeable = False
+        return view
+
+    def _rows(self, mask=None) -> np.ndarray:
+        if mask is None:
+            return np.arange(self.num_envs)
+        return np.flatnonzero(mask)
+
+    def add_players(self, *players: List[str]) -> None:
+        for player in players:
+            self.hands[player] = np.zeros(
+                (self.num_envs, self.max_hand_size), dtype=np.int64
+            )
+            self.hand_lens[player] = np.zeros(self.num_envs, dtype=np.int64)
+
+    def shuffle(self, mask=None) -> None:
+        """Shuffles each selected row independently, using a single
+        vectorized call"""
+        rows = self._rows(mask)
+        order = np.random.rand(rows.size, self.num_cards).argsort(axis=1)
+        self.idx[rows] = np.take_along_axis(self.idx[rows], order, axis=1)
+
+    def deal(self, player: str, num_cards: int = 1, mask=None) -> None:
+        """Deals a number of cards to the specified player in each
+        selected row"""
+        rows = self._rows(mask)
+        new_len = self.deck_len[rows] - num_cards
+        if np.any(new_len < 0):
+            raise DeckEmptyError()
+        hand_len = self.hand_lens[player][rows]
+        assert np.all(hand_len + num_cards <= self.max_hand_size), "Hand buffer is full"
+
+        offsets = np.arange(num_cards)
+        cards = self.idx[rows[:, None], new_len[:, None] + offsets]
+        self.hands[player][rows[:, None], hand_len[:, None] + offsets] = cards
+        self.hand_lens[player][rows] += num_cards
+        self.deck_len[rows] = new_len
+
+    def discard_hands(self, *players: List[str], mask=None) -> None:
+        """Discards the cards in the hands of the players in each
+        selected row. Note that these cards do not go back into the deck.
+        Call reset() to fold the hands back into the deck"""
+        rows = self._rows(mask)
+        for player in players:
+            self.hands[player][rows] = 0
+            self.hand_lens[player][rows] = 0
+
+    def discard_all(self, mask=None) -> None:
+        """Discards the cards in all player hands in each selected row"""
+        self.discard_hands(*self.hands, mask=mask)
+
+    def discard(self, player: str, hand_idx: int, mask=None) -> None:
+        """Discards one card in the player's hand at the specified idx in
+        each selected row. Note this idx refers to the idx of the card in the
+        hand, rather than the idx of the card in the deck. As for Deck, a
+        negative idx counts back from the end of each row's hand"""
+        rows = self._rows(mask)
+        hand_len = self.hand_lens[player][rows]
+        hand_idx = np.where(hand_idx < 0, hand_idx + hand_len, hand_idx)
+        if np.any((hand_idx < 0) | (hand_idx >= hand_len)):
+            raise IndexError(f"No card at idx {hand_idx} in hand of {player}")
+        # Shift the cards after hand_idx one slot to the left
+        cols = np.arange(self.max_hand_size)
+        src = np.minimum(cols + (cols >= hand_idx[:, None]), self.max_hand_size - 1)
+        shifted = np.take_along_axis(self.hands[player][rows], src, axis=1)
+        shifted[np.arange(rows.size), hand_len - 1] = 0
+        self.hands[player][rows] = shifted
+        self.hand_lens[player][rows] -= 1
+
+    def reset(self, shuffle=True, mask=None) -> None:
+        """Empties the hands of all players and places cards back into the
+        deck for each selected row. Optionally shuffles the rows afterwards"""
+        self.discard_all(mask=mask)
+        self.deck_len[self._rows(mask)] = self.num_cards
+        if shuffle:
+            self.shuffle(mask=mask)
+
+    def show(
+        self, player: str, fields: List[str] = ["colors", "suits", "ranks"], pad_to=None
+    ) -> np.ndarray:
+        """Shows the hand of the player in every row, returning an array of
+        shape (len(fields), num_envs, width). Slots past the end of a hand are
+        zero-padded, and width defaults to the largest hand in the batch."""
+        if pad_to is None:
+            pad_to = int(self.hand_lens[player].max(initial=0))
+        assert pad_to <= self.max_hand_size, "Cannot pad past max_hand_size"
+        hand_idx = self.hands[player][:, :pad_to]
+        reprs = []
+        for f in fields:
+            assert f in [*self.idx_keys, *self.keys], f"{f} is not a valid key"
+            if f == "idx":
+                reprs.append(hand_idx.copy())
+            else:
+                reprs.append(getattr(self, f)[hand_idx])
+
+        return np.stack(reprs)
+
+    def hand_size(self, player: str) -> np.ndarray:
+        return self.hand_lens[player].copy()
+
+
+class RankStream:
+    """Streams the ranks of a shuffled shoe in the order they are dealt,
+    without storing the shoe. Only the count of each rank not yet drawn is
+    kept, and ranks are drawn in blocks: the ranks in a block follow a
+    multivariate hypergeometric distribution over the counts, and are then
+    shuffled. This gives the same distribution as dealing from a shuffled
+    Deck, using O(13 + block_size) memory for any number of decks.
+
+    Args:
+        num_decks: The number of individual decks combined into the shoe
+        block_size: The number of ranks drawn at once
+    """
+
+    get_obs_space = Deck.get_obs_space
+
+    def __init__(self, num_decks=1, block_size=4096):
+        self.num_decks = num_decks
+        self.num_cards = DECK_SIZE * num_decks
+        self.block_size = block_size
+        self.counts = full_counts(num_decks)["ranks"].copy()
+        self.reset()
+
+    def reset(self) -> None:
+        """Puts every card back into the shoe"""
+        self.counts[:] = full_counts(self.num_decks)["ranks"]
+        self.undrawn = self.num_cards
+        self.deck_len = self.num_cards
+        self.block: List[int] = []
+        self.pos = 0
+
+    def __len__(self):
+        return self.deck_len
+
+    def draw_block(self) -> None:
+        size = min(self.block_size, self.undrawn)
+        block_counts = np.zeros_like(self.counts)
+        # Draw the number of cards of each rank in turn, conditioned on the
+        # ranks drawn so far
+        left = size
+        rest = self.undrawn
+        for rank, count in enumerate(self.counts.tolist()):
+            if left == 0:
+                break
+            rest -= count
+            block_counts[rank] = np.random.hypergeometric(count, rest, left)
+            left -= block_counts[rank]
+        self.counts -= block_counts
+        self.undrawn -= size
+        block = np.repeat(np.arange(RANKS.size), block_counts)
+        np.random.shuffle(block)
+        self.block = block.tolist()
+        self.pos = 0
+
+    def deal(self) -> int:
+        """Returns the rank idx of the next card"""
+        if self.pos == len(self.block):
+            if self.deck_len == 0:
+                raise DeckEmptyError()
+            self.draw_block()
+        rank = self.block[self.pos]
+        self.pos += 1
+        self.deck_len -= 1
+        return rank
+
+    def get_state(self) -> Tuple:
+        return self.counts.copy(), self.undrawn, self.deck_len, self.block, self.pos
+
+    def set_state(self, state: Tuple) -> None:
+        counts, self.undrawn, self.deck_len, self.block, self.pos = state
+        self.counts[:] = counts
@@ -0,0 +1,193 @@
+"""Infinite streams of supervised data for the memory tasks, for pretraining
+sequence models without running the gym step loop.
+
+Each task below plays whole episodes of an environment with its correct or
+oracle policy, for many episodes at once with NumPy. An episode of length T
+is given as arrays of shape (num, T, ...): the observation the agent sees
+before each action, the target action, and the reward that action earns. As
+in a gym loop with auto-reset, the observation after the last action of an
+episode is the first observation of the next one.
+"""
+import math
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from pogym.core.deck import RANKS, full_counts
+
+
+def shoes(rng: np.random.Generator, num: int, num_decks: int) -> np.ndarray:
+    """Returns the ranks of num shuffled shoes, in the order they are dealt"""
+    ranks = np.repeat(np.arange(RANKS.size), full_counts(num_decks)["ranks"])
+    return rng.permuted(np.tile(ranks, (num, 1)), axis=1)
+
+
+def repeat_first(rng, num, num_decks=1):
+    """RepeatFirst, always repeating the first card"""
+    cards = shoes(rng, num, num_decks)
+    num_cards = cards.shape[1]
+    obs = np.stack([np.zeros_like(cards[:, :-1]), cards[:, :-1]], axis=-1)
+    obs[:, 0, 0] = 1
+    target = np.repeat(cards[:, :1], num_cards - 1, axis=1)
+    reward = np.full(target.shape, 1 / num_cards)
+    return obs, target, reward
+
+
+def repeat_previous(rng, num, num_decks=1, k=16):
+    """RepeatPrevious, always repeating the card k steps back, or pressing 0
+    before there is one"""
+    cards = shoes(rng, num, num_decks)
+    num_cards = cards.shape[1]
+    has_prev = np.arange(num_cards - 1) >= k
+    has_prev[0] = True
+    obs = np.stack(
+        [np.broadcast_to(has_prev, (num, num_cards - 1)), cards[:, :-1]], axis=-1
+    ).astype(cards.dtype)
+    target = np.zeros_like(cards[:, :-1])
+    target[:, k - 1 :] = cards[:, : num_cards - k]
+    reward = np.zeros(target.shape)
+    reward[:, k - 1 :] = 1 / (num_cards - k)
+    return obs, target, reward
+
+
+def higher_lower(rng, num, num_decks=1):
+    """HigherLower, guessing like HigherLower.oracle_action, from the count
+    of every rank left in the shoe"""
+    cards = shoes(rng, num, num_decks)
+    num_cards = cards.shape[1]
+    current = cards[:, :-1]
+    # The number of cards of each rank left after each position
+    onehot = (cards[:, 1:, None] == np.arange(RANKS.size)).astype(np.int32)
+    left = np.flip(np.flip(onehot, 1).cumsum(1), 1)
+    equal = np.take_along_axis(left, current[..., None], 2)[..., 0]
+    at_most = np.take_along_axis(left.cumsum(2), current[..., None], 2)[..., 0]
+    higher = left.sum(2) - at_most
+    lower = at_most - equal
+    # Guess higher (0) unless more of the cards left are lower
+    target = (lower > higher).astype(cards.dtype)
+    sign = np.sign(cards[:, 1:] - current)
+    reward = np.where(target == 0, sign, -sign) / num_cards
+    return current, target, reward
+
+
+def repeat_backwards(rng, num, game_len=32, num_buttons=4):
+    """RepeatBackwards, pressing 0 while watching and then each button in
+    the order it was shown"""
+    buttons = rng.integers(num_buttons, size=(num, game_len))
+    obs = np.zeros((num, 2 * game_len - 1, 2), dtype=buttons.dtype)
+    obs[:, :game_len, 0] = 1
+    obs[:, :game_len, 1] = buttons
+    target = np.zeros((num, 2 * game_len - 1), dtype=buttons.dtype)
+    target[:, game_len - 1 :] = buttons
+    reward = np.zeros(target.shape)
+    reward[:, game_len - 1 :] = 1 / game_len
+    return obs, target, reward
+
+
+TASKS = {
+    "RepeatFirst": repeat_first,
+    "RepeatPrevious": repeat_previous,
+    "HigherLower": higher_lower,
+    "RepeatBackwards": repeat_backwards,
+}
+
+
+def episodes(
+    env_id: str, num_rows: int, num_episodes: int, seed: Any, env_kwargs: Dict
+) -> Tuple[np.ndarray, ...]:
+    """Plays num_episodes episodes of env_id back to back in each of num_rows
+    rows, returning obs, target_action, reward and done of shape
+    (num_rows, num_episodes * T, ...)"""
+    rng = np.random.default_rng(seed)
+    obs, target, reward = TASKS[env_id](rng, num_rows * num_episodes, **env_kwargs)
+    done = np.zeros(target.shape, dtype=bool)
+    done[:, -1] = True
+    return tuple(
+        x.reshape(num_rows, -1, *x.shape[2:]) for x in (obs, target, reward, done)
+    )
+
+
+def stream(
+    env_id: str,
+    batch_size: int,
+    seq_len: int,
+    seed: Optional[int] = None,
+    num_workers: int = 0,
+    prefetch: int = 4,
+    **env_kwargs,
+) -> Iterator[Tuple[np.ndarray, ...]]:
+    """Yields batches of (obs, target_action, reward, done) forever. Each row of
+    a batch is a stream of episodes played by the correct or oracle policy,
+    cut into windows of seq_len steps: row i of a batch continues where row i
+    of the previous batch stopped. Rows start at random points of their
+    first episode, so that episode boundaries differ between rows.
+
+    Args:
+        env_id: One of TASKS, or its gym id such as "pogym-HigherLower-v0"
+        batch_size: The number of rows in a batch
+        seq_len: The number of steps in a row
+        seed: Seeds the stream, which is the same for any num_workers
+        num_workers: The number of processes playing episodes, or 0 to play
+            them in this process
+        prefetch: The number of chunks of episodes queued up ahead with
+            num_workers
+        env_kwargs: Passed to the task, e.g. num_decks or k
+
+    Returns:
+        A generator of arrays of shape (batch_size, seq_len, ...)
+    """
+    if env_id.startswith("pogym-"):
+        env_id = env_id[len("pogym-") : env_id.rindex("-v")]
+    assert env_id in TASKS, f"No data stream for {env_id}"
+    seeds = np.random.SeedSequence(seed)
+    rng = np.random.default_rng(seeds.spawn(1)[0])
+    episode_len = TASKS[env_id](rng, 1, **env_kwargs)[1].shape[1]
+    num_episodes = math.ceil(seq_len / episode_len)
+    chunks = play(
+        env_id, batch_size, num_episodes, seeds, env_kwargs, num_workers, prefetch
+    )
+
+    # Drop a random number of steps from the start of each row
+    first = next(chunks)
+    steps = np.arange(num_episodes * episode_len - episode_len + 1)
+    steps = rng.integers(episode_len, size=(batch_size, 1)) + steps
+    buffer = [
+        np.take_along_axis(x, steps.reshape(*steps.shape, *[1] * (x.ndim - 2)), 1)
+        for x in first
+    ]
+    try:
+        while True:
+            while buffer[0].shape[1] < seq_len:
+                chunk = next(chunks)
+                buffer = [np.concatenate(x, 1) for x in zip(buffer, chunk)]
+            yield tuple(np.ascontiguousarray(x[:, :seq_len]) for x in buffer)
+            buffer = [x[:, seq_len:] for x in buffer]
+    finally:
+        chunks.close()
+
+
+def play(env_id, num_rows, num_episodes, seeds, env_kwargs, num_workers, prefetch):
+    """Yields chunks of episodes from episodes, each with a new seed"""
+    if num_workers == 0:
+        while True:
+            yield episodes(
+                env_id, num_rows, num_episodes, seeds.spawn(1)[0], env_kwargs
+            )
+
+    pool = ProcessPoolExecutor(num_workers)
+    args = env_id, num_rows, num_episodes
+    futures = deque(
+        pool.submit(episodes, *args, seeds.spawn(1)[0], env_kwargs)
+        for i in range(prefetch)
+    )
+    try:
+        while True:
+            chunk = futures.popleft().result()
+            futures.append(pool.submit(episodes, *args, seeds.spawn(1)[0], env_kwargs))
+            yield chunk
+    finally:
+        for future in futures:
+            future.cancel()
+        pool.shutdown()
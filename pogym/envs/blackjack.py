@@ -4,7 +4,8 @@ from typing import Any, Dict, Optional, Tuple, Union
 import gym
 import numpy as np
 
-from pogym.core.deck import Deck, DeckEmptyError
+from pogym.core.deck import BatchedDeck, Deck, DeckEmptyError, HandEvaluator
+from pogym.envs import blackjack_oracle
 
 
 class Phase(enum.IntEnum):
@@ -48,6 +49,52 @@ def hand_value(hand):
     return value
 
 
+# The hard value of each card, indexed by rank idx
+CARD_VALUES = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10]
+# The hand value, indexed by [hard total][has_ace]. Totals past the
+# end of the table cannot count an ace as 11, so their value is the total
+HAND_VALUES = [(total, total + 10 if total < 11 else total) for total in range(32)]
+
+
+def obs_dtype(max_rounds):
+    """The dtype of structured observations, with a field for each key of the
+    observation space. Stacking records from many steps or tables gives one
+    contiguous array that can be viewed per field."""
+    return np.dtype(
+        [
+            ("phase", np.int64),
+            ("dealer_hand", np.int64, (max_rounds,)),
+            ("dealer_hand_cards_in_play", np.int8, (max_rounds,)),
+            ("player_hand", np.int64, (max_rounds,)),
+            ("player_hand_cards_in_play", np.int8, (max_rounds,)),
+        ]
+    )
+
+
+class BlackJackHand(HandEvaluator):
+    """Evaluates blackjack hands incrementally. The state of a hand is its
+    hard total (aces count as one) and whether it holds an ace, and the value
+    is read from HAND_VALUES."""
+
+    fields = ["ranks_idx"]
+
+    def init(self):
+        return 0, 0
+
+    def add(self, state, ranks_idx):
+        total, has_ace = state
+        for rank in ranks_idx.tolist():
+            total += CARD_VALUES[rank]
+            has_ace |= rank == 0
+        return total, has_ace
+
+    def value(self, state):
+        total, has_ace = state
+        if total < len(HAND_VALUES):
+            return HAND_VALUES[total][has_ace]
+        return total
+
+
 class BlackJack(gym.Env):
     """A game of blackjack, where card counting is possible. Successful agents
     should learn to count cards, and bet higher/hit less often when the deck
@@ -64,6 +111,32 @@ class BlackJack(gym.Env):
         games_per_episode: The number of games per episode. This must be set high
             for card-counting to have an effect. When set to one, the game
             becomes fully observable.
+        lazy_shuffle: Shuffle the shoe lazily, one card at a time as cards
+            are dealt. This makes resets cheaper for large shoes that are
+            rarely exhausted within an episode.
+        info_level: What to put in the info dict. "debug" holds the hands,
+            their values and a human-readable result, and is required for
+            render. "minimal" only holds the phase and current bet, and
+            "none" returns an empty dict. Lower levels are faster to step.
+        dealer_probs: Add "dealer_probs" to the info dict. While the dealer
+            only holds the upcard, this is the probability of each final
+            dealer outcome given the upcard and the remaining cards, indexed
+            by the final value (0-21), then bust, natural and running out of
+            cards, as in blackjack_oracle. It is zero otherwise.
+        oracle_bets: Solve the next game with the oracle whenever one
+            starts, on reset and in the step that ends the previous game,
+            so that the bet decisions of oracle_action are a cache lookup.
+            This moves the cost of solving a game, tens of milliseconds,
+            from the bet decision into those steps.
+        reuse_obs: Keep the observation in buffers owned by the env, and only
+            write the cards dealt since the last step and the phase, rather
+            than building a new observation each step. The same dict is
+            returned every step, so it is overwritten by the next step.
+        copy_obs: With reuse_obs, return a copy of the buffers instead, for
+            callers that keep references to past observations.
+        structured_obs: Return each observation as a single record of dtype
+            obs_dtype(max_rounds) instead of a dict, holding the same values.
+            Unless reuse_obs is set, each step returns a new record.
 
     Returns:
         A gym environment
@@ -75,12 +148,28 @@ class BlackJack(gym.Env):
         num_decks=1,
         max_rounds=6,
         games_per_episode=20,
+        lazy_shuffle=False,
+        info_level="debug",
+        dealer_probs=False,
+        oracle_bets=False,
+        reuse_obs=False,
+        copy_obs=False,
+        structured_obs=False,
     ):
+        assert info_level in ["none", "minimal", "debug"], "Invalid info_level"
         self.bet_sizes = bet_sizes
         self.max_rounds = max_rounds
-
-        self.deck = Deck(num_decks=num_decks)
+        self.info_level = info_level
+        self.dealer_probs = dealer_probs
+        self.oracle_bets = oracle_bets
+        self.reuse_obs = reuse_obs
+        self.copy_obs = copy_obs
+        self.structured_obs = structured_obs
+        self.obs_dtype = obs_dtype(max_rounds)
+
+        self.deck = Deck(num_decks=num_decks, lazy=lazy_shuffle)
         self.deck.define_hand_value(hand_value, ["ranks"])
+        self.deck.define_hand_evaluator(BlackJackHand())
         self.deck.add_players("dealer", "player")
         card_obs_space = self.deck.get_obs_space(["ranks"])
 
@@ -104,11 +193,27 @@ class BlackJack(gym.Env):
             }
         )
         self.action_phase = Phase.BET
+        if structured_obs:
+            self.obs_buffer = np.zeros((), dtype=self.obs_dtype)
+        else:
+            self.obs_buffer = {
+                "phase": self.action_phase.value,
+                "dealer_hand": np.zeros(max_rounds, dtype=np.int64),
+                "dealer_hand_cards_in_play": np.zeros(max_rounds, dtype=np.int8),
+                "player_hand": np.zeros(max_rounds, dtype=np.int64),
+                "player_hand_cards_in_play": np.zeros(max_rounds, dtype=np.int8),
+            }
+        # The number of cards of each hand written to the buffers
+        self.obs_buffer_lens = {"dealer": 0, "player": 0}
+        # Built on first use, see get_oracle
+        self.oracle = None
 
     def bet(self, action):
         # In bet action mode, we don't do anything
         # we inform the player to place a bet
         # which we set during the deal phase
+        if self.info_level != "debug":
+            return ""
         result = f"placed bet of {self.curr_bet}"
         return result
 
@@ -141,10 +246,7 @@ class BlackJack(gym.Env):
         dealer_plays = (not player_bust and not player_hit) or player_blackjack
 
         if dealer_plays:
-            dealer_value = self.deck.value("dealer")
-            while dealer_value < 17 and self.deck.hand_size("dealer") < self.max_rounds:
-                self.deck.deal("dealer", 1)
-                dealer_value = self.deck.value("dealer")
+            dealer_value = self.play_dealer()
         else:
             dealer_value = self.deck.value("dealer")
 
@@ -156,24 +258,24 @@ class BlackJack(gym.Env):
         # compare
         if player_adv == 0:
             reward = 0
-            result = f"player ({player_value}) and dealer ({dealer_value}) push"
+            result = "player ({player_value}) and dealer ({dealer_value}) push"
         elif player_adv > 0:
             reward = self.curr_bet
-            result = f"player ({player_value}) beats dealer ({dealer_value})"
+            result = "player ({player_value}) beats dealer ({dealer_value})"
         elif player_adv < 0:
             reward = -self.curr_bet
-            result = f"player ({player_value}) loses to dealer ({dealer_value})"
+            result = "player ({player_value}) loses to dealer ({dealer_value})"
 
         # busts
         if player_bust and not dealer_bust:
             reward = -self.curr_bet
-            result = f"player ({player_value}) bust"
+            result = "player ({player_value}) bust"
         elif dealer_bust and not player_bust:
             reward = self.curr_bet
-            result = f"dealer ({dealer_value}) bust"
+            result = "dealer ({dealer_value}) bust"
         elif dealer_bust and player_bust:
             reward = 0
-            result = f"player ({player_value}) and dealer ({dealer_value}) bust"
+            result = "player ({player_value}) and dealer ({dealer_value}) bust"
 
         # naturals
         if player_natural and not dealer_natural:
@@ -186,8 +288,39 @@ class BlackJack(gym.Env):
             result = "push: player and dealer naturals"
             reward = 0
 
+        # Results are templates, only format them when they are used
+        if self.info_level == "debug":
+            result = result.format(player_value=player_value, dealer_value=dealer_value)
         return reward, game_done, result
 
+    def play_dealer(self):
+        """The dealer draws until reaching 17 or holding max_rounds cards.
+        Rather than dealing and evaluating one card at a time, the cards
+        the dealer draws are found in one pass over the upcoming cards, and
+        are dealt in one go. The dealer draws at most max_rounds - 1 cards,
+        which a Python loop goes over faster than numpy calls would, see
+        examples/benchmark_blackjack_dealer.py."""
+        total, has_ace = self.deck.hand_states["dealer"]
+        dealer_value = self.deck.value("dealer")
+        max_draws = self.max_rounds - self.deck.hand_size("dealer")
+        if dealer_value >= 17 or max_draws <= 0:
+            return dealer_value
+
+        ranks = self.deck.ranks_idx[self.deck.peek(max_draws)].tolist()
+        num_draws = 0
+        for rank in ranks:
+            num_draws += 1
+            total += CARD_VALUES[rank]
+            has_ace |= rank == 0
+            dealer_value = total + 10 if has_ace and total < 11 else total
+            if dealer_value >= 17:
+                break
+        # Deal the cards before raising, as dealing one at a time would
+        self.deck.deal("dealer", num_draws, one_at_a_time=True)
+        if dealer_value < 17 and num_draws < max_draws:
+            raise DeckEmptyError()
+        return dealer_value
+
     def game_reset(self):
         """Resets a game, but not the entire env."""
         self.curr_game += 1
@@ -222,7 +355,8 @@ class BlackJack(gym.Env):
                 self.obs, self.info = self.build_obs_infos(result)
         except DeckEmptyError:
             done = True
-            self.info["result"] += ", deck empty, episode over"
+            if self.info_level == "debug":
+                self.info["result"] += ", deck empty, episode over"
 
         self.curr_round += 1
 
@@ -234,9 +368,116 @@ class BlackJack(gym.Env):
         if self.curr_game == self.games_per_episode - 1:
             done = True
 
+        if game_done and not done and self.oracle_bets:
+            self.solve_next_game()
+
         return self.obs, reward, done, self.info
 
+    def get_state(self):
+        """Returns a compact snapshot of the game that can be restored with
+        set_state, e.g. when branching for search. This is much cheaper
+        than deepcopying the env."""
+        return (
+            self.deck.get_state(),
+            self.curr_game,
+            self.curr_round,
+            self.action_phase,
+            self.curr_bet,
+            self.copy_observation(self.obs) if self.reuse_obs else self.obs,
+            dict(self.info),
+        )
+
+    def set_state(self, state):
+        """Restores the game to a snapshot returned by get_state"""
+        (
+            deck_state,
+            self.curr_game,
+            self.curr_round,
+            self.action_phase,
+            self.curr_bet,
+            obs,
+            info,
+        ) = state
+        self.info = dict(info)
+        self.deck.set_state(deck_state)
+        if self.reuse_obs or self.structured_obs:
+            if self.structured_obs:
+                self.obs_buffer[...] = obs
+            else:
+                for k, v in obs.items():
+                    if k == "phase":
+                        self.obs_buffer[k] = v
+                    else:
+                        self.obs_buffer[k][:] = v
+            for player in self.obs_buffer_lens:
+                in_play = obs[f"{player}_hand_cards_in_play"]
+                self.obs_buffer_lens[player] = int(in_play.sum())
+            self.obs = self.obs_buffer
+            if self.copy_obs or not self.reuse_obs:
+                self.obs = self.copy_observation(self.obs_buffer)
+        else:
+            self.obs = obs
+
+    def get_oracle(self):
+        """Returns the oracle, building it on the first call"""
+        if self.oracle is None:
+            self.oracle = blackjack_oracle.BlackJackOracle(max_rounds=self.max_rounds)
+        return self.oracle
+
+    def solve_next_game(self):
+        """Computes the value of the next game with the oracle, which caches
+        it for the bet decision, see oracle_bets"""
+        comp = blackjack_oracle.composition(self.deck.remaining_counts("ranks"))
+        self.get_oracle().game_value(comp)
+
+    def dealer_outcome_probs(self):
+        """Returns the probability of each final dealer outcome given the
+        upcard and the remaining cards, or zeros if the dealer does not
+        hold only the upcard"""
+        if self.deck.hand_size("dealer") != 1:
+            return np.zeros(blackjack_oracle.NUM_OUTCOMES)
+        to_value = blackjack_oracle.RANK_TO_VALUE
+        upcard = to_value[self.deck.last_card("dealer", "ranks_idx")]
+        comp = blackjack_oracle.composition(self.deck.remaining_counts("ranks"))
+        return self.get_oracle().dealer_outcomes(upcard, np.array([comp]))[0]
+
+    def oracle_action(self, state=None):
+        """Returns the action with the highest exact expected reward given the
+        cards left in the shoe, which is an upper bound for card counting
+        agents. While playing, this is whether to hit, otherwise it is the
+        bet size maximizing the expected reward of the next game, which is
+        only a lookup with oracle_bets.
+
+        Args:
+            state: A snapshot from get_state to act in, or None to act in the
+                current game
+
+        Returns:
+            An action from the action space
+        """
+        if state is not None:
+            current = self.get_state()
+            self.set_state(state)
+            try:
+                return self.oracle_action()
+            finally:
+                self.set_state(current)
+
+        oracle = self.get_oracle()
+        comp = blackjack_oracle.composition(self.deck.remaining_counts("ranks"))
+        if self.action_phase == Phase.PLAY:
+            to_value = blackjack_oracle.RANK_TO_VALUE
+            hand = [to_value[r] for r in self.deck.show("player", ["ranks_idx"])[0]]
+            upcard = to_value[self.deck.show("dealer", ["ranks_idx"])[0][0]]
+            stay, hit = oracle.action_values(hand, upcard, comp)
+            return {"hit": int(hit > stay), "bet_size": 0}
+
+        value = oracle.game_value(comp)
+        bet_size = np.argmax(np.array(self.bet_sizes) * value)
+        return {"hit": 0, "bet_size": int(bet_size)}
+
     def render(self):
+        assert self.info_level == "debug", "Rendering requires info_level='debug'"
         phase = Phase(self.obs["phase"]).name
         print(f"Phase: {phase}")
         print(f"Current Bet: {self.info['current_bet']}")
@@ -249,7 +490,61 @@ class BlackJack(gym.Env):
         print(self.info["result"])
         print("_______________________________")
 
+    def copy_observation(self, obs):
+        if self.structured_obs:
+            return obs.copy()
+        return {k: v if k == "phase" else v.copy() for k, v in obs.items()}
+
+    def update_obs_buffer(self):
+        """Writes the cards dealt since the last update and the phase into
+        the observation buffers, and clears the slots of discarded cards"""
+        obs = self.obs_buffer
+        obs["phase"] = self.action_phase.value
+        for player, prev_len in self.obs_buffer_lens.items():
+            hand_len = self.deck.hand_size(player)
+            if hand_len == prev_len:
+                continue
+            hand = obs[f"{player}_hand"]
+            in_play = obs[f"{player}_hand_cards_in_play"]
+            if hand_len > prev_len:
+                cards = self.deck.hand_view(player)[prev_len:hand_len]
+                hand[prev_len:hand_len] = self.deck.ranks_idx[cards]
+                in_play[prev_len:hand_len] = 1
+            else:
+                hand[hand_len:prev_len] = 0
+                in_play[hand_len:prev_len] = 0
+            self.obs_buffer_lens[player] = hand_len
+        if self.copy_obs or not self.reuse_obs:
+            return self.copy_observation(obs)
+        return obs
+
     def build_obs_infos(self, result=""):
+        if self.reuse_obs or self.structured_obs:
+            obs = self.update_obs_buffer()
+        else:
+            obs = self.build_obs()
+        infos: Dict[str, Any] = {}
+        if self.dealer_probs:
+            infos["dealer_probs"] = self.dealer_outcome_probs()
+        if self.info_level == "none":
+            return obs, infos
+
+        infos["phase"] = self.action_phase
+        infos["current_bet"] = self.curr_bet
+        if self.info_level == "debug":
+            infos.update(
+                {
+                    "dealer_hand_idx": self.deck.show("dealer", ["idx"])[0],
+                    "dealer_value": self.deck.value("dealer"),
+                    "player_hand_idx": self.deck.show("player", ["idx"])[0],
+                    "player_value": self.deck.value("player"),
+                    "result": result,
+                }
+            )
+
+        return obs, infos
+
+    def build_obs(self):
         # Convert card ids to color, suit, rank
         dealer = self.deck.show("dealer", ["ranks_idx"], pad_to=self.max_rounds)[0]
         dealer_size = self.deck.hand_size("dealer")
@@ -269,17 +564,7 @@ class BlackJack(gym.Env):
             "player_hand": player.copy(),
             "player_hand_cards_in_play": player_hand_cards_in_play,
         }
-        infos: Dict[str, Any] = {
-            "phase": self.action_phase,
-            "current_bet": self.curr_bet,
-            "dealer_hand_idx": self.deck.show("dealer", ["idx"])[0],
-            "dealer_value": self.deck.value("dealer"),
-            "player_hand_idx": self.deck.show("player", ["idx"])[0],
-            "player_value": self.deck.value("player"),
-            "result": result,
-        }
-
-        return obs, infos
+        return obs
 
     def reset(
         self,
@@ -297,12 +582,220 @@ class BlackJack(gym.Env):
         self.deck.reset()
         self.obs, self.info = self.build_obs_infos()
         self.action_phase = Phase.DEAL
+        if self.oracle_bets:
+            self.solve_next_game()
         if return_info:
             return self.obs, self.info
 
         return self.obs
 
 
+class BlackJackVec(gym.Env):
+    """Many independent games of BlackJack, stepped together. The phases,
+    hands, bets and shoes of all tables are stored as arrays and each step
+    applies the BET/DEAL/PLAY/PAYOUT transitions with masked NumPy ops. The
+    rules are the same as BlackJack, but info only holds numeric fields.
+
+    Observations, rewards and dones are stacked along a leading axis of size
+    num_envs, and each row of an observation belongs to observation_space.
+    Actions are a dict of arrays with one entry per table. Finished tables
+    are reset automatically, and the returned observation for those tables
+    is the first observation of the next episode.
+
+    Args:
+        num_envs: The number of tables
+        bet_sizes: The bet sizes available to the agent
+        num_decks: The number of individual decks combined into each shoe
+        max_rounds: The maximum number of rounds where the agent and dealer
+            can hit/stay
+        games_per_episode: The number of games per episode
+        structured_obs: Return observations as a (num_envs,) array of
+            obs_dtype(max_rounds) records instead of a dict of arrays
+
+    Returns:
+        A vectorized gym environment
+    """
+
+    def __init__(
+        self,
+        num_envs=1,
+        bet_sizes=[0.2, 0.4, 0.6, 0.8, 1.0],
+        num_decks=1,
+        max_rounds=6,
+        games_per_episode=20,
+        structured_obs=False,
+    ):
+        single = BlackJack(bet_sizes, num_decks, max_rounds, games_per_episode)
+        self.num_envs = num_envs
+        self.observation_space = single.observation_space
+        self.action_space = single.action_space
+        self.bet_sizes = np.array(bet_sizes)
+        self.max_rounds = max_rounds
+        self.games_per_episode = games_per_episode
+        self.structured_obs = structured_obs
+        self.obs_dtype = obs_dtype(max_rounds)
+        self.card_values = np.array(CARD_VALUES)
+
+        self.deck = BatchedDeck(num_envs, num_decks, max_hand_size=max_rounds)
+        self.deck.add_players("dealer", "player")
+        self.slots = np.arange(max_rounds)
+        self.curr_game = np.zeros(num_envs, dtype=np.int64)
+        self.curr_round = np.zeros(num_envs, dtype=np.int64)
+        self.curr_bet = np.full(num_envs, -float("inf"))
+        self.action_phase = np.full(num_envs, Phase.DEAL, dtype=np.int64)
+
+    def hand_value(self, player):
+        """Returns the blackjack value of the player's hand at every table"""
+        ranks = self.deck.ranks_idx[self.deck.hands[player]]
+        in_play = self.slots < self.deck.hand_lens[player][:, None]
+        total = (self.card_values[ranks] * in_play).sum(axis=1)
+        has_ace = ((ranks == 0) & in_play).any(axis=1)
+        return np.where(has_ace & (total < 11), total + 10, total)
+
+    def deal(self, player, num_cards, mask, deck_empty):
+        """Deals to the player at the masked tables that have enough cards
+        left, and flags the remaining masked tables in deck_empty"""
+        empty = mask & (self.deck.deck_len < num_cards)
+        deck_empty |= empty
+        mask = mask & ~empty
+        if mask.any():
+            self.deck.deal(player, num_cards, mask=mask)
+        return mask
+
+    def build_obs_infos(self, phase):
+        dealer_size = self.deck.hand_lens["dealer"]
+        player_size = self.deck.hand_lens["player"]
+        obs = {
+            "phase": phase,
+            "dealer_hand": self.deck.ranks_idx[self.deck.hands["dealer"]],
+            "dealer_hand_cards_in_play": (self.slots < dealer_size[:, None]).astype(
+                np.int8
+            ),
+            "player_hand": self.deck.ranks_idx[self.deck.hands["player"]],
+            "player_hand_cards_in_play": (self.slots < player_size[:, None]).astype(
+                np.int8
+            ),
+        }
+        if self.structured_obs:
+            records = np.empty(self.num_envs, dtype=self.obs_dtype)
+            for k, v in obs.items():
+                records[k] = v
+            obs = records
+        infos = {
+            "phase": phase.copy(),
+            "current_bet": self.curr_bet.copy(),
+            "dealer_value": self.hand_value("dealer"),
+            "player_value": self.hand_value("player"),
+        }
+        return obs, infos
+
+    def reset(
+        self,
+        *,
+        seed: Optional[int] = None,
+        return_info: bool = False,
+        options: Optional[dict] = None,
+    ):
+        if seed is not None:
+            np.random.seed(seed)
+        self.reset_tables(np.ones(self.num_envs, dtype=bool))
+        obs, info = self.build_obs_infos(np.full(self.num_envs, Phase.BET.value))
+        if return_info:
+            return obs, info
+        return obs
+
+    def reset_tables(self, mask):
+        self.curr_game[mask] = 0
+        self.curr_round[mask] = 0
+        self.curr_bet[mask] = -float("inf")
+        self.action_phase[mask] = Phase.DEAL
+        self.deck.reset(mask=mask)
+
+    def step(self, action):
+        hit = np.asarray(action["hit"]) != 0
+        bet_size = np.asarray(action["bet_size"])
+        phase = self.action_phase
+        reward = np.zeros(self.num_envs)
+        done = self.deck.deck_len < 3
+        deck_empty = np.zeros(self.num_envs, dtype=bool)
+        # The phase reported in the observation
+        obs_phase = phase.copy()
+
+        # Bet phase, the bet is taken during the deal phase
+        bet = phase == Phase.BET
+        phase[bet] = Phase.DEAL
+
+        # Deal phase
+        deal = (phase == Phase.DEAL) & ~bet | (phase == Phase.PAYOUT)
+        deal = self.deal("player", 2, deal, deck_empty)
+        deal = self.deal("dealer", 1, deal, deck_empty)
+        self.curr_bet[deal] = self.bet_sizes[bet_size[deal]]
+        obs_phase[deal] = Phase.DEAL
+        phase[deal] = Phase.PLAY
+
+        # Play phase
+        play = (phase == Phase.PLAY) & ~deal
+        hit = self.deal("player", 1, play & hit, deck_empty)
+        play &= ~deck_empty
+        player_value = self.hand_value("player")
+        player_size = self.deck.hand_lens["player"]
+        player_bust = player_value > 21
+        player_blackjack = player_value == 21
+        player_natural = player_blackjack & (player_size == 2)
+        player_max_cards = player_size == self.max_rounds
+        game_done = play & (~hit | player_bust | player_blackjack | player_max_cards)
+
+        dealer_plays = game_done & (~player_bust & ~hit | player_blackjack)
+        dealer_value = self.hand_value("dealer")
+        for _ in range(self.max_rounds):
+            draw = dealer_plays & (dealer_value < 17)
+            draw &= self.deck.hand_lens["dealer"] < self.max_rounds
+            if not draw.any():
+                break
+            draw = self.deal("dealer", 1, draw, deck_empty)
+            dealer_plays &= ~deck_empty
+            dealer_value = self.hand_value("dealer")
+        game_done &= ~deck_empty
+
+        dealer_bust = dealer_value > 21
+        dealer_natural = (dealer_value == 21) & (self.deck.hand_lens["dealer"] == 2)
+        bet = np.where(game_done, self.curr_bet, 0)
+        payout = np.sign(player_value - dealer_value) * bet
+        # Busts
+        payout = np.where(player_bust & ~dealer_bust, -bet, payout)
+        payout = np.where(dealer_bust & ~player_bust, bet, payout)
+        payout = np.where(dealer_bust & player_bust, 0, payout)
+        # Naturals
+        payout = np.where(player_natural & ~dealer_natural, 1.5 * bet, payout)
+        payout = np.where(dealer_natural & ~player_natural, -bet, payout)
+        payout = np.where(dealer_natural & player_natural, 0, payout)
+        reward[game_done] = payout[game_done]
+        obs_phase[play] = Phase.PLAY
+        obs_phase[game_done] = Phase.PAYOUT
+
+        obs, info = self.build_obs_infos(obs_phase)
+        done |= deck_empty
+        self.curr_round += 1
+
+        # Game done, reset and go to bet phase
+        self.curr_game[game_done] += 1
+        self.deck.discard_all(mask=game_done)
+        phase[game_done] = Phase.BET
+        done |= self.curr_game == self.games_per_episode - 1
+
+        if done.any():
+            # The first observation of an episode is in the bet phase
+            # with empty hands, which is all zeros
+            self.reset_tables(done)
+            if self.structured_obs:
+                obs[done] = 0
+            else:
+                for v in obs.values():
+                    v[done] = 0
+
+        return obs, reward, done, info
+
+
 if __name__ == "__main__":
     game = BlackJack()
     done = False
@@ -0,0 +1,485 @@
+import functools
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Compositions count the cards left in the shoe by value class:
+# ace, 2-9 and ten (10, j, q, k), as suits and face ranks do not matter
+NUM_VALUES = 10
+# The value class of each rank idx
+RANK_TO_VALUE = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 9, 9, 9]
+# Final dealer outcomes are the dealer hand value (0-21), a bust, a
+# natural, or running out of cards, which ends the episode without reward
+BUST = 22
+NATURAL = 23
+EMPTY = 24
+NUM_OUTCOMES = 25
+# Stand in for log(0), small enough that exp underflows to zero but
+# finite, so that multiplying by zero in a matmul does not produce NaN
+LOG_ZERO = -1e4
+
+
+def hand_value(total: int, has_ace: bool) -> int:
+    """Returns the value of a hand from its hard total"""
+    return total + 10 if has_ace and total < 11 else total
+
+
+def composition(rank_counts: Sequence[int]) -> Tuple[int, ...]:
+    """Converts the remaining count of each rank into a composition"""
+    counts = [int(c) for c in rank_counts]
+    return (*counts[:9], sum(counts[9:]))
+
+
+def dealer_outcome(total: int, has_ace: bool, num_cards: int) -> int:
+    """Returns the outcome of a final dealer hand"""
+    value = hand_value(total, has_ace)
+    if value > 21:
+        return BUST
+    if value == 21 and num_cards == 2:
+        return NATURAL
+    return value
+
+
+def dealer_stops(total: int, has_ace: bool, num_cards: int, max_rounds: int) -> bool:
+    return hand_value(total, has_ace) >= 17 or num_cards == max_rounds
+
+
+@functools.lru_cache(maxsize=None)
+def dealer_hands(upcard: int, max_rounds: int) -> Tuple[np.ndarray, ...]:
+    """Enumerates the cards the dealer can draw after the upcard. As the
+    probability of a draw sequence only depends on which cards were drawn,
+    sequences are grouped by the multiset of drawn cards.
+
+    Returns:
+        A (num_hands, NUM_VALUES) array of the number of cards of each value
+        drawn per hand, a ((NUM_VALUES + 1) * max_rounds, num_hands) array
+        mapping the log falling factorials of a composition and of its size
+        to the log probability of each draw sequence of a hand, see
+        log_falling_factorials, and a (num_hands, NUM_OUTCOMES)
+        array of the number of draw sequences leading to each outcome.
+    """
+    hands: Dict[Tuple[int, ...], int] = {}
+    outcomes: Dict[Tuple[int, ...], int] = {}
+    drawn = [0] * NUM_VALUES
+
+    def draw(total, has_ace, num_cards):
+        if dealer_stops(total, has_ace, num_cards, max_rounds):
+            key = tuple(drawn)
+            hands[key] = hands.get(key, 0) + 1
+            outcomes[key] = dealer_outcome(total, has_ace, num_cards)
+            return
+        for card in range(NUM_VALUES):
+            drawn[card] += 1
+            draw(total + card + 1, has_ace or card == 0, num_cards + 1)
+            drawn[card] -= 1
+
+    draw(upcard + 1, upcard == 0, 1)
+    keys = list(hands)
+    counts = np.array(keys, dtype=np.int64).reshape(-1, NUM_VALUES)
+    rows = np.arange(len(keys))[:, None]
+    # Each sequence draws count cards of each value, divided by the number
+    # of cards drawn from the size of the composition
+    exponents = np.zeros(((NUM_VALUES + 1) * max_rounds, len(keys)))
+    exponents[np.arange(NUM_VALUES) * max_rounds + counts, rows] = 1
+    exponents[NUM_VALUES * max_rounds + counts.sum(axis=1), rows[:, 0]] = -1
+    sequences = np.zeros((len(keys), NUM_OUTCOMES))
+    sequences[rows[:, 0], [outcomes[k] for k in keys]] = [hands[k] for k in keys]
+    for arr in [counts, exponents, sequences]:
+        arr.flags.writeable = False
+    return counts, exponents, sequences
+
+
+def log_falling_factorials(comps: np.ndarray, num_terms: int) -> np.ndarray:
+    """Returns the log of the falling factorials n * (n - 1) * ... * (n - k + 1)
+    of the count n of each value in comps and of the number of cards
+    remaining, for k in [0, num_terms), of shape
+    (batch, (NUM_VALUES + 1) * num_terms). Counts too small to draw k cards
+    of a value from have a log of LOG_ZERO."""
+    remaining = comps.sum(axis=1)
+    sizes = np.concatenate([comps, remaining[:, None]], axis=1)
+    factors = sizes[:, :, None] - np.arange(num_terms - 1)
+    log_factors = np.log(np.maximum(factors, 1))
+    log_factors[:, :NUM_VALUES][factors[:, :NUM_VALUES] <= 0] = LOG_ZERO
+    log_falling = np.zeros((len(comps), NUM_VALUES + 1, num_terms))
+    np.cumsum(log_factors, axis=2, out=log_falling[:, :, 1:])
+    return log_falling.reshape(len(comps), -1)
+
+
+@functools.lru_cache(maxsize=None)
+def full_dealer_hands(max_rounds: int) -> Tuple[np.ndarray, ...]:
+    """Groups the dealer hands of every upcard by the multiset of all their
+    cards, upcard included, as dealer_hands does for the drawn cards. The
+    dealer draws the upcard from the same shoe as the rest of their hand, so
+    the probability of a hand is shared across upcards.
+
+    Returns:
+        A (num_hands, NUM_VALUES) array of the number of cards of each value
+        per hand, a ((NUM_VALUES + 1) * (max_rounds + 1), num_hands) array
+        mapping the log falling factorials of a composition and of its size
+        to the log probability of each draw sequence of a hand, and a
+        (num_hands, NUM_VALUES, NUM_OUTCOMES) array of the number of draw
+        sequences leading to each outcome for each upcard.
+    """
+    index: Dict[Tuple[int, ...], int] = {}
+    rows = []
+    for upcard in range(NUM_VALUES):
+        counts = dealer_hands(upcard, max_rounds)[0].copy()
+        counts[:, upcard] += 1
+        for hand in map(tuple, counts.tolist()):
+            rows.append(index.setdefault(hand, len(index)))
+    counts = np.array(list(index), dtype=np.int64)
+    num_terms = max_rounds + 1
+    cols = np.arange(len(counts))[:, None]
+    exponents = np.zeros(((NUM_VALUES + 1) * num_terms, len(counts)))
+    exponents[np.arange(NUM_VALUES) * num_terms + counts, cols] = 1
+    exponents[NUM_VALUES * num_terms + counts.sum(axis=1), cols[:, 0]] = -1
+    sequences = np.zeros((len(counts), NUM_VALUES, NUM_OUTCOMES))
+    start = 0
+    for upcard in range(NUM_VALUES):
+        upcard_sequences = dealer_hands(upcard, max_rounds)[2]
+        end = start + len(upcard_sequences)
+        sequences[rows[start:end], upcard] = upcard_sequences
+        start = end
+    for arr in [counts, exponents, sequences]:
+        arr.flags.writeable = False
+    return counts, exponents, sequences
+
+
+class PlayerTree:
+    """Every player hand that can be reached from an empty hand, where the
+    first two cards are dealt and the player then hits until they stay,
+    bust, reach 21 or hold max_rounds cards. A hand is identified by the
+    multiset of its cards, as the order they were drawn in does not change
+    its value."""
+
+    def __init__(self, max_rounds: int):
+        self.max_rounds = max_rounds
+        self.index: Dict[Tuple[int, ...], int] = {}
+        hands: List[Tuple[int, ...]] = []
+        frontier = [(0,) * NUM_VALUES]
+        self.index[frontier[0]] = 0
+        hands.append(frontier[0])
+        levels = [[0]]
+        while frontier:
+            next_frontier = []
+            for hand in frontier:
+                if self.is_terminal(hand):
+                    continue
+                for card in range(NUM_VALUES):
+                    child = (*hand[:card], hand[card] + 1, *hand[card + 1 :])
+                    if child not in self.index:
+                        self.index[child] = len(hands)
+                        hands.append(child)
+                        next_frontier.append(child)
+            if next_frontier:
+                levels.append([self.index[h] for h in next_frontier])
+            frontier = next_frontier
+
+        self.hands = np.array(hands, dtype=np.int64)
+        self.levels = [np.array(level) for level in levels]
+        self.num_cards = self.hands.sum(axis=1)
+        self.total = self.hands @ np.arange(1, NUM_VALUES + 1)
+        self.has_ace = self.hands[:, 0] > 0
+        self.value = np.where(
+            self.has_ace & (self.total < 11), self.total + 10, self.total
+        )
+        # Children of each non-terminal hand by card value, -1 otherwise
+        self.children = np.full((len(hands), NUM_VALUES), -1)
+        self.terminal = np.array([self.is_terminal(h) for h in hands])
+        for i, hand in enumerate(hands):
+            if not self.terminal[i]:
+                for card in range(NUM_VALUES):
+                    child = (*hand[:card], hand[card] + 1, *hand[card + 1 :])
+                    self.children[i, card] = self.index[child]
+        self.decides = ~self.terminal & (self.num_cards >= 2)
+        self.bust = self.terminal & (self.value > 21)
+        self.twenty_one = self.terminal & (self.value == 21)
+        self.max_cards = self.terminal & ~self.bust & ~self.twenty_one
+        # Hands where the dealer plays if the player stays, or has to play
+        self.dealer_plays = np.flatnonzero(self.decides | self.twenty_one)
+        natural = (self.value == 21) & (self.num_cards == 2)
+        self.payoff_idx = np.minimum(self.value, 21), natural.astype(np.int64)
+        self.subtree = functools.lru_cache(maxsize=None)(self._subtree)
+
+    def _subtree(self, root: int) -> List[np.ndarray]:
+        """Returns the hands that can be reached from root, including root,
+        grouped by number of cards"""
+        levels = [np.array([root])]
+        while True:
+            level = levels[-1]
+            children = self.children[level[~self.terminal[level]]]
+            if children.size == 0:
+                return levels
+            levels.append(np.unique(children))
+
+    def is_terminal(self, hand: Tuple[int, ...]) -> bool:
+        num_cards = sum(hand)
+        if num_cards < 3:
+            return False
+        total = sum((card + 1) * count for card, count in enumerate(hand))
+        value = hand_value(total, hand[0] > 0)
+        return value >= 21 or num_cards == self.max_rounds
+
+
+@functools.lru_cache(maxsize=None)
+def player_tree(max_rounds: int) -> PlayerTree:
+    return PlayerTree(max_rounds)
+
+
+class BlackJackOracle:
+    """Computes the exact expected reward of hitting, staying and of the next
+    game given the exact composition of the remaining shoe, by dynamic
+    programming over the player hand, the dealer upcard and the composition.
+    This follows the rules of BlackJack: the dealer only holds an upcard
+    until the player stays, hits to 21, busts or holds max_rounds cards, and
+    the dealer only draws to 17 if the player stays or hits to 21.
+
+    Expected rewards are per unit of bet. To decide whether to hit, the
+    values of the hands the player can still reach are computed at once
+    for the dealer upcard and composition, and memoized in an LRU cache
+    keyed on them and on the first two player cards, so all decisions
+    within a game are served from one computation. The game value needs
+    the values of every hand for every upcard, which share a single table
+    of dealer hands and are kept until the next game value, so that the
+    decisions of the game that follows are served from them. cache_size
+    bounds the number of cached entries.
+
+    Args:
+        max_rounds: The maximum number of cards in a hand
+        cache_size: The maximum number of entries in each cache
+    """
+
+    def __init__(self, max_rounds=6, cache_size=256):
+        self.max_rounds = max_rounds
+        self.tree = player_tree(max_rounds)
+        self.dealer = [dealer_hands(up, max_rounds) for up in range(NUM_VALUES)]
+        # The reward of staying, indexed by [player value][player natural],
+        # for each dealer outcome
+        self.payoffs = np.zeros((22, 2, NUM_OUTCOMES))
+        for value in range(22):
+            for natural in [0, 1]:
+                payoff = self.payoffs[value, natural]
+                payoff[:22] = 1.5 if natural else np.sign(value - np.arange(22))
+                payoff[BUST] = 1.5 if natural else 1
+                payoff[NATURAL] = 0 if natural else -1
+                payoff[EMPTY] = 0
+        self.hand_payoffs = self.payoffs[self.tree.payoff_idx]
+        # The hands where the dealer plays, grouped by payoff, and the reward
+        # of staying for each full dealer hand and upcard for each payoff
+        plays = self.tree.dealer_plays
+        payoff_ids = self.tree.payoff_idx[0] * 2 + self.tree.payoff_idx[1]
+        order = np.argsort(payoff_ids[plays], kind="stable")
+        self.plays_by_payoff = plays[order]
+        payoff_ids, starts = np.unique(payoff_ids[plays][order], return_index=True)
+        self.payoff_bounds = np.append(starts, len(plays))
+        sequences = full_dealer_hands(max_rounds)[2]
+        self.stay_weights = np.einsum(
+            "hvo,po->phv", sequences, self.payoffs.reshape(-1, NUM_OUTCOMES)[payoff_ids]
+        )
+        self.hand_values = functools.lru_cache(maxsize=cache_size)(self._hand_values)
+        self.game_value = functools.lru_cache(maxsize=cache_size)(self._game_value)
+        # The values of every hand for each upcard and composition of the
+        # last game value that was computed
+        self.game_hand_values: Dict[Tuple, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def cache_clear(self) -> None:
+        self.hand_values.cache_clear()
+        self.game_value.cache_clear()
+        self.game_hand_values = {}
+
+    def dealer_outcomes(self, upcard: int, comps: np.ndarray) -> np.ndarray:
+        """Returns the distribution over final dealer outcomes for each
+        composition in comps, of shape (batch, NUM_VALUES), when the dealer
+        holds the upcard and draws from the composition"""
+        counts, exponents, sequences = self.dealer[upcard]
+        comps = np.maximum(comps, 0)
+        remaining = comps.sum(axis=1)
+        # Skip dealer hands that draw more cards of a value than any of the
+        # compositions hold
+        possible = np.all(counts <= comps.max(axis=0, initial=0), axis=1)
+        log_falling = log_falling_factorials(comps, self.max_rounds)
+        log_probs = log_falling @ exponents[:, possible]
+        dist = np.exp(log_probs) @ sequences[possible]
+
+        # Near the end of the shoe, the dealer can run out of cards
+        short = np.flatnonzero(remaining < self.max_rounds - 1)
+        for i in short:
+            dist[i] = self.small_dealer_outcomes(
+                upcard + 1, upcard == 0, 1, tuple(comps[i].tolist())
+            )
+        return dist
+
+    def small_dealer_outcomes(
+        self, total: int, has_ace: bool, num_cards: int, comp: Tuple[int, ...]
+    ) -> np.ndarray:
+        """Returns the distribution over final dealer outcomes by recursing
+        over the composition, which is only cheap for small compositions"""
+        dist = np.zeros(NUM_OUTCOMES)
+        if dealer_stops(total, has_ace, num_cards, self.max_rounds):
+            dist[dealer_outcome(total, has_ace, num_cards)] = 1
+            return dist
+        remaining = sum(comp)
+        if remaining == 0:
+            dist[EMPTY] = 1
+            return dist
+        for card, count in enumerate(comp):
+            if count:
+                rest = (*comp[:card], count - 1, *comp[card + 1 :])
+                dist += (count / remaining) * self.small_dealer_outcomes(
+                    total + card + 1, has_ace or card == 0, num_cards + 1, rest
+                )
+        return dist
+
+    def _hand_values(
+        self, upcard: int, comp: Tuple[int, ...], root: int = 0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the expected reward of staying and of hitting under optimal
+        play for every hand in the player tree that can be reached from root,
+        where comp is the composition after the upcard is dealt but before
+        any player cards are. Other hands are left at zero."""
+        tree = self.tree
+        levels = tree.subtree(root)
+        comps = np.array(comp) - tree.hands
+        # Only hands below root that can be dealt from comp need the dealer
+        reachable = np.zeros(len(comps), dtype=bool)
+        reachable[np.concatenate(levels)] = True
+        reachable &= np.all(comps >= 0, axis=1)
+        stay = np.zeros(len(comps))
+        plays = tree.dealer_plays[reachable[tree.dealer_plays]]
+        dist = self.dealer_outcomes(upcard, comps[plays])
+        stay[plays] = (self.hand_payoffs[plays] * dist).sum(axis=1)
+        stay, hit = self.solve(np.array([upcard]), comps[None], stay[None], levels)
+        return stay[0], hit[0]
+
+    def shared_stay_values(self, comp: Tuple[int, ...]) -> np.ndarray:
+        """Returns the expected reward of staying for every hand in the player
+        tree where the dealer plays and every upcard, of shape
+        (NUM_VALUES, num_hands), where comp is the composition before the
+        upcard and player cards are dealt. Other hands are left at zero.
+
+        The probability of the dealer drawing d after upcard u from c - h is
+        that of drawing u then d from c - h, divided by that of drawing u
+        first, so a single table of full dealer hands serves every upcard.
+        This needs the dealer to never run out of cards, so comp must hold
+        at least 2 * max_rounds cards."""
+        tree = self.tree
+        counts, exponents, _ = full_dealer_hands(self.max_rounds)
+        plays = self.plays_by_payoff
+        comps = np.array(comp) - tree.hands[plays]
+        dealt = np.all(comps >= 0, axis=1)
+        comps = np.maximum(comps, 0)
+        possible = np.all(counts <= np.array(comp), axis=1)
+        log_falling = log_falling_factorials(comps, self.max_rounds + 1)
+        probs = np.exp(log_falling @ exponents[:, possible])
+
+        stay = np.zeros((len(plays), NUM_VALUES))
+        bounds = self.payoff_bounds
+        for payoff, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            weights = self.stay_weights[payoff][possible]
+            stay[start:end] = probs[start:end] @ weights
+        # Divide by the probability of drawing the upcard first
+        upcard_probs = comps / comps.sum(axis=1, keepdims=True)
+        np.divide(stay, upcard_probs, out=stay, where=upcard_probs > 0)
+        stays = np.zeros((NUM_VALUES, len(tree.hands)))
+        stays[:, plays[dealt]] = stay[dealt].T
+        return stays
+
+    def solve(
+        self,
+        upcards: np.ndarray,
+        comps: np.ndarray,
+        stay: np.ndarray,
+        levels: List[np.ndarray],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Solves the player tree by dynamic programming over levels from the
+        leaves up, for each upcard in upcards at once
+
+        Args:
+            upcards: The dealer upcards, of shape (num_upcards,)
+            comps: The composition left after each upcard and hand are
+                dealt, of shape (num_upcards, num_hands, NUM_VALUES)
+            stay: The expected reward of staying for the hands where the
+                dealer plays, of shape (num_upcards, num_hands)
+            levels: The hands to solve, grouped by number of cards
+
+        Returns:
+            The expected reward of staying and of hitting, each of shape
+            (num_upcards, num_hands)
+        """
+        tree = self.tree
+        remaining = comps.sum(axis=2)
+        probs = np.divide(
+            np.maximum(comps, 0),
+            remaining[:, :, None],
+            out=np.zeros(comps.shape),
+            where=remaining[:, :, None] > 0,
+        )
+        # If the player holds max_rounds cards, the dealer does not play
+        upcard_values = np.where(upcards == 0, 11, upcards + 1)
+        stay[:, tree.max_cards] = np.sign(
+            tree.value[tree.max_cards] - upcard_values[:, None]
+        )
+        stay[:, tree.bust] = -1
+
+        hit = np.zeros(stay.shape)
+        value = stay.copy()
+        for level in reversed(levels):
+            level = level[~tree.terminal[level]]
+            children = tree.children[level]
+            hit[:, level] = (probs[:, level] * value[:, children]).sum(axis=2)
+            decides = tree.decides[level]
+            value[:, level] = np.where(
+                decides, np.maximum(stay[:, level], hit[:, level]), hit[:, level]
+            )
+        # Hitting from an empty deck ends the episode without reward
+        hit[remaining == 0] = 0
+        return stay, hit
+
+    def action_values(
+        self, hand: Sequence[int], upcard: int, comp: Sequence[int]
+    ) -> Tuple[float, float]:
+        """Returns the expected reward of staying and of hitting under optimal
+        play
+
+        Args:
+            hand: The value class of each card in the player hand, in the
+                order they were dealt
+            upcard: The value class of the dealer upcard
+            comp: The composition of the remaining shoe
+        """
+        counts = np.bincount(hand, minlength=NUM_VALUES)
+        # Key on the composition before the player cards were dealt, which
+        # does not change while the player hits
+        key = (upcard, tuple((counts + comp).tolist()))
+        if key in self.game_hand_values:
+            stay, hit = self.game_hand_values[key]
+        else:
+            # Every hand the player can reach is below the first two cards
+            first = np.bincount(hand[:2], minlength=NUM_VALUES)
+            root = self.tree.index[tuple(first.tolist())]
+            stay, hit = self.hand_values(*key, root)
+        node = self.tree.index[tuple(counts.tolist())]
+        return float(stay[node]), float(hit[node])
+
+    def _game_value(self, comp: Tuple[int, ...]) -> float:
+        """Returns the expected reward of the next game under optimal play,
+        before the player and dealer cards are dealt"""
+        remaining = sum(comp)
+        if remaining < 3:
+            return 0.0
+        self.game_hand_values = {}
+        upcards = np.flatnonzero(comp)
+        rests = [(*comp[:u], comp[u] - 1, *comp[u + 1 :]) for u in upcards]
+        if remaining < 2 * self.max_rounds:
+            # Near the end of the shoe, the dealer can run out of cards
+            values = [self._hand_values(u, rest) for u, rest in zip(upcards, rests)]
+            stay = np.array([s for s, _ in values])
+            hit = np.array([h for _, h in values])
+        else:
+            comps = np.array(rests)[:, None] - self.tree.hands
+            stay = self.shared_stay_values(comp)[upcards]
+            stay, hit = self.solve(upcards, comps, stay, self.tree.levels)
+        for i, (upcard, rest) in enumerate(zip(upcards.tolist(), rests)):
+            self.game_hand_values[upcard, rest] = stay[i], hit[i]
+        # The empty hand is the root of the tree
+        return float(np.array(comp)[upcards] @ hit[:, 0]) / remaining
@@ -46,9 +46,11 @@ class GridDrive(gym.Env):
 		self.np_random, seed = seeding.np_random(seed)
 		return [seed]
 	
-	def __init__(self, culture_level='Medium', partial_observability=False):
+	def __init__(self, culture_level='Medium', partial_observability=False, compiled_culture=True, verify_culture=False):
 		logger.warning(f'Setting environment with culture_level <{culture_level}> and partial_observability={partial_observability}')
 		self.partial_observability = partial_observability
+		self.compiled_culture = compiled_culture # look up the outcome of the culture's dialogues, instead of running them at every step
+		self.verify_culture = verify_culture # also run the dialogues, to check the looked up outcomes
 		self.reward_fn = self.frequent_reward_default
 		self.culture = eval(f'{culture_level}RoadCulture')(road_options={
 			'motorway': 1/2,
@@ -93,7 +95,7 @@ class GridDrive(gym.Env):
 		self.cumulated_return = 0
 		self.sum_speed = 0
 
-		self.grid = RoadGrid(self.GRID_DIMENSION, self.GRID_DIMENSION, self.culture)
+		self.grid = RoadGrid(self.GRID_DIMENSION, self.GRID_DIMENSION, self.culture, compiled_culture=self.compiled_culture, verify_culture=self.verify_culture)
 		self.grid_features = np.array(self.grid.get_features(), ndmin=3, dtype=np.int8)
 		self.grid_view = np.concatenate([
 			self.grid_features,
@@ -24,6 +24,15 @@ class Culture:
 
 		Returns: Decision on penalty + explanation.
 		"""
+		motion_validated, dialogue_history, winning_arguments = self.play_dialogue(agent_1, agent_2, starting_argument_id)
+		return motion_validated, self.explain(dialogue_history, winning_arguments, starting_argument_id, explanation_type)
+
+	def play_dialogue(self, agent_1, agent_2, starting_argument_id=0):
+		"""
+		Plays the dialogue of run_dialogue, without building the explanation.
+
+		Returns: Decision on penalty + the ids of the arguments used at each turn + the ids of the last arguments of the winner.
+		"""
 		# print("@@@@@@@@@@@@@ NEW DIALOGUE @@@@@@@@@@@@@")
 		AF = self.AF
 		verified = set()
@@ -81,9 +90,17 @@ class Culture:
 				# print("GAME OVER! {} wins".format(winner))
 
 		motion_validated = True if winner == "proponent" else False
+		return motion_validated, dialogue_history, last_argument[winner]
 
-		# Building the explanation.
+	def explain(self, dialogue_history, winning_arguments, starting_argument_id=0, explanation_type="verbose"):
+		"""
+		Builds the explanation of a dialogue from the argument ids returned by play_dialogue.
+		Args:
+			explanation_type: 'verbose' for all arguments used in exchange; 'compact' for only winning ones.
 
+		Returns: List of explanations.
+		"""
+		AF = self.AF
 		if explanation_type == "verbose":
 			turn = 0
 			explanation_list = []
@@ -99,8 +116,8 @@ class Culture:
 		else:
 			explanation_list = [
 				AF.argument(argument_id).descriptive_text
-				for argument_id in last_argument[winner]
+				for argument_id in winning_arguments
 				if argument_id != starting_argument_id # motion_validated is already telling whether the ground_argument has been won or lost
 			]
 
-		return motion_validated, explanation_list
+		return explanation_list
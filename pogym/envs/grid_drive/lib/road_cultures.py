@@ -2,6 +2,7 @@ from pogym.envs.grid_drive.lib.culture_lib.culture import Culture, Argument
 from pogym.envs.grid_drive.lib.road_cell import RoadCell
 from pogym.envs.grid_drive.lib.road_agent import RoadAgent
 import numpy as np
+import itertools
 import copy
 
 #####################
@@ -13,6 +14,8 @@ class RoadCulture(Culture):
 
 	def __init__(self, np_random=None):
 		self.np_random = np.random if np_random is None else np_random
+		# Dialogue outcomes by (road features, agent features, speed), see run_compiled_dialogue
+		self.dialogue_table = {}
 		super().__init__()
 
 	def initialise_random_agent(self, agent: RoadAgent):
@@ -39,17 +42,75 @@ class RoadCulture(Culture):
 		# Game starts with proponent using argument 0 ("I will not get a ticket").
 		return super().run_dialogue(road, agent, starting_argument_id=self.starting_argument_id, explanation_type=explanation_type)
 
+	def run_compiled_dialogue(self, road, agent, explanation_type="verbose", verify=False):
+		"""
+		Same as run_default_dialogue, but the dialogue is only played the first time its outcome is needed.
+		Verifiers only read the binary features of road and agent and the speed of agent, so the outcome is
+		stored in self.dialogue_table under these (features tuples being bitmasks), as the decision and the
+		ids of the arguments used.
+		Args:
+			road: RoadCell corresponding to destination cell.
+			agent: RoadAgent corresponding to agent.
+			explanation_type: 'verbose' for all arguments used in exchange; 'compact' for only winning ones.
+			verify: if True, also runs the dialogue and checks that it agrees with the table.
+
+		Returns: Decision on penalty + explanation.
+		"""
+		key = (road.binary_features(as_tuple=True), agent.binary_features(as_tuple=True), agent["Speed"])
+		entry = self.dialogue_table.get(key, None)
+		if entry is None:
+			entry = self.dialogue_table[key] = self.compile_dialogue(road, agent)
+		motion_validated, dialogue_history, winning_arguments = entry
+		result = motion_validated, self.explain(dialogue_history, winning_arguments, self.starting_argument_id, explanation_type)
+		if verify:
+			expected = self.run_default_dialogue(road, agent, explanation_type=explanation_type)
+			assert result == expected, f"Compiled dialogue {result} differs from the dialogue {expected} for key {key}"
+		return result
+
+	def compile_dialogue(self, road, agent):
+		"""
+		Plays the default dialogue, returning the entry of self.dialogue_table for road and agent.
+		"""
+		motion_validated, dialogue_history, winning_arguments = self.play_dialogue(road, agent, starting_argument_id=self.starting_argument_id)
+		# Tuples keep the order in which the dialogue iterated over the argument sets
+		return motion_validated, tuple(map(tuple, dialogue_history)), tuple(winning_arguments)
+
+	def compile(self, speeds=None):
+		"""
+		Fills self.dialogue_table for every combination of road and agent binary features and every speed.
+		The table has 2**(number of road and agent binary features) * len(speeds) entries.
+		:param speeds: speeds to compile, by default every 10 up to agent_options['speed'].
+		"""
+		if speeds is None:
+			speeds = range(0, self.agent_options.get('speed',120)+1, 10)
+		road = RoadCell()
+		road.set_culture(self)
+		agent = RoadAgent()
+		agent.set_culture(self)
+		agent_properties = [p for p in agent.sorted_properties if p != "Speed"]
+		for road_features in itertools.product([False, True], repeat=len(road.sorted_properties)):
+			for p, v in zip(road.sorted_properties, road_features):
+				road.assign_property_value(p, v)
+			for agent_features in itertools.product([False, True], repeat=len(agent_properties)):
+				for p, v in zip(agent_properties, agent_features):
+					agent.assign_property_value(p, v)
+				for speed in speeds:
+					agent.assign_property_value("Speed", speed)
+					key = (road.binary_features(as_tuple=True), agent.binary_features(as_tuple=True), speed)
+					if key not in self.dialogue_table:
+						self.dialogue_table[key] = self.compile_dialogue(road, agent)
+
 	def get_minimum_speed(self, road, agent):
-		agent = copy.deepcopy(agent)
+		agent = copy.copy(agent)
 		for speed in [0,10,20,30,40]:
 			agent.assign_property_value("Speed", speed)
-			can_move, _ = self.run_default_dialogue(road, agent, explanation_type="compact")
+			can_move, _ = self.run_compiled_dialogue(road, agent, explanation_type="compact")
 			if can_move:
 				return speed
 		return None
 
 	def get_speed_limits(self, road, agent):
-		agent = copy.deepcopy(agent)
+		agent = copy.copy(agent)
 		min_speed = self.get_minimum_speed(road, agent)
 		if min_speed is None:
 			return (None,None) # (None,None) if road is unfeasible
@@ -57,7 +118,7 @@ class RoadCulture(Culture):
 		step = 10
 		for speed in range(min_speed+step, self.agent_options.get('speed',120)+1, step):
 			agent.assign_property_value("Speed", speed)
-			can_move, _ = self.run_default_dialogue(road, agent, explanation_type="compact")
+			can_move, _ = self.run_compiled_dialogue(road, agent, explanation_type="compact")
 			if can_move:
 				if max_speed is None or speed > max_speed:
 					max_speed = speed
@@ -9,7 +9,13 @@ EAST  = 2
 WEST  = 3
 
 class RoadGrid:
-	def __init__(self, x_dim, y_dim, culture):
+	def __init__(self, x_dim, y_dim, culture, compiled_culture=True, verify_culture=False):
+		"""
+		:param compiled_culture: if True, move_agent looks up the outcome of dialogues in the table of the culture.
+		:param verify_culture: if True, move_agent also runs the dialogue to check the table.
+		"""
+		self.compiled_culture = compiled_culture
+		self.verify_culture = verify_culture
 		self.agent = RoadAgent()
 		self.agent_position = (0, 0)
 		self.width = x_dim
@@ -147,6 +153,9 @@ class RoadGrid:
 		self.agent_position = (dest_x, dest_y)
 		self.agent.assign_property_value("Speed", speed)
 
-		can_move, explanation_list = self.run_dialogue(self.cells[dest_x][dest_y], self.agent, explanation_type="compact")
+		if self.compiled_culture:
+			can_move, explanation_list = self.road_culture.run_compiled_dialogue(self.cells[dest_x][dest_y], self.agent, explanation_type="compact", verify=self.verify_culture)
+		else:
+			can_move, explanation_list = self.run_dialogue(self.cells[dest_x][dest_y], self.agent, explanation_type="compact")
 		return can_move, explanation_list
 
@@ -1,9 +1,12 @@
-from typing import Any, Dict, Optional, Tuple, Union
+from typing import Optional
 
 import gym
 import numpy as np
 
-from pogym.core.deck import Deck
+from pogym.core.deck import DECK_SIZE, RANKS, card_tables
+from pogym.functional import higher_lower
+from pogym.functional.env import FunctionalEnv
+from pogym.functional.vec_env import FunctionalVecEnv
 
 
 def value_fn(hand):
@@ -15,70 +18,84 @@ def value_fn(hand):
         return -1
 
 
-class HigherLower(gym.Env):
+class HigherLower(FunctionalEnv):
     """A game of higher/lower. Given a deck of cards, the agent predicts whether the
     next card drawn from the deck is higher or lower than the last card drawn from
     the deck. A push results in zero reward, while a correct/incorrect guess result
     in 1/deck_size and -1/deck_size reward. The agent can learn to count cards to
     infer which cards are left in the deck, improving accuracy.
 
+    The game is run on the functional core in pogym.functional.higher_lower
+    with a batch of one, which deals from a shuffled shoe with a cursor.
+
     Args:
         num_decks: The number of individual decks combined into a single deck.
+        info_level: What to put in the info dict. "debug" holds the suits and
+            ranks of the cards as strings, "minimal" only holds the idx of the
+            current card, and "none" returns an empty dict.
+        tape: Kept for compatibility. The core always lays out the order of
+            the cards on reset and steps by advancing a cursor, which is what
+            tape did
+        regret: Add "regret" to the info dict, the expected reward of the
+            optimal guess given the cards left in the shoe, minus that of
+            the action taken. This measures how far an agent is from
+            perfect card counting.
 
     Returns:
         A gym environment
     """
 
-    def __init__(self, num_decks=1):
+    core = higher_lower
+
+    def __init__(self, num_decks=1, info_level="debug", tape=False, regret=False):
+        assert info_level in ["none", "minimal", "debug"], "Invalid info_level"
         self.num_decks = num_decks
-        self.deck = Deck(num_decks)
-        self.deck.add_players("player")
+        self.info_level = info_level
+        self.params = {"num_decks": num_decks, "count_ranks": True}
         self.action_space = gym.spaces.Discrete(2)
-        self.observation_space = self.deck.get_obs_space(["ranks"])
-        self.value_map = dict(zip(self.deck.ranks, range(len(self.deck.ranks))))
-        self.deck_size = len(self.deck)
+        self.observation_space = gym.spaces.Discrete(RANKS.size)
+        self.deck_size = DECK_SIZE * num_decks
+        self.tape = tape
+        self.regret = regret
+
+    def current_rank(self):
+        return self.state["rank"][0]
+
+    def remaining_rank_counts(self):
+        """Returns the number of cards of each rank left in the shoe"""
+        return self.state["counts"][0]
+
+    def action_values(self):
+        """Returns the expected reward of guessing higher and of guessing
+        lower, given the current card and the cards left in the shoe"""
+        return higher_lower.action_values(self.state)[0]
+
+    def oracle_action(self):
+        """Returns the guess with the highest expected reward, which is the
+        Bayes-optimal policy for an agent that counts every card"""
+        return int(np.argmax(self.action_values()))
+
+    def make_info(self, cards):
+        """Returns the info for the cards at the given positions of the shoe"""
+        shoe = self.state["shoes"][0]
+        if self.info_level == "debug":
+            tables = card_tables(self.num_decks)
+            suits, ranks = tables["suits"][shoe[cards]], tables["ranks"][shoe[cards]]
+            return {"card": np.stack([suits, ranks]).T}
+        elif self.info_level == "minimal":
+            return {"card_idx": shoe[self.state["cursor"][0]]}
+        return {}
 
     def step(self, action):
-        guess_higher = action == 0
-        if len(self.deck) <= 1:
-            done = True
-        else:
-            done = False
-
-        self.deck.deal("player", 1)
-        assert self.deck.hand_size("player") == 2
-        curr_idx, next_idx = self.deck["player"]
-        curr_value, next_value = self.deck["ranks_idx"][[curr_idx, next_idx]]
-        # next_card = self.deck.draw()
-        # next_value = self.value_map[self.deck.id_to_str(next_card)[1]]
-        # curr_value = self.value_map[self.deck.id_to_str(self.curr_card)[1]]
-
-        rew_scale = 1 / self.deck_size
-        if next_value == curr_value:
-            reward = 0
-        elif next_value > curr_value and guess_higher:
-            reward = rew_scale
-        elif next_value < curr_value and guess_higher:
-            reward = -rew_scale
-        elif next_value < curr_value and not guess_higher:
-            reward = rew_scale
-        elif next_value > curr_value and not guess_higher:
-            reward = -rew_scale
-        else:
-            raise Exception("Should not reach this point")
-
-        # info = {
-        # "previous": self.deck.id_to_viz(self.curr_card),
-        # "current": self.deck.id_to_viz(next_card),
-        # }
-
-        viz = np.stack(self.deck.show("player", ["suits", "ranks"])).T
-        self.deck.discard("player", 0)
-        # self.curr_card = next_card
-        # obs = self.deck.id_to_obs(self.curr_card).item()
-        obs = self.deck.show("player", ["ranks_idx"]).item()
-
-        return obs, reward, done, {"card": viz}
+        if self.regret:
+            values = self.action_values()
+            regret = values.max() - values[action]
+        obs, reward, done = self.step_state(action)
+        cursor = self.state["cursor"][0]
+        info = self.make_info([cursor - 1, cursor])
+        if self.regret:
+            info["regret"] = regret
+        return int(obs), reward, done, info
 
     def reset(
         self,
@@ -87,16 +104,37 @@ class HigherLower(gym.Env):
         return_info: bool = False,
         options: Optional[dict] = None,
     ):
-        if seed is not None:
-            np.random.seed(seed)
-
-        self.deck.reset()
-        self.deck.deal("player", 1)
-        obs = self.deck.show("player", ["ranks_idx"]).item()
-        viz = np.concatenate(self.deck.show("player", ["suits", "ranks"]))
-        # self.curr_card = self.deck.draw()
-        # obs = self.deck.id_to_obs(self.curr_card).item()
+        obs = int(self.init_state(seed))
         if return_info:
-            return obs, {"card": viz}
+            return obs, self.make_info(0)
 
         return obs
+
+
+class HigherLowerVec(FunctionalVecEnv):
+    """Many independent games of HigherLower, stepped together with the
+    functional core in pogym.functional.higher_lower. The shuffled shoes of
+    all games are the rows of a single array, and a cursor per game points at
+    the current card. The rules and rewards are the same as HigherLower.
+
+    Observations, rewards and dones are arrays with one entry per game, and
+    actions are an array with one entry per game. Finished games are
+    reshuffled in place, and the returned observation for those games is
+    the first card of the next episode.
+
+    Args:
+        num_envs: The number of games
+        num_decks: The number of individual decks combined into each shoe
+
+    Returns:
+        A vectorized gym environment
+    """
+
+    core = higher_lower
+
+    def __init__(self, num_envs=1, num_decks=1):
+        super().__init__()
+        self.num_envs = num_envs
+        self.params = {"num_decks": num_decks}
+        self.action_space = gym.spaces.Discrete(2)
+        self.observation_space = gym.spaces.Discrete(RANKS.size)
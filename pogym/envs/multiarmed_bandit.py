@@ -3,23 +3,54 @@ from typing import Any, Dict, Optional, Tuple, Union
 import gym
 import numpy as np
 
+from pogym.functional import multiarmed_bandit
+from pogym.functional.env import FunctionalEnv
+from pogym.functional.vec_env import FunctionalVecEnv
+
+
+class MultiarmedBandit(FunctionalEnv):
+    """A single multiarmed bandit, run on the functional core in
+    pogym.functional.multiarmed_bandit with a batch of one. The observation
+    is the noisy payout of the pulled arm, the reward is the pulled arm and
+    its payout, and info["regret"] is the mean payout of the best arm minus
+    that of the pulled arm. The episode is done after episode_length steps,
+    and the observation on reset is the payout of a random arm. Seeding
+    reset seeds the global np.random.
+
+    Args:
+        num_bandits: The number of arms
+        std: The standard deviation of the payouts
+        episode_length: The number of steps in an episode
+
+    Returns:
+        A gym environment
+    """
+
+    core = multiarmed_bandit
 
-class MultiarmedBandit(gym.Env):
     def __init__(self, num_bandits=10, std=1.0, episode_length=100):
-        self.num_bandits = num_bandits
-        self.std = std
-        self.episode_length = episode_length
+        self.params = {
+            "num_bandits": num_bandits,
+            "std": std,
+            "episode_length": episode_length,
+        }
         self.observation_space = gym.spaces.Box(shape=(1,), low=-1e5, high=1e5)
         self.action_space = gym.spaces.Discrete(num_bandits)
 
     def step(self, action, increment=True):
-        obs = np.random.normal(self.bandits[action], self.std)
-        reward = np.array([action, obs])
-        done = self.num_steps < self.episode_length
+        action = np.reshape(action, 1)
+        regret = self.core.regret(self.state, action)[0]
         if increment:
-            self.num_steps += 1
-
-        return obs, reward, done, self.info
+            self.state, _, payout, done = self.core.step(
+                self.state, action, auto_reset=False
+            )
+        else:
+            payout = self.core.pull(self.state, action)
+            done = self.state["num_steps"] >= self.params["episode_length"]
+        obs = payout[0]
+        reward = np.array([action[0], obs])
+        info = {"bandits": self.state["bandits"][0], "regret": regret}
+        return obs, reward, bool(done[0]), info
 
     def reset(
         self,
@@ -28,16 +59,74 @@ class MultiarmedBandit(gym.Env):
         return_info: bool = False,
         options: Optional[dict] = None,
     ) -> Union[gym.core.ObsType, Tuple[gym.core.ObsType, Dict[str, Any]]]:
-
-        if seed is not None:
-            np.random.seed(seed)
-
-        self.num_steps = 0
-        self.bandits = np.random.rand(self.num_bandits)
-        self.info = {"bandits": self.bandits}
-        rand_action = np.random.randint(10)
+        self.init_state(seed)
+        rand_action = np.random.randint(self.params["num_bandits"])
         obs, _, _, info = self.step(rand_action, increment=False)
 
         if return_info:
             return obs, info
         return obs
+
+
+class MultiarmedBanditVec(FunctionalVecEnv):
+    """Many independent multiarmed bandits, stepped together with the
+    functional core in pogym.functional.multiarmed_bandit. Each bandit has
+    its own Generator, from which it draws its arm means on reset and its
+    noise in blocks of block_size steps, so that a step is a single gather
+    of the pulled arm means plus the noise of that step. A bandit plays the
+    same episodes for the same seed, whatever the other bandits are.
+
+    The reward is the noisy payout of the pulled arm, which is also the
+    observation, and info["regret"] is the mean payout of the best arm minus
+    that of the pulled arm. The observation on reset is zero. Rewards,
+    dones and actions are arrays with one entry per bandit, and observations
+    have shape (num_envs, 1). Bandits redraw their arm means in place every
+    episode_length steps.
+
+    Args:
+        num_envs: The number of bandits
+        num_bandits: The number of arms of each bandit
+        std: The standard deviation of the payouts
+        episode_length: The number of steps in an episode
+        block_size: The number of steps of noise drawn at once
+        seeds: A seed per bandit. By default, they are spawned from the seed
+            passed to reset
+
+    Returns:
+        A vectorized gym environment
+    """
+
+    core = multiarmed_bandit
+
+    def __init__(
+        self,
+        num_envs=1,
+        num_bandits=10,
+        std=1.0,
+        episode_length=100,
+        block_size=1024,
+        seeds=None,
+    ):
+        assert seeds is None or len(seeds) == num_envs, "Need a seed per bandit"
+        super().__init__()
+        self.num_envs = num_envs
+        self.seeds = seeds
+        self.params = {
+            "num_bandits": num_bandits,
+            "std": std,
+            "episode_length": episode_length,
+            "block_size": block_size,
+        }
+        self.observation_space = gym.spaces.Box(shape=(1,), low=-1e5, high=1e5)
+        self.action_space = gym.spaces.Discrete(num_bandits)
+
+    def make_rngs(self, seed):
+        if self.seeds is None:
+            return super().make_rngs(seed)
+        return [np.random.default_rng(s) for s in self.seeds]
+
+    def step(self, action):
+        regret = multiarmed_bandit.regret(self.state, action)
+        obs, reward, done, info = super().step(action)
+        info["regret"] = regret
+        return obs, reward, done, info
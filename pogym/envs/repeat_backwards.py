@@ -1,33 +1,67 @@
 import enum
-from collections import deque
-from typing import Any, Deque, Dict, Optional, Tuple, Union
+from typing import Optional
 
 import gym
 import numpy as np
 
+from pogym.functional import repeat_backwards
+from pogym.functional.env import FunctionalEnv
+from pogym.functional.vec_env import FunctionalVecEnv
+
+# The dtype of structured observations
+OBS_DTYPE = np.dtype([("mode", np.int64), ("button", np.int64)])
+
 
 class Mode(enum.IntEnum):
     PLAY = 0
     WATCH = 1
 
 
-class RepeatBackwards(gym.Env):
+class RepeatBackwards(FunctionalEnv):
     """A game where the agent must press buttons in the reverse order it saw
     them pressed. E.g., seeing [1, 2, 3] means I should press them in the order
     [3, 2, 1].
 
+    The game is run on the functional core in
+    pogym.functional.repeat_backwards with a batch of one, which holds the
+    buttons in an array of the smallest integer dtype that fits num_buttons
+    and walks it with a cursor.
+
     Args:
         game_len: The maximum number of button presses the agent
             must memorize
         num_buttons: The number of unique buttons for the agent to press
+        structured_obs: Return each observation as a single record of dtype
+            OBS_DTYPE instead of an array, so that observations from many
+            steps or envs stack into one array that can be viewed per field
+        long_horizon: Draw the buttons block_size at a time as they are
+            shown, rather than all of them on reset, so that reset takes
+            constant time, which matters for very long games
+        block_size: The number of buttons drawn at once with long_horizon
 
     Returns:
         A gym environment
     """
 
-    def __init__(self, game_len=32, num_buttons=4):
+    core = repeat_backwards
+
+    def __init__(
+        self,
+        game_len=32,
+        num_buttons=4,
+        structured_obs=False,
+        long_horizon=False,
+        block_size=4096,
+    ):
         self.num_buttons = num_buttons
+        self.structured_obs = structured_obs
         self.game_len = game_len
+        self.long_horizon = long_horizon
+        self.params = {
+            "game_len": game_len,
+            "num_buttons": num_buttons,
+            "block_size": block_size if long_horizon else None,
+        }
         self.action_space = gym.spaces.Discrete(num_buttons)
         self.observation_space = gym.spaces.Tuple(
             (
@@ -35,37 +69,22 @@ class RepeatBackwards(gym.Env):
                 gym.spaces.Discrete(num_buttons),
             )
         )
-        self.mode = Mode.WATCH
 
-    def cycle(self):
-        button = self.sys_seq.pop()
-        self.watched_seq.append(button)
-        return button
+    @property
+    def mode(self):
+        """Whether the next step shows a button or scores the action"""
+        if self.state["cursor"][0] < self.game_len - 1:
+            return Mode.WATCH
+        return Mode.PLAY
 
-    def uncycle(self, action):
-        button = self.watched_seq.popleft()
-        done = len(self.watched_seq) == 0
-        return action == button, done
-
-    def make_obs(self, button):
-        return np.array([self.mode.value, button])
+    def make_obs(self, obs):
+        if self.structured_obs:
+            return np.array(tuple(obs), dtype=OBS_DTYPE)
+        return obs
 
     def step(self, action):
-        done = False
-        reward = 0
-        if self.mode == Mode.WATCH:
-            obs = self.make_obs(self.cycle())
-            if len(self.sys_seq) == 0:
-                self.mode = Mode.PLAY
-        else:
-            correct_button, done = self.uncycle(action)
-            obs = self.make_obs(0)
-            if correct_button:
-                reward = 1.0 / self.game_len
-
-        info = {}
-
-        return obs, reward, done, info
+        obs, reward, done = self.step_state(action)
+        return self.make_obs(obs), reward, done, {}
 
     def reset(
         self,
@@ -74,18 +93,42 @@ class RepeatBackwards(gym.Env):
         return_info: bool = False,
         options: Optional[dict] = None,
     ):
-        if seed is not None:
-            np.random.seed(seed)
-        self.sys_seq = np.random.randint(
-            0, self.num_buttons, size=self.game_len
-        ).tolist()
-
-        self.watched_seq: Deque[int] = deque([])
-        self.player_seq: Deque[int] = deque([])
-        self.num_replayed = 1
-        self.mode = Mode.WATCH
-        obs = self.make_obs(self.cycle())
+        obs = self.make_obs(self.init_state(seed))
         if return_info:
             return obs, {}
 
         return obs
+
+
+class RepeatBackwardsVec(FunctionalVecEnv):
+    """Many independent games of RepeatBackwards, stepped together with the
+    functional core in pogym.functional.repeat_backwards. The button
+    sequences of all games are the rows of a (num_envs, game_len) array, and
+    a single cursor per game counts the steps since reset: the first
+    game_len steps show buttons (WATCH), the next game_len steps score the
+    actions (PLAY). The rules and rewards are the same as RepeatBackwards.
+
+    Observations are an array of shape (num_envs, 2), and rewards, dones and
+    actions are arrays with one entry per game. Finished games draw a new
+    sequence in place, and the returned observation for those games is the
+    first button of the next episode.
+
+    Args:
+        num_envs: The number of games
+        game_len: The number of button presses the agent must memorize
+        num_buttons: The number of unique buttons for the agent to press
+
+    Returns:
+        A vectorized gym environment
+    """
+
+    core = repeat_backwards
+
+    def __init__(self, num_envs=1, game_len=32, num_buttons=4):
+        super().__init__()
+        self.num_envs = num_envs
+        self.params = {"game_len": game_len, "num_buttons": num_buttons}
+        self.action_space = gym.spaces.Discrete(num_buttons)
+        self.observation_space = gym.spaces.Tuple(
+            (gym.spaces.Discrete(2), gym.spaces.Discrete(num_buttons))
+        )
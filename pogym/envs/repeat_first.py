@@ -3,24 +3,58 @@ from typing import Any, Dict, Optional, Tuple, Union
 import gym
 import numpy as np
 
-from pogym.core.deck import Deck
+from pogym.core.deck import RANKS
+from pogym.functional import repeat_first
+from pogym.functional.env import FunctionalEnv
+from pogym.functional.vec_env import FunctionalVecEnv
 
+# The dtype of structured observations
+OBS_DTYPE = np.dtype([("is_start", np.int64), ("card", np.int64)])
 
-class RepeatFirst(gym.Env):
+
+class RepeatFirst(FunctionalEnv):
     """A game where the agent must repeat the rank of the first card it saw
 
+    The game is run on the functional core in pogym.functional.repeat_first
+    with a batch of one, which deals from a shuffled shoe with a cursor.
+
     Args:
         num_decks: The number of decks to cycle through, which determines
             episode length
+        structured_obs: Return each observation as a single (is_start, card)
+            record of dtype OBS_DTYPE instead of an array
+        tape: Kept for compatibility. The core always deals the whole shoe on
+            reset and steps by advancing a cursor, which is what tape did
+        long_horizon: Stream the ranks of the shoe in blocks, as a RankStream
+            does, instead of shuffling the whole shoe, so that memory and
+            per-step cost do not grow with num_decks. Episodes follow the
+            same distribution, but not the same cards for a seed.
+        block_size: The number of ranks drawn at once with long_horizon
 
     Returns:
         A gym environment
     """
 
-    def __init__(self, num_decks=1):
-        self.deck = Deck(num_decks)
-        self.deck.add_players("player")
-        self.action_space = self.deck.get_obs_space(["ranks"])
+    core = repeat_first
+
+    def __init__(
+        self,
+        num_decks=1,
+        structured_obs=False,
+        tape=False,
+        long_horizon=False,
+        block_size=4096,
+    ):
+        assert not (tape and long_horizon), "Cannot use a tape with long_horizon"
+        self.structured_obs = structured_obs
+        self.tape = tape
+        self.long_horizon = long_horizon
+        self.params = {
+            "num_decks": num_decks,
+            "long_horizon": long_horizon,
+            "block_size": block_size,
+        }
+        self.action_space = gym.spaces.Discrete(RANKS.size)
         self.observation_space = gym.spaces.Tuple(
             (
                 gym.spaces.Discrete(2),
@@ -28,29 +62,19 @@ class RepeatFirst(gym.Env):
             )
         )
 
-    def make_obs(self, card, is_start=False):
-        return np.array([int(is_start), card])
-
-    def step(self, action):
-        done = False
-        reward_scale = 1 / self.deck.num_cards
-        if action == self.card:
-            reward = reward_scale
-        else:
-            reward = 0
-            done = True
+    @property
+    def card(self):
+        """The rank of the first card, which the agent must repeat"""
+        return self.state["first"][0]
 
-        if len(self.deck) == 1:
-            done = True
-
-        self.deck.deal("player", 1)
-        card = self.deck.show("player", ["ranks_idx"])[0, -1]
-        obs = self.make_obs(card)
-        self.deck.discard_hands("player")
-
-        info = {}
+    def make_obs(self, obs):
+        if self.structured_obs:
+            return np.array(tuple(obs), dtype=OBS_DTYPE)
+        return obs
 
-        return obs, reward, done, info
+    def step(self, action):
+        obs, reward, done = self.step_state(action)
+        return self.make_obs(obs), reward, done, {}
 
     def reset(
         self,
@@ -59,13 +83,45 @@ class RepeatFirst(gym.Env):
         return_info: bool = False,
         options: Optional[dict] = None,
     ) -> Union[gym.core.ObsType, Tuple[gym.core.ObsType, Dict[str, Any]]]:
-        if seed is not None:
-            np.random.seed(seed)
-        self.deck.reset()
-        self.deck.deal("player", 1)
-        self.card = self.deck.show("player", ["ranks_idx"])[0, -1]
-        obs = self.make_obs(self.card, is_start=True)
+        obs = self.make_obs(self.init_state(seed))
         if return_info:
             return obs, {}
 
         return obs
+
+
+class RepeatFirstVec(FunctionalVecEnv):
+    """Many independent games of RepeatFirst, stepped together with the
+    functional core in pogym.functional.repeat_first. The rules and rewards
+    are the same as RepeatFirst.
+
+    Observations are an array of shape (num_envs, 2), and rewards, dones and
+    actions are arrays with one entry per game. Finished games are dealt a
+    new shoe in place, and the returned observation for those games is the
+    first card of the next episode.
+
+    Args:
+        num_envs: The number of games
+        num_decks: The number of individual decks combined into each shoe
+        long_horizon: Stream the ranks of each shoe in blocks instead of
+            shuffling whole shoes, as in the single env
+        block_size: The number of ranks drawn at once with long_horizon
+
+    Returns:
+        A vectorized gym environment
+    """
+
+    core = repeat_first
+
+    def __init__(self, num_envs=1, num_decks=1, long_horizon=False, block_size=4096):
+        super().__init__()
+        self.num_envs = num_envs
+        self.params = {
+            "num_decks": num_decks,
+            "long_horizon": long_horizon,
+            "block_size": block_size,
+        }
+        self.action_space = gym.spaces.Discrete(RANKS.size)
+        self.observation_space = gym.spaces.Tuple(
+            (gym.spaces.Discrete(2), self.action_space)
+        )
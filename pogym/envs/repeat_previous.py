@@ -3,26 +3,64 @@ from typing import Any, Dict, Optional, Tuple, Union
 import gym
 import numpy as np
 
-from pogym.core.deck import Deck
+from pogym.core.deck import DECK_SIZE, RANKS
+from pogym.functional import repeat_previous
+from pogym.functional.env import FunctionalEnv
+from pogym.functional.vec_env import FunctionalVecEnv
 
+# The dtype of structured observations
+OBS_DTYPE = np.dtype([("has_prev", np.int64), ("card", np.int64)])
 
-class RepeatPrevious(gym.Env):
-    """A game where the agent must repeat the rank of the first card it saw
+
+class RepeatPrevious(FunctionalEnv):
+    """A game where the agent must repeat the rank of the card it saw k steps
+    ago. Only the last k ranks are kept, in a ring buffer, so the cost of a
+    step does not grow with the episode length.
+
+    The game is run on the functional core in
+    pogym.functional.repeat_previous with a batch of one, which deals from a
+    shuffled shoe with a cursor.
 
     Args:
         num_decks: The number of decks to cycle through, which determines
             episode length
+        structured_obs: Return observations as (has_prev, card) records of
+            dtype OBS_DTYPE rather than arrays
+        tape: Kept for compatibility. The core always deals the whole shoe on
+            reset and steps by advancing a cursor, which is what tape did
+        long_horizon: Draw ranks in blocks, as a RankStream does, rather than
+            shuffling the whole shoe, so that with the ring buffer, memory is
+            O(k) and steps take constant time however large num_decks is
+        block_size: The number of ranks drawn at once with long_horizon
 
     Returns:
         A gym environment
     """
 
-    def __init__(self, num_decks=1, k=16):
-        self.deck = Deck(num_decks)
+    core = repeat_previous
+
+    def __init__(
+        self,
+        num_decks=1,
+        k=16,
+        structured_obs=False,
+        tape=False,
+        long_horizon=False,
+        block_size=4096,
+    ):
+        assert not (tape and long_horizon), "Cannot use a tape with long_horizon"
+        assert DECK_SIZE * num_decks > k, "k cannot be less than 52 * num_decks"
+        self.structured_obs = structured_obs
+        self.tape = tape
+        self.long_horizon = long_horizon
         self.k = k
-        assert self.deck.num_cards > k, "k cannot be less than 52 * num_decks"
-        self.deck.add_players("player")
-        self.action_space = self.deck.get_obs_space(["ranks"])
+        self.params = {
+            "num_decks": num_decks,
+            "k": k,
+            "long_horizon": long_horizon,
+            "block_size": block_size,
+        }
+        self.action_space = gym.spaces.Discrete(RANKS.size)
         self.observation_space = gym.spaces.Tuple(
             (
                 gym.spaces.Discrete(2),
@@ -30,32 +68,14 @@ class RepeatPrevious(gym.Env):
             )
         )
 
-    def make_obs(self, card, has_prev=False):
-        return np.array([int(has_prev), card])
+    def make_obs(self, obs):
+        if self.structured_obs:
+            return np.array(tuple(obs), dtype=OBS_DTYPE)
+        return obs
 
     def step(self, action):
-        done = False
-        reward_scale = 1 / (self.deck.num_cards - self.k)
-        reward = 0
-        has_prev = False
-
-        if len(self.deck) == 1:
-            done = True
-
-        if self.deck.hand_size("player") >= self.k:
-            has_prev = True
-            if action == self.deck["ranks_idx"][self.deck["player"][-self.k]]:
-                reward = reward_scale
-            else:
-                done = True
-
-        self.deck.deal("player", 1)
-        card = self.deck.show("player", ["ranks_idx"])[0, -1]
-        obs = self.make_obs(card, has_prev)
-
-        info = {}
-
-        return obs, reward, done, info
+        obs, reward, done = self.step_state(action)
+        return self.make_obs(obs), reward, done, {}
 
     def reset(
         self,
@@ -64,13 +84,49 @@ class RepeatPrevious(gym.Env):
         return_info: bool = False,
         options: Optional[dict] = None,
     ) -> Union[gym.core.ObsType, Tuple[gym.core.ObsType, Dict[str, Any]]]:
-        if seed is not None:
-            np.random.seed(seed)
-        self.deck.reset()
-        self.deck.deal("player", 1)
-        self.card = self.deck.show("player", ["ranks_idx"])[0, -1]
-        obs = self.make_obs(self.card, has_prev=True)
+        obs = self.make_obs(self.init_state(seed))
         if return_info:
             return obs, {}
 
         return obs
+
+
+class RepeatPreviousVec(FunctionalVecEnv):
+    """Many independent games of RepeatPrevious, stepped together with the
+    functional core in pogym.functional.repeat_previous. The rules and
+    rewards are the same as RepeatPrevious.
+
+    Observations are an array of shape (num_envs, 2), and rewards, dones and
+    actions are arrays with one entry per game. Finished games are dealt a
+    new shoe in place, and the returned observation for those games is the
+    first card of the next episode.
+
+    Args:
+        num_envs: The number of games
+        num_decks: The number of individual decks combined into each shoe
+        k: How many steps back the agent must repeat
+        long_horizon: Stream the ranks of each shoe in blocks instead of
+            shuffling whole shoes, as in the single env
+        block_size: The number of ranks drawn at once with long_horizon
+
+    Returns:
+        A vectorized gym environment
+    """
+
+    core = repeat_previous
+
+    def __init__(
+        self, num_envs=1, num_decks=1, k=16, long_horizon=False, block_size=4096
+    ):
+        super().__init__()
+        self.num_envs = num_envs
+        self.params = {
+            "num_decks": num_decks,
+            "k": k,
+            "long_horizon": long_horizon,
+            "block_size": block_size,
+        }
+        self.action_space = gym.spaces.Discrete(RANKS.size)
+        self.observation_space = gym.spaces.Tuple(
+            (gym.spaces.Discrete(2), self.action_space)
+        )
@@ -1,12 +1,16 @@
 # Inspired by ray rllib at
 # https://github.com/ray-project/ray/blob/master/rllib/examples/env/stateless_cartpole.py
 
-from typing import Optional, Tuple, Union
+from typing import Optional
 
 import gym
 import numpy as np
 from gym.envs.classic_control import CartPoleEnv
 from gym.spaces import Box
+from gym.utils import seeding
+
+from pogym.functional import stateless_cartpole
+from pogym.functional.vec_env import FunctionalVecEnv
 
 
 class StatelessCartPole(CartPoleEnv):
@@ -15,6 +19,10 @@ class StatelessCartPole(CartPoleEnv):
     cartpole.py
     We delete the x- and angular velocity components of the state, so that it
     can only be solved by a memory enhanced model (policy).
+
+    The cart is run on the functional core in pogym.functional.stateless_cartpole
+    with a batch of one, which follows the CartPoleEnv dynamics and draws the
+    same initial state for the same seed.
     """
 
     def __init__(self, *args, **kwargs):
@@ -31,28 +39,90 @@ class StatelessCartPole(CartPoleEnv):
 
         self.observation_space = Box(low=-high, high=high, dtype=np.float32)
 
-    def step(
-        self, action
-    ):
-        next_obs, reward, done, info = super().step(action)
-        # next_obs is [x-pos, x-veloc, angle, angle-veloc]
-        return np.array([next_obs[0], next_obs[2]]), reward, done, info
+    def step(self, action):
+        assert self.action_space.contains(action), f"{action!r} invalid"
+        self.core_state, obs, reward, done = stateless_cartpole.step(
+            self.core_state, np.reshape(action, 1), auto_reset=False
+        )
+        # CartPoleEnv renders self.state
+        self.state = self.core_state["cart"][0]
+        reward = float(reward[0])
+        if done[0] and self.steps_beyond_done is None:
+            # Pole just fell!
+            self.steps_beyond_done = 0
+        elif done[0]:
+            if self.steps_beyond_done == 0:
+                gym.logger.warn(
+                    "You are calling 'step()' even though this "
+                    "environment has already returned done = True. You "
+                    "should always call 'reset()' once you receive 'done = "
+                    "True' -- any further steps are undefined behavior."
+                )
+            self.steps_beyond_done += 1
+            reward = 0.0
+        return obs[0].astype(np.float32), reward, bool(done[0]), {}
 
     def reset(
         self,
         *,
         seed: Optional[int] = None,
         return_info: bool = False,
-        options: Optional[dict] = None
+        options: Optional[dict] = None,
     ):
+        # Seed np_random as gym.Env does, then draw the cart from the core
+        super(CartPoleEnv, self).reset(seed=seed)
+        self.core_state = stateless_cartpole.init(
+            [self.np_random], self.kinematics_integrator
+        )
+        self.state = self.core_state["cart"][0]
+        self.steps_beyond_done = None
+        obs = stateless_cartpole.observe(self.core_state)[0].astype(np.float32)
         if return_info:
-            init_obs, info = super().reset(
-                seed=seed, return_info=return_info, options=options
-            )
-            return np.array([init_obs[0], init_obs[2]]), info
-        else:
-            init_obs = super().reset(
-                seed=seed, return_info=return_info, options=options
-            )
-            # init_obs is [x-pos, x-veloc, angle, angle-veloc]
-            return np.array([init_obs[0], init_obs[2]])
+            return obs, {}
+        return obs
+
+
+class StatelessCartPoleVec(FunctionalVecEnv):
+    """Many StatelessCartPoles, integrated together with the functional core
+    in pogym.functional.stateless_cartpole. The states of all carts are the
+    rows of a (num_envs, 4) array, and each step applies the CartPoleEnv
+    dynamics to every row at once, so that each row follows the same
+    trajectory as a single StatelessCartPole with the same seed.
+
+    Observations are a (num_envs, 2) view of the x and theta columns of the
+    state, in float64 rather than float32. Rewards, dones and actions are
+    arrays with one entry per cart. Row i is seeded with seed + i, and draws
+    its initial states from its own Generator, as StatelessCartPole does
+    from np_random. Carts that fall are reset in place, and the returned
+    observation for those carts is the first of the next episode.
+
+    Args:
+        num_envs: The number of carts
+        kinematics_integrator: "euler", or anything else for semi-implicit
+            euler, as in CartPoleEnv
+
+    Returns:
+        A vectorized gym environment
+    """
+
+    core = stateless_cartpole
+
+    def __init__(self, num_envs=1, kinematics_integrator="euler"):
+        super().__init__()
+        self.num_envs = num_envs
+        self.params = {"kinematics_integrator": kinematics_integrator}
+        high = np.array(
+            [
+                stateless_cartpole.X_THRESHOLD * 2,
+                stateless_cartpole.THETA_THRESHOLD_RADIANS * 2,
+            ],
+            dtype=np.float32,
+        )
+        self.observation_space = Box(low=-high, high=high, dtype=np.float32)
+        self.action_space = gym.spaces.Discrete(2)
+
+    def make_rngs(self, seed):
+        return [
+            seeding.np_random(None if seed is None else seed + i)[0]
+            for i in range(self.num_envs)
+        ]
@@ -1,12 +1,15 @@
 # Inspired by ray rllib at
 # https://github.com/ray-project/ray/blob/master/rllib/examples/env/stateless_pendulum.py
 
-from typing import Optional, Tuple, Union
+from typing import Optional
 
-import gym
 import numpy as np
 from gym.envs.classic_control import PendulumEnv
 from gym.spaces import Box
+from gym.utils import seeding
+
+from pogym.functional import stateless_pendulum
+from pogym.functional.vec_env import FunctionalVecEnv
 
 
 class StatelessPendulum(PendulumEnv):
@@ -15,6 +18,11 @@ class StatelessPendulum(PendulumEnv):
     pendulum.py
     We delete the angular velocity component of the state, so that it
     can only be solved by a memory enhanced model (policy).
+
+    The pendulum is run on the functional core in
+    pogym.functional.stateless_pendulum with a batch of one, which follows the
+    PendulumEnv dynamics and draws the same initial state for the same seed.
+    The episode never ends, as in PendulumEnv without a TimeLimit.
     """
 
     def __init__(self, *args, **kwargs):
@@ -24,12 +32,14 @@ class StatelessPendulum(PendulumEnv):
         high = np.array([1.0, 1.0], dtype=np.float32)
         self.observation_space = Box(low=-high, high=high, dtype=np.float32)
 
-    def step(
-        self, action
-    ):
-        next_obs, reward, done, info = super().step(action)
-        # next_obs is [cos(theta), sin(theta), theta-dot (angular velocity)]
-        return next_obs[:-1], reward, done, info
+    def step(self, action):
+        self.core_state, obs, reward, done = stateless_pendulum.step(
+            self.core_state, np.reshape(action, 1), auto_reset=False
+        )
+        # PendulumEnv renders self.state and self.last_u
+        self.state = self.core_state["pendulum"][0]
+        self.last_u = np.clip(action, -self.max_torque, self.max_torque)[0]
+        return obs[0], reward[0], False, {}
 
     def reset(
         self,
@@ -38,15 +48,62 @@ class StatelessPendulum(PendulumEnv):
         return_info: bool = False,
         options: Optional[dict] = None
     ):
+        # Seed np_random as gym.Env does, then draw the pendulum from the core
+        super(PendulumEnv, self).reset(seed=seed)
+        self.core_state = stateless_pendulum.init(
+            [self.np_random], episode_length=np.inf, g=self.g
+        )
+        self.state = self.core_state["pendulum"][0]
+        self.last_u = None
+        obs = stateless_pendulum.observe(self.core_state)[0]
         if return_info:
-            init_obs, info = super().reset(
-                seed=seed, return_info=return_info, options=options
-            )
-            return init_obs[:-1], info
-
-        else:
-            init_obs = super().reset(
-                seed=seed, return_info=return_info, options=options
-            )
-            # init_obs is [cos(theta), sin(theta), theta-dot (angular velocity)]
-            return init_obs[:-1]
+            return obs, {}
+        return obs
+
+
+class StatelessPendulumVec(FunctionalVecEnv):
+    """Many StatelessPendulums, integrated together with the functional core
+    in pogym.functional.stateless_pendulum. The angles and angular
+    velocities of all pendulums are the columns of a (num_envs, 2) array,
+    and each step computes the costs and the PendulumEnv dynamics for every
+    row at once.
+
+    All pendulums share an episode clock: after episode_length steps every
+    pendulum is done, and they are all reset together. The returned
+    observation on that step is the first of the next episode. Row i is
+    seeded with seed + i and draws its initial states from its own
+    Generator, so that it follows the same trajectory as a single
+    StatelessPendulum with the same seed.
+
+    Observations are (num_envs, 2) arrays of cos(theta) and sin(theta).
+    Actions are torques of shape (num_envs,) or (num_envs, 1), and rewards
+    and dones are arrays with one entry per pendulum.
+
+    Args:
+        num_envs: The number of pendulums
+        episode_length: The number of steps in an episode, the TimeLimit gym
+            registers Pendulum with
+        g: Gravity
+
+    Returns:
+        A vectorized gym environment
+    """
+
+    core = stateless_pendulum
+
+    def __init__(self, num_envs=1, episode_length=200, g=10.0):
+        super().__init__()
+        self.num_envs = num_envs
+        self.params = {"episode_length": episode_length, "g": g}
+        high = np.array([1.0, 1.0], dtype=np.float32)
+        self.observation_space = Box(low=-high, high=high, dtype=np.float32)
+        max_torque = stateless_pendulum.MAX_TORQUE
+        self.action_space = Box(
+            low=-max_torque, high=max_torque, shape=(1,), dtype=np.float32
+        )
+
+    def make_rngs(self, seed):
+        return [
+            seeding.np_random(None if seed is None else seed + i)[0]
+            for i in range(self.num_envs)
+        ]
@@ -0,0 +1,45 @@
+import copy
+from typing import Optional
+
+import gym
+import numpy as np
+
+
+class FunctionalEnv(gym.Env):
+    """A gym environment over a functional core (see FunctionalVecEnv) with a
+    batch of one. It is stepped with auto_reset=False, so that the game stops
+    where its episode ends, as gym envs do. Each reset draws the game from a
+    new Generator seeded from the global np.random, after seeding that with
+    seed if given, so that np.random.seed makes episodes reproducible.
+
+    Subclasses set core and params, and turn the obs of the core into their
+    observations and infos.
+    """
+
+    core = None
+    params = {}
+    state = None
+
+    def init_state(self, seed: Optional[int] = None):
+        """Starts a new game, returning the obs of the core"""
+        if seed is not None:
+            np.random.seed(seed)
+        rng = np.random.default_rng(np.random.randint(2**32, size=4))
+        self.state = self.core.init([rng], **self.params)
+        return self.core.observe(self.state)[0]
+
+    def step_state(self, action):
+        """Steps the game, returning the obs, reward and done of the core"""
+        self.state, obs, reward, done = self.core.step(
+            self.state, np.array(action).reshape(1), auto_reset=False
+        )
+        return obs[0], reward[0].item(), bool(done[0])
+
+    def get_state(self):
+        """Returns a snapshot of the game that can be restored with
+        set_state"""
+        return copy.deepcopy(self.state)
+
+    def set_state(self, state):
+        """Restores the game to a snapshot returned by get_state"""
+        self.state = copy.deepcopy(state)
@@ -0,0 +1,68 @@
+"""Functional core of HigherLower, for a batch of games dealt from the shoes
+in pogym.functional.shoes. With count_ranks, each game also keeps the count
+of each rank left in its shoe, for action_values. Games that end are dealt a
+new shoe in place, unless step is called with auto_reset=False."""
+import numpy as np
+
+from pogym.core.deck import full_counts
+from pogym.functional import shoes
+
+
+def init(rngs, num_decks=1, count_ranks=False):
+    """Returns the state of a game for each Generator in rngs"""
+    state = shoes.init(rngs, num_decks)
+    if count_ranks:
+        state["counts"] = np.tile(full_counts(num_decks)["ranks"], (len(rngs), 1))
+    state["rank"] = deal(state)
+    return state
+
+
+def deal(state, rows=None):
+    """Deals the next card of each of the rows, or of every row, and counts
+    it out of the ranks left in the shoe"""
+    if rows is None:
+        rows = np.arange(len(state["cursor"]))
+    ranks = shoes.deal(state, rows)
+    if "counts" in state:
+        state["counts"][rows, ranks] -= 1
+    return ranks
+
+
+def observe(state):
+    # A new array every step, as step replaces rather than updates it
+    return state["rank"]
+
+
+def action_values(state):
+    """Returns the expected reward of guessing higher and of guessing lower
+    in each game, given its current card and the cards left in its shoe.
+    Needs count_ranks."""
+    counts = state["counts"]
+    rank = state["rank"][:, None]
+    ranks = np.arange(counts.shape[1])
+    higher = np.where(ranks > rank, counts, 0).sum(axis=1)
+    lower = np.where(ranks < rank, counts, 0).sum(axis=1)
+    remaining = counts.sum(axis=1)
+    value = (higher - lower) / np.maximum(remaining, 1) / shoes.num_cards(state)
+    return np.stack([value, -value], axis=1)
+
+
+def reset(state, rows):
+    """Deals the rows a new shoe and their first card, in place"""
+    shoes.reshuffle(state, rows)
+    if "counts" in state:
+        state["counts"][rows] = full_counts(state["num_decks"])["ranks"]
+    state["rank"][rows] = deal(state, rows)
+
+
+def step(state, action, auto_reset=True):
+    num_cards = shoes.num_cards(state)
+    current = state["rank"]
+    state["rank"] = deal(state)
+    # Whether the next card is higher (1), lower (-1) or equal (0)
+    sign = np.sign(state["rank"] - current)
+    reward = np.where(np.asarray(action) == 0, sign, -sign) / num_cards
+    done = state["cursor"] == num_cards - 1
+    if auto_reset and done.any():
+        reset(state, np.flatnonzero(done))
+    return state, observe(state), reward, done
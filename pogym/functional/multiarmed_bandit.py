@@ -0,0 +1,72 @@
+"""Functional core of a batch of multiarmed bandits. Each bandit draws its
+arm means on reset and its noise block_size steps at a time from its own
+Generator, so that a step is a gather of the pulled arm means plus a column
+of noise. Bandits redraw their arm means in place every episode_length
+steps, unless step is called with auto_reset=False."""
+import numpy as np
+
+
+def draw_bandits(rngs, rows, num_bandits):
+    bandits = np.empty((len(rows), num_bandits))
+    for j, i in enumerate(rows):
+        rngs[i].random(out=bandits[j])
+    return bandits
+
+
+def init(rngs, num_bandits=10, std=1.0, episode_length=100, block_size=1024):
+    """Returns the state of a bandit for each Generator in rngs"""
+    num_envs = len(rngs)
+    bandits = draw_bandits(rngs, range(num_envs), num_bandits)
+    return {
+        "rngs": rngs,
+        "std": std,
+        "episode_length": episode_length,
+        "bandits": bandits,
+        "best": bandits.max(axis=1),
+        # A column of noise per step, drawn on first use. All bandits step
+        # together, so they share the position in their block.
+        "noise": np.zeros((num_envs, block_size)),
+        "pos": block_size,
+        "num_steps": np.zeros(num_envs, dtype=np.int64),
+        "payout": np.zeros(num_envs),
+    }
+
+
+def observe(state):
+    return state["payout"][:, None]
+
+
+def regret(state, action):
+    """Returns the mean payout of the best arm minus that of the pulled arm"""
+    bandits = state["bandits"]
+    return state["best"] - bandits[np.arange(len(bandits)), action]
+
+
+def pull(state, action):
+    """Returns the noisy payout of the pulled arms, without advancing the
+    episode clock"""
+    rngs, bandits, noise = state["rngs"], state["bandits"], state["noise"]
+    if state["pos"] == noise.shape[1]:
+        for i, rng in enumerate(rngs):
+            rng.standard_normal(noise.shape[1], out=noise[i])
+        noise *= state["std"]
+        state["pos"] = 0
+    payout = bandits[np.arange(len(bandits)), action] + noise[:, state["pos"]]
+    state["pos"] += 1
+    # A new array, as observations are views of it
+    state["payout"] = payout
+    return payout
+
+
+def step(state, action, auto_reset=True):
+    reward = pull(state, action)
+    bandits = state["bandits"]
+    num_steps = state["num_steps"]
+    num_steps += 1
+    done = num_steps >= state["episode_length"]
+    if auto_reset and done.any():
+        rows = np.flatnonzero(done)
+        bandits[rows] = draw_bandits(state["rngs"], rows, bandits.shape[1])
+        state["best"] = bandits.max(axis=1)
+        num_steps[rows] = 0
+    return state, observe(state), reward, done
@@ -0,0 +1,73 @@
+"""Functional core of RepeatBackwards, for a batch of games. Each game has
+a sequence of buttons and a cursor counting the steps since reset: the
+first game_len steps show the buttons in order, the next game_len score the
+actions against them in the order they were shown. Buttons are held in the
+smallest integer dtype that fits num_buttons, and drawn block_size at a
+time as they are shown, all on reset by default. Games that end draw new
+buttons in place, unless step is called with auto_reset=False."""
+import numpy as np
+
+
+def init(rngs, game_len=32, num_buttons=4, block_size=None):
+    """Returns the state of a game for each Generator in rngs"""
+    num_envs = len(rngs)
+    state = {
+        "rngs": rngs,
+        "num_buttons": num_buttons,
+        "block_size": block_size or game_len,
+        "seq": np.zeros(
+            (num_envs, game_len), dtype=np.min_scalar_type(num_buttons - 1)
+        ),
+        "cursor": np.zeros(num_envs, dtype=np.int64),
+    }
+    draw(state, range(num_envs))
+    return state
+
+
+def draw(state, rows):
+    """Draws the next block of buttons of each of the rows, from its cursor"""
+    seq, num_buttons = state["seq"], state["num_buttons"]
+    rows = np.asarray(rows, dtype=np.int64)
+    start = state["cursor"][rows]
+    n = np.minimum(state["block_size"], seq.shape[1] - start)
+    # Filling a preallocated array with floats is several times faster than
+    # drawing integers, and writing the buttons of every row at once is
+    # twice as fast as writing them row by row
+    u = np.empty((len(rows), n.max(initial=0)))
+    for j, i in enumerate(rows):
+        state["rngs"][i].random(out=u[j, : n[j]])
+    cols = start[:, None] + np.arange(u.shape[1])
+    fill = np.arange(u.shape[1]) < n[:, None]
+    seq[np.broadcast_to(rows[:, None], cols.shape)[fill], cols[fill]] = (
+        u[fill] * num_buttons
+    )
+
+
+def observe(state):
+    seq, cursor = state["seq"], state["cursor"]
+    game_len = seq.shape[1]
+    watch = cursor < game_len
+    button = seq[np.arange(len(seq)), np.minimum(cursor, game_len - 1)]
+    obs = np.empty((len(seq), 2), dtype=np.int64)
+    obs[:, 0] = watch
+    obs[:, 1] = np.where(watch, button, 0)
+    return obs
+
+
+def step(state, action, auto_reset=True):
+    seq, cursor = state["seq"], state["cursor"]
+    game_len = seq.shape[1]
+    cursor += 1
+    play = cursor >= game_len
+    pos = np.clip(cursor - game_len, 0, game_len - 1)
+    correct = np.asarray(action) == seq[np.arange(len(seq)), pos]
+    reward = (play & correct) / game_len
+    done = cursor == 2 * game_len - 1
+    if state["block_size"] < game_len:
+        shown = ~play & (cursor % state["block_size"] == 0)
+        draw(state, np.flatnonzero(shown))
+    if auto_reset and done.any():
+        rows = np.flatnonzero(done)
+        cursor[rows] = 0
+        draw(state, rows)
+    return state, observe(state), reward, done
@@ -0,0 +1,39 @@
+"""Functional core of RepeatFirst, for a batch of games dealt from the shoes
+in pogym.functional.shoes. Games that end are dealt a new shoe in place,
+with the first observation of the next episode returned, unless step is
+called with auto_reset=False."""
+import numpy as np
+
+from pogym.functional import shoes
+
+
+def init(rngs, num_decks=1, long_horizon=False, block_size=4096):
+    """Returns the state of a game for each Generator in rngs"""
+    state = shoes.init(rngs, num_decks, long_horizon, block_size)
+    state["rank"] = shoes.deal(state)
+    state["first"] = state["rank"].copy()
+    return state
+
+
+def observe(state):
+    obs = np.empty((len(state["rank"]), 2), dtype=np.int64)
+    obs[:, 0] = state["cursor"] == 0
+    obs[:, 1] = state["rank"]
+    return obs
+
+
+def reset(state, rows):
+    """Deals the rows a new shoe and their first card, in place"""
+    shoes.reshuffle(state, rows)
+    state["first"][rows] = state["rank"][rows] = shoes.deal(state, rows)
+
+
+def step(state, action, auto_reset=True):
+    num_cards = shoes.num_cards(state)
+    correct = np.asarray(action) == state["first"]
+    reward = correct / num_cards
+    state["rank"] = shoes.deal(state)
+    done = ~correct | (state["cursor"] == num_cards - 1)
+    if auto_reset and done.any():
+        reset(state, np.flatnonzero(done))
+    return state, observe(state), reward, done
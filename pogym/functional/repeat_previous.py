@@ -0,0 +1,59 @@
+"""Functional core of RepeatPrevious, for a batch of games dealt from the
+shoes in pogym.functional.shoes. The ranks of the last k cards of each game
+are kept in a ring buffer, so that memory is O(k) per game with
+long_horizon. Games that end are dealt a new shoe in place, unless step is
+called with auto_reset=False."""
+import numpy as np
+
+from pogym.functional import shoes
+
+
+def init(rngs, num_decks=1, k=16, long_horizon=False, block_size=4096):
+    """Returns the state of a game for each Generator in rngs"""
+    state = shoes.init(rngs, num_decks, long_horizon, block_size)
+    state["k"] = k
+    # The card at cursor t is in column t % k
+    state["ring"] = np.zeros((len(rngs), k), dtype=np.int64)
+    state["rank"] = deal(state)
+    return state
+
+
+def deal(state, rows=None):
+    """Deals the next card of each of the rows, or of every row, writing its
+    rank over that of the card dealt k steps before"""
+    if rows is None:
+        rows = np.arange(len(state["cursor"]))
+    ranks = shoes.deal(state, rows)
+    state["ring"][rows, state["cursor"][rows] % state["k"]] = ranks
+    return ranks
+
+
+def observe(state):
+    cursor = state["cursor"]
+    obs = np.empty((len(cursor), 2), dtype=np.int64)
+    # The first observation is flagged, as in RepeatPrevious.reset
+    obs[:, 0] = (cursor >= state["k"]) | (cursor == 0)
+    obs[:, 1] = state["rank"]
+    return obs
+
+
+def reset(state, rows):
+    """Deals the rows a new shoe and their first card, in place"""
+    shoes.reshuffle(state, rows)
+    state["rank"][rows] = deal(state, rows)
+
+
+def step(state, action, auto_reset=True):
+    num_cards, k = shoes.num_cards(state), state["k"]
+    cursor = state["cursor"] + 1
+    # Actions are only scored once there is a card k steps back, which is
+    # about to be overwritten in the ring
+    scored = cursor >= k
+    target = state["ring"][np.arange(len(cursor)), cursor % k]
+    correct = np.asarray(action) == target
+    reward = (scored & correct) / (num_cards - k)
+    state["rank"] = deal(state)
+    done = (scored & ~correct) | (cursor == num_cards - 1)
+    if auto_reset and done.any():
+        reset(state, np.flatnonzero(done))
+    return state, observe(state), reward, done
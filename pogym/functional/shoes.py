@@ -0,0 +1,92 @@
+"""Shoes of cards for a batch of card games, one row per game, that the
+games deal ranks from in place. A shoe is a shuffled array of card ids, or
+with long_horizon, a stream of ranks drawn block_size at a time from the
+count of each rank not yet drawn, as RankStream does, so that memory does
+not grow with num_decks. The cursor of a row is the position of its last
+dealt card in the shoe."""
+import numpy as np
+
+from pogym.core import deck
+
+
+def shuffle(rngs, rows, num_decks):
+    """Returns a shuffled shoe of card ids for each of the rows, from the
+    Generator of that row. Cards are dealt from the start of a shoe."""
+    # Sorting random keys shuffles every row at once, which is about twice
+    # as fast as a permutation per row
+    keys = np.empty((len(rows), deck.DECK_SIZE * num_decks))
+    for j, i in enumerate(rows):
+        rngs[i].random(out=keys[j])
+    return keys.argsort(axis=1)
+
+
+def init(rngs, num_decks=1, long_horizon=False, block_size=4096):
+    """Returns a full shoe for each Generator in rngs, with no card dealt"""
+    num_envs = len(rngs)
+    state = {
+        "rngs": rngs,
+        "num_decks": num_decks,
+        "cursor": np.full(num_envs, -1),
+    }
+    if long_horizon:
+        state["undrawn"] = np.tile(deck.full_counts(num_decks)["ranks"], (num_envs, 1))
+        state["block"] = np.zeros((num_envs, block_size), dtype=np.int64)
+        # A row draws a new block when pos reaches the end of its block
+        state["block_len"] = np.zeros(num_envs, dtype=np.int64)
+        state["pos"] = np.zeros(num_envs, dtype=np.int64)
+    else:
+        state["shoes"] = shuffle(rngs, range(num_envs), num_decks)
+    return state
+
+
+def num_cards(state):
+    return deck.DECK_SIZE * state["num_decks"]
+
+
+def reshuffle(state, rows):
+    """Puts every card of the rows back into their shoes and shuffles them"""
+    state["cursor"][rows] = -1
+    if "shoes" in state:
+        state["shoes"][rows] = shuffle(state["rngs"], rows, state["num_decks"])
+    else:
+        state["undrawn"][rows] = deck.full_counts(state["num_decks"])["ranks"]
+        state["block_len"][rows] = 0
+        state["pos"][rows] = 0
+
+
+def draw_block(state, i):
+    """Draws the next block of ranks of row i from its Generator. The count
+    of each rank in the block is multivariate hypergeometric over the ranks
+    not yet drawn, and the block is then shuffled."""
+    rng, undrawn, block = state["rngs"][i], state["undrawn"][i], state["block"][i]
+    size = min(block.size, undrawn.sum())
+    if size == 0:
+        raise deck.DeckEmptyError()
+    counts = rng.multivariate_hypergeometric(undrawn, size)
+    undrawn -= counts
+    block[:size] = np.repeat(np.arange(deck.RANKS.size), counts)
+    rng.shuffle(block[:size])
+    state["block_len"][i] = size
+    state["pos"][i] = 0
+
+
+def deal(state, rows=None):
+    """Deals the next card of each of the rows, or of every row, and returns
+    their ranks"""
+    cursor = state["cursor"]
+    if rows is None:
+        rows = np.arange(len(cursor))
+        cursor += 1
+    else:
+        cursor[rows] += 1
+    if "shoes" in state:
+        try:
+            cards = state["shoes"][rows, cursor[rows]]
+        except IndexError:
+            raise deck.DeckEmptyError() from None
+        return deck.card_tables(state["num_decks"])["ranks_idx"][cards]
+    for i in rows[state["pos"][rows] == state["block_len"][rows]]:
+        draw_block(state, i)
+    ranks = state["block"][rows, state["pos"][rows]]
+    state["pos"][rows] += 1
+    return ranks
@@ -0,0 +1,73 @@
+"""Functional core of StatelessCartPole, for a batch of carts. Each step
+applies the CartPoleEnv dynamics to every cart with the same operations in
+the same order, so that a cart follows the same trajectory as CartPoleEnv
+for the same initial state. Fallen carts are reset in place, unless step
+is called with auto_reset=False."""
+import math
+
+import numpy as np
+
+# The constants of CartPoleEnv
+GRAVITY = 9.8
+MASSCART = 1.0
+MASSPOLE = 0.1
+TOTAL_MASS = MASSPOLE + MASSCART
+LENGTH = 0.5  # actually half the pole's length
+POLEMASS_LENGTH = MASSPOLE * LENGTH
+FORCE_MAG = 10.0
+TAU = 0.02  # seconds between state updates
+THETA_THRESHOLD_RADIANS = 12 * 2 * math.pi / 360
+X_THRESHOLD = 2.4
+
+
+def draw(rngs, rows):
+    return np.stack([rngs[i].uniform(low=-0.05, high=0.05, size=(4,)) for i in rows])
+
+
+def init(rngs, kinematics_integrator="euler"):
+    """Returns the state of a cart for each Generator in rngs"""
+    return {
+        "rngs": rngs,
+        "kinematics_integrator": kinematics_integrator,
+        "cart": draw(rngs, range(len(rngs))),
+    }
+
+
+def observe(state):
+    """Returns a view of the x and theta columns of the carts"""
+    return state["cart"][:, ::2]
+
+
+def step(state, action, auto_reset=True):
+    x, x_dot, theta, theta_dot = state["cart"].T
+    force = np.where(np.asarray(action) == 1, FORCE_MAG, -FORCE_MAG)
+    costheta = np.cos(theta)
+    sintheta = np.sin(theta)
+
+    # np.float_power rounds like the scalar ** of CartPoleEnv, where ** on an
+    # array may not
+    sq = np.float_power
+    temp = (force + POLEMASS_LENGTH * sq(theta_dot, 2) * sintheta) / TOTAL_MASS
+    thetaacc = (GRAVITY * sintheta - costheta * temp) / (
+        LENGTH * (4.0 / 3.0 - MASSPOLE * sq(costheta, 2) / TOTAL_MASS)
+    )
+    xacc = temp - POLEMASS_LENGTH * thetaacc * costheta / TOTAL_MASS
+
+    if state["kinematics_integrator"] == "euler":
+        x = x + TAU * x_dot
+        x_dot = x_dot + TAU * xacc
+        theta = theta + TAU * theta_dot
+        theta_dot = theta_dot + TAU * thetaacc
+    else:  # semi-implicit euler
+        x_dot = x_dot + TAU * xacc
+        x = x + TAU * x_dot
+        theta_dot = theta_dot + TAU * thetaacc
+        theta = theta + TAU * theta_dot
+
+    cart = np.stack([x, x_dot, theta, theta_dot], axis=1)
+    done = (np.abs(x) > X_THRESHOLD) | (np.abs(theta) > THETA_THRESHOLD_RADIANS)
+    if auto_reset and done.any():
+        rows = np.flatnonzero(done)
+        cart[rows] = draw(state["rngs"], rows)
+    state["cart"] = cart
+    return state, observe(state), np.ones(len(cart)), done
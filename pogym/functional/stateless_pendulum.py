@@ -0,0 +1,63 @@
+"""Functional core of StatelessPendulum, for a batch of pendulums. Costs and
+dynamics follow PendulumEnv in the same order of operations, so that a
+pendulum follows the same trajectory as PendulumEnv for the same initial
+state. Each pendulum is done after episode_length steps and reset in place,
+unless step is called with auto_reset=False."""
+import numpy as np
+from gym.envs.classic_control.pendulum import angle_normalize
+
+# The constants of PendulumEnv
+MAX_SPEED = 8
+MAX_TORQUE = 2.0
+DT = 0.05
+M = 1.0
+L = 1.0
+
+
+def draw(rngs, rows):
+    high = np.array([np.pi, 1])
+    return np.stack([rngs[i].uniform(low=-high, high=high) for i in rows])
+
+
+def init(rngs, episode_length=200, g=10.0):
+    """Returns the state of a pendulum for each Generator in rngs"""
+    return {
+        "rngs": rngs,
+        "episode_length": episode_length,
+        "g": g,
+        "pendulum": draw(rngs, range(len(rngs))),
+        "num_steps": np.zeros(len(rngs), dtype=np.int64),
+    }
+
+
+def observe(state):
+    """Returns cos(theta) and sin(theta) of each pendulum, as float32"""
+    theta = state["pendulum"][:, 0]
+    obs = np.empty((len(theta), 2), dtype=np.float32)
+    np.cos(theta, out=obs[:, 0], casting="same_kind")
+    np.sin(theta, out=obs[:, 1], casting="same_kind")
+    return obs
+
+
+def step(state, action, auto_reset=True):
+    th, thdot = state["pendulum"].T
+    u = np.clip(np.reshape(action, len(th)), -MAX_TORQUE, MAX_TORQUE)
+    # np.float_power rounds like the scalar ** of PendulumEnv, where ** on an
+    # array may not
+    sq = np.float_power
+    costs = sq(angle_normalize(th), 2) + 0.1 * sq(thdot, 2) + 0.001 * sq(u, 2)
+
+    g = state["g"]
+    newthdot = thdot + (3 * g / (2 * L) * np.sin(th) + 3.0 / (M * L**2) * u) * DT
+    np.clip(newthdot, -MAX_SPEED, MAX_SPEED, out=newthdot)
+    pendulum = np.stack([th + newthdot * DT, newthdot], axis=1)
+
+    num_steps = state["num_steps"]
+    num_steps += 1
+    done = num_steps >= state["episode_length"]
+    if auto_reset and done.any():
+        rows = np.flatnonzero(done)
+        pendulum[rows] = draw(state["rngs"], rows)
+        num_steps[rows] = 0
+    state["pendulum"] = pendulum
+    return state, observe(state), -costs, done
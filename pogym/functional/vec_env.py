@@ -0,0 +1,55 @@
+from typing import Optional
+
+import gym
+import numpy as np
+
+
+class FunctionalVecEnv(gym.Env):
+    """A vectorized gym environment over a functional core: a module with
+    init(rngs, **params) -> state, step(state, action) -> (state, obs, reward,
+    done) and observe(state) -> obs. The env only holds the current state and
+    the per-row Generators that seed it.
+
+    A core is not pure: step takes ownership of the state it is given. It
+    updates the arrays of the state in place, including reshuffling or
+    redrawing the rows that are done, advances the Generators of the state,
+    and returns the same state. The observations, rewards and dones it
+    returns are new arrays, which later steps do not change. To step from a
+    state more than once, e.g. to replay it, step a copy.deepcopy of it,
+    which copies its Generators too.
+
+    Subclasses set core, params, num_envs and the spaces, and may override
+    make_rngs to seed the rows differently.
+    """
+
+    core = None
+    params = {}
+
+    def __init__(self):
+        self.rngs = None
+        self.state = None
+
+    def make_rngs(self, seed):
+        """Returns a Generator per row, spawned from seed"""
+        seeds = np.random.SeedSequence(seed).spawn(self.num_envs)
+        return [np.random.default_rng(s) for s in seeds]
+
+    def step(self, action):
+        self.state, obs, reward, done = self.core.step(self.state, action)
+        return obs, reward, done, {}
+
+    def reset(
+        self,
+        *,
+        seed: Optional[int] = None,
+        return_info: bool = False,
+        options: Optional[dict] = None,
+    ):
+        if seed is not None or self.rngs is None:
+            self.rngs = self.make_rngs(seed)
+        self.state = self.core.init(self.rngs, **self.params)
+        obs = self.core.observe(self.state)
+        if return_info:
+            return obs, {}
+
+        return obs
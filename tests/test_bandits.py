@@ -2,12 +2,93 @@ import unittest
 
 import numpy as np
 
-from pogym.envs.multiarmed_bandit import MultiarmedBandit
+from pogym.envs.multiarmed_bandit import MultiarmedBandit, MultiarmedBanditVec
 
 
 class TestBandits(unittest.TestCase):
     def test_step(self):
         m = MultiarmedBandit()
-        m.reset()
+        obs = m.reset()
+        self.assertEqual(np.shape(obs), ())
         for i in range(100):
-            obs, reward, done, info = m.step(np.random.randint(10))
+            action = np.random.randint(10)
+            obs, reward, done, info = m.step(action)
+            self.assertEqual(np.shape(obs), ())
+            self.assertTrue(np.all(reward == [action, obs]))
+            self.assertGreaterEqual(info["regret"], 0)
+            self.assertEqual(done, i == 99)
+
+    def test_increment(self):
+        m = MultiarmedBandit(episode_length=3)
+        m.reset(seed=0)
+        m.step(0, increment=False)
+        self.assertEqual(m.state["num_steps"][0], 0)
+        m.step(0)
+        self.assertEqual(m.state["num_steps"][0], 1)
+
+    def test_seed(self):
+        m = MultiarmedBandit()
+        other = MultiarmedBandit()
+        self.assertEqual(m.reset(seed=2), other.reset(seed=2))
+        for i in range(10):
+            self.assertEqual(m.step(i)[0], other.step(i)[0])
+
+    def test_matches_vec(self):
+        m = MultiarmedBandit(episode_length=7)
+        vec = MultiarmedBanditVec(1, episode_length=7, seeds=[3])
+        m.reset()
+        m.state = m.core.init([np.random.default_rng(3)], **m.params)
+        vec.reset()
+        for i in range(7):
+            action = np.random.randint(10)
+            obs, reward, done, info = m.step(action)
+            v_obs, v_reward, v_done, v_info = vec.step([action])
+            self.assertEqual(obs, v_reward[0])
+            self.assertEqual(info["regret"], v_info["regret"][0])
+            self.assertEqual(done, v_done[0])
+
+    def test_few_arms(self):
+        m = MultiarmedBandit(num_bandits=2)
+        for seed in range(10):
+            obs, info = m.reset(seed=seed, return_info=True)
+            self.assertEqual(info["bandits"].shape, (2,))
+
+
+class TestBanditsVec(unittest.TestCase):
+    def test_seed(self):
+        vec = MultiarmedBanditVec(3, episode_length=7, block_size=5)
+        other = MultiarmedBanditVec(3, episode_length=7, block_size=5)
+        vec.reset(seed=4)
+        other.reset(seed=4)
+        for i in range(20):
+            action = np.random.randint(10, size=3)
+            obs, reward, done, info = vec.step(action)
+            o_obs, o_reward, o_done, o_info = other.step(action)
+            self.assertEqual(obs.shape, (3, 1))
+            self.assertTrue(np.all(reward == o_reward))
+            self.assertTrue(np.all(info["regret"] == o_info["regret"]))
+            self.assertTrue(np.all(done == (i % 7 == 6)))
+            self.assertTrue(np.all(done == o_done))
+
+    def test_seeds(self):
+        vec = MultiarmedBanditVec(3, episode_length=7, block_size=5, seeds=[4, 5, 6])
+        single = MultiarmedBanditVec(1, episode_length=7, block_size=5, seeds=[5])
+        vec.reset()
+        single.reset()
+        for i in range(20):
+            action = np.random.randint(10, size=3)
+            obs, reward, done, info = vec.step(action)
+            s_obs, s_reward, s_done, s_info = single.step(action[1:2])
+            self.assertEqual(reward[1], s_reward[0])
+            self.assertEqual(done[1], s_done[0])
+            self.assertEqual(info["regret"][1], s_info["regret"][0])
+
+    def test_payouts(self):
+        vec = MultiarmedBanditVec(1000, num_bandits=2, std=0.5)
+        vec.reset(seed=0)
+        means = vec.state["bandits"][:, 0].copy()
+        obs, reward, done, info = vec.step(np.zeros(1000, dtype=int))
+        self.assertTrue(np.all(info["regret"] >= 0))
+        # The noise has std 0.5, so its mean over 1000 bandits has std 0.016
+        self.assertLess(abs(np.mean(reward - means)), 0.1)
+        self.assertLess(abs(np.std(reward - means) - 0.5), 0.1)
@@ -1,6 +1,75 @@
 import unittest
 
-from pogym.envs.blackjack import BlackJack
+import numpy as np
+
+from pogym.core.deck import Deck
+from pogym.envs import blackjack
+from pogym.envs.blackjack import BlackJack, BlackJackHand, BlackJackVec, Phase
+from pogym.envs.blackjack_oracle import BlackJackOracle
+
+
+def brute_force_values(total, has_ace, num_cards, upcard, comp, max_rounds=6):
+    """Stay and hit values by recursing over every card drawn"""
+
+    def value(total, has_ace):
+        return total + 10 if has_ace and total < 11 else total
+
+    def dealer(total, has_ace, num_cards, comp):
+        # Returns the dealer value and natural, or None if the deck is empty
+        if value(total, has_ace) >= 17 or num_cards == max_rounds:
+            yield 1.0, (value(total, has_ace), num_cards == 2), comp
+            return
+        remaining = sum(comp)
+        if remaining == 0:
+            yield 1.0, None, comp
+        for card, count in enumerate(comp):
+            if count:
+                rest = comp[:card] + (count - 1,) + comp[card + 1 :]
+                for p, outcome, rest in dealer(
+                    total + card + 1, has_ace or card == 0, num_cards + 1, rest
+                ):
+                    yield count / remaining * p, outcome, rest
+
+    def payoff(player, natural, comp):
+        reward = 0.0
+        for p, outcome, _ in dealer(upcard + 1, upcard == 0, 1, comp):
+            if outcome is None:
+                continue
+            dealer_value, dealer_natural = outcome
+            dealer_natural = dealer_natural and dealer_value == 21
+            if natural:
+                reward += p * (0 if dealer_natural else 1.5)
+            elif dealer_natural:
+                reward -= p
+            elif dealer_value > 21:
+                reward += p
+            else:
+                reward += p * np.sign(player - dealer_value)
+        return reward
+
+    def values(total, has_ace, num_cards, comp):
+        player = value(total, has_ace)
+        stay = payoff(player, player == 21 and num_cards == 2, comp)
+        hit = 0.0
+        remaining = sum(comp)
+        for card, count in enumerate(comp):
+            if not count:
+                continue
+            rest = comp[:card] + (count - 1,) + comp[card + 1 :]
+            next_total, next_ace = total + card + 1, has_ace or card == 0
+            next_value = value(next_total, next_ace)
+            if next_value > 21:
+                v = -1
+            elif next_value == 21:
+                v = payoff(21, False, rest)
+            elif num_cards + 1 == max_rounds:
+                v = np.sign(next_value - value(upcard + 1, upcard == 0))
+            else:
+                v = max(values(next_total, next_ace, num_cards + 1, rest))
+            hit += count / remaining * v
+        return stay, hit
+
+    return values(total, has_ace, num_cards, comp)
 
 
 class TestBlackjack(unittest.TestCase):
@@ -29,3 +98,282 @@ class TestBlackjack(unittest.TestCase):
         a = {"hit": 1, "bet_size": 1}
         [b.step(a) for i in range(10)]
         b.render()
+
+    def test_hand_evaluator(self):
+        d = Deck(num_decks=2)
+        d.define_hand_evaluator(BlackJackHand())
+        d.add_players("a")
+        while len(d) > 0:
+            d.deal("a", min(3, len(d)))
+            self.assertEqual(d.value("a"), blackjack.hand_value(d["ranks"][d["a"]]))
+            if d.hand_size("a") > 4:
+                d.discard("a", 0)
+                self.assertEqual(d.value("a"), blackjack.hand_value(d["ranks"][d["a"]]))
+            if d.value("a") > 21:
+                d.discard_hands("a")
+                self.assertEqual(d.value("a"), 0)
+
+    def test_values_match_hand_value(self):
+        np.random.seed(0)
+        b = BlackJack()
+        b.reset()
+        for i in range(500):
+            a = {"hit": np.random.randint(2), "bet_size": 1}
+            obs, reward, done, info = b.step(a)
+            for player in ["dealer", "player"]:
+                target = blackjack.hand_value(b.deck["ranks"][b.deck[player]])
+                self.assertEqual(b.deck.value(player), target)
+            if done:
+                b.reset()
+
+    def test_get_set_state(self):
+        b = BlackJack()
+        b.reset()
+        actions = [{"hit": np.random.randint(2), "bet_size": 1} for i in range(40)]
+        for a in actions[:10]:
+            b.step(a)
+        state = b.get_state()
+        first = [b.step(a) for a in actions[10:]]
+        b.set_state(state)
+        second = [b.step(a) for a in actions[10:]]
+        for (o1, r1, d1, i1), (o2, r2, d2, i2) in zip(first, second):
+            self.assertEqual(r1, r2)
+            self.assertEqual(d1, d2)
+            self.assertEqual(i1["result"], i2["result"])
+            for k in o1:
+                self.assertTrue(np.all(o1[k] == o2[k]))
+
+    def test_info_levels(self):
+        results = {}
+        for info_level in ["none", "minimal", "debug"]:
+            np.random.seed(0)
+            b = BlackJack(info_level=info_level)
+            b.reset()
+            rewards = []
+            for i in range(500):
+                obs, reward, done, info = b.step({"hit": i % 2, "bet_size": 1})
+                rewards.append(reward)
+                if done:
+                    b.reset()
+            results[info_level] = (rewards, info)
+        self.assertEqual(results["none"][0], results["debug"][0])
+        self.assertEqual(results["minimal"][0], results["debug"][0])
+        self.assertEqual(results["none"][1], {})
+        self.assertEqual(set(results["minimal"][1]), {"phase", "current_bet"})
+        self.assertIn("result", results["debug"][1])
+
+    def test_oracle_matches_brute_force(self):
+        oracle = BlackJackOracle()
+        rng = np.random.default_rng(0)
+        for i in range(10):
+            comp = tuple(rng.integers(0, 3, size=10).tolist())
+            comp = comp[:9] + (comp[9] + 4,)
+            hand = rng.choice(10, size=2).tolist()
+            upcard = int(rng.integers(10))
+            stay, hit = oracle.action_values(hand, upcard, comp)
+            total = sum(hand) + 2
+            target = brute_force_values(total, 0 in hand, 2, upcard, comp)
+            self.assertAlmostEqual(stay, target[0])
+            self.assertAlmostEqual(hit, target[1])
+
+    def test_game_value_matches_upcards(self):
+        # The game value shares the dealer hands across upcards
+        oracle = BlackJackOracle()
+        rng = np.random.default_rng(0)
+        for i in range(5):
+            comp = tuple(rng.binomial([8] * 9 + [32], rng.uniform(0.2, 1)).tolist())
+            value = oracle.game_value(comp)
+            target = 0.0
+            for upcard, count in enumerate(comp):
+                if count:
+                    rest = comp[:upcard] + (count - 1,) + comp[upcard + 1 :]
+                    stay, hit = oracle.hand_values(upcard, rest)
+                    target += count / sum(comp) * hit[0]
+                    np.testing.assert_allclose(
+                        oracle.game_hand_values[upcard, rest], (stay, hit), atol=1e-12
+                    )
+            self.assertAlmostEqual(value, target)
+
+    def test_oracle_action(self):
+        np.random.seed(0)
+        b = BlackJack(games_per_episode=3)
+        b.reset()
+        done = False
+        while not done:
+            state = b.get_state()
+            a = b.oracle_action()
+            self.assertTrue(b.action_space.contains(a))
+            self.assertEqual(b.oracle_action(state), a)
+            obs, reward, done, info = b.step(a)
+            # The oracle never hits on a hard 21 or more
+            if info["player_value"] >= 21:
+                self.assertEqual(b.oracle_action(), {"hit": 0, "bet_size": 0})
+
+    def test_oracle_bets(self):
+        # Every decision is served from values computed on reset or in the
+        # step ending the previous game, see
+        # examples/benchmark_blackjack_oracle.py for timings
+        np.random.seed(0)
+        b = BlackJack(oracle_bets=True)
+        b.reset()
+        oracle = b.get_oracle()
+        phases = set()
+        done = False
+        while not done:
+            misses = oracle.game_value.cache_info().misses
+            hand_misses = oracle.hand_values.cache_info().misses
+            a = b.oracle_action()
+            self.assertEqual(oracle.game_value.cache_info().misses, misses)
+            self.assertEqual(oracle.hand_values.cache_info().misses, hand_misses)
+            phases.add(b.action_phase)
+            obs, reward, done, info = b.step(a)
+        self.assertEqual(phases, {Phase.BET, Phase.DEAL, Phase.PLAY})
+
+    def test_play_dealer(self):
+        np.random.seed(0)
+        b = BlackJack()
+        for i in range(200):
+            b.reset()
+            b.deck.deal("dealer", 1)
+            state = b.deck.get_state()
+            value = b.play_dealer()
+            hand = b.deck["dealer"].copy()
+            # Draw one card at a time instead
+            b.deck.set_state(state)
+            while b.deck.value("dealer") < 17 and b.deck.hand_size("dealer") < 6:
+                b.deck.deal("dealer", 1)
+            self.assertEqual(value, b.deck.value("dealer"))
+            self.assertTrue(np.all(hand == b.deck["dealer"]))
+
+    def test_dealer_probs(self):
+        oracle = BlackJackOracle()
+        rng = np.random.default_rng(0)
+        comps = rng.integers(0, 5, size=(20, 10))
+        for upcard in range(10):
+            dist = oracle.dealer_outcomes(upcard, comps)
+            for comp, d in zip(comps, dist):
+                target = oracle.small_dealer_outcomes(
+                    upcard + 1, upcard == 0, 1, tuple(comp.tolist())
+                )
+                self.assertTrue(np.allclose(d, target))
+
+        b = BlackJack(dealer_probs=True, info_level="none")
+        b.reset()
+        obs, reward, done, info = b.step({"hit": 0, "bet_size": 0})
+        self.assertAlmostEqual(info["dealer_probs"].sum(), 1)
+        obs, reward, done, info = b.step({"hit": 0, "bet_size": 0})
+        self.assertEqual(info["dealer_probs"].sum(), 0)
+
+    def test_reuse_obs(self):
+        envs = []
+        for kwargs in [{}, {"reuse_obs": True}, {"reuse_obs": True, "copy_obs": True}]:
+            np.random.seed(0)
+            envs.append(BlackJack(**kwargs))
+            envs[-1].reset()
+        first = envs[1].obs
+        for i in range(500):
+            a = {"hit": i % 3 == 0, "bet_size": 1}
+            (target, *_), *outs = [b.step(a) for b in envs]
+            for obs, *_ in outs:
+                for k in target:
+                    self.assertTrue(np.all(target[k] == obs[k]))
+            self.assertIs(outs[0][0], first)
+            self.assertIsNot(outs[1][0], envs[2].obs_buffer)
+            if outs[0][2]:
+                idx = envs[0].deck.idx.copy()
+                for b in envs:
+                    b.deck.idx[:] = idx
+                    np.random.seed(i)
+                    b.reset()
+
+    def test_reuse_obs_get_set_state(self):
+        b = BlackJack(reuse_obs=True)
+        b.reset()
+        actions = [{"hit": np.random.randint(2), "bet_size": 1} for i in range(40)]
+        for a in actions[:10]:
+            b.step(a)
+        state = b.get_state()
+        first = [b.copy_observation(b.step(a)[0]) for a in actions[10:]]
+        b.set_state(state)
+        second = [b.copy_observation(b.step(a)[0]) for a in actions[10:]]
+        for o1, o2 in zip(first, second):
+            for k in o1:
+                self.assertTrue(np.all(o1[k] == o2[k]))
+
+    def test_structured_obs(self):
+        envs = []
+        for kwargs in [
+            {},
+            {"structured_obs": True},
+            {"structured_obs": True, "reuse_obs": True},
+        ]:
+            np.random.seed(0)
+            envs.append(BlackJack(**kwargs))
+            envs[-1].reset()
+        records = []
+        for i in range(50):
+            a = {"hit": i % 3 == 0, "bet_size": 1}
+            target, *outs = [b.step(a)[0] for b in envs]
+            for obs in outs:
+                self.assertEqual(obs.dtype, blackjack.obs_dtype(6))
+                for k in target:
+                    self.assertTrue(np.all(target[k] == obs[k]))
+            records.append(outs[0])
+        records = np.stack(records)
+        self.assertEqual(records["player_hand"].shape, (50, 6))
+
+
+class TestBlackjackVec(unittest.TestCase):
+    def test_matches_single(self):
+        np.random.seed(0)
+        num_envs = 16
+        singles = [BlackJack() for i in range(num_envs)]
+        vec = BlackJackVec(num_envs)
+        vec.reset()
+        for i, b in enumerate(singles):
+            b.reset()
+            # Play the same shoes
+            vec.deck.idx[i] = b.deck.idx
+        alive = np.ones(num_envs, dtype=bool)
+        while alive.any():
+            hit = np.random.randint(2, size=num_envs)
+            bet_size = np.random.randint(5, size=num_envs)
+            obs, reward, done, info = vec.step({"hit": hit, "bet_size": bet_size})
+            for i in np.flatnonzero(alive):
+                a = {"hit": hit[i], "bet_size": bet_size[i]}
+                s_obs, s_reward, s_done, s_info = singles[i].step(a)
+                self.assertEqual(s_reward, reward[i])
+                self.assertEqual(s_done, done[i])
+                if s_done:
+                    alive[i] = False
+                    continue
+                for k in s_obs:
+                    self.assertTrue(np.all(s_obs[k] == obs[k][i]))
+                self.assertEqual(s_info["player_value"], info["player_value"][i])
+
+    def test_structured_obs(self):
+        envs = []
+        for structured_obs in [False, True]:
+            np.random.seed(0)
+            envs.append(BlackJackVec(8, num_decks=4, structured_obs=structured_obs))
+            envs[-1].reset()
+        vec, structured = envs
+        rng = np.random.default_rng(0)
+        # Few enough steps that no table runs out of cards and resets
+        for i in range(30):
+            a = {"hit": rng.integers(2, size=8), "bet_size": np.ones(8, int)}
+            target = vec.step(a)[0]
+            obs = structured.step(a)[0]
+            self.assertEqual(obs.shape, (8,))
+            for k in target:
+                self.assertTrue(np.all(target[k] == obs[k]))
+
+    def test_auto_reset(self):
+        vec = BlackJackVec(8, games_per_episode=2)
+        obs = vec.reset()
+        self.assertEqual(obs["dealer_hand"].shape, (8, 6))
+        a = {"hit": np.zeros(8, dtype=int), "bet_size": np.zeros(8, dtype=int)}
+        for i in range(50):
+            obs, reward, done, info = vec.step(a)
+            self.assertTrue(np.all(obs["phase"][done] == 0))
+            self.assertTrue(np.all(obs["player_hand_cards_in_play"][done] == 0))
@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+
+from pogym import data
+from pogym.core.deck import card_tables, full_counts
+from pogym.envs.repeat_backwards import RepeatBackwardsVec
+from pogym.functional import higher_lower
+
+
+class TestTasks(unittest.TestCase):
+    def test_repeat_first(self):
+        obs, target, reward = data.repeat_first(np.random.default_rng(0), 3)
+        self.assertEqual(obs.shape, (3, 51, 2))
+        self.assertTrue(np.all(target == obs[:, :1, 1]))
+        self.assertEqual(obs[:, :, 0].sum(), 3)
+        self.assertTrue(np.allclose(reward.sum(1), 51 / 52))
+
+    def test_repeat_previous(self):
+        obs, target, reward = data.repeat_previous(np.random.default_rng(0), 3, k=4)
+        self.assertTrue(np.all(target[:, 3:] == obs[:, :-3, 1]))
+        self.assertTrue(np.all(obs[:, 1:4, 0] == 0))
+        self.assertTrue(np.all(obs[:, 4:, 0] == 1))
+        self.assertTrue(np.allclose(reward.sum(1), 1))
+
+    def test_higher_lower(self):
+        obs, target, reward = data.higher_lower(np.random.default_rng(0), 2)
+        # The last card of the shoe is never observed
+        last = 4 * np.arange(13).sum() - obs.sum(1)
+        ranks = np.concatenate([obs, last[:, None]], axis=1)
+        rngs = [np.random.default_rng(i) for i in range(2)]
+        state = higher_lower.init(rngs, count_ranks=True)
+        # Deal the same shoes from the core, any card of a rank will do
+        by_rank = np.argsort(card_tables(1)["ranks_idx"], kind="stable")
+        state["shoes"][:] = by_rank[np.argsort(np.argsort(ranks, 1, kind="stable"))]
+        state["cursor"][:] = -1
+        state["counts"][:] = full_counts(1)["ranks"]
+        state["rank"] = higher_lower.deal(state)
+        for t in range(51):
+            values = higher_lower.action_values(state)
+            self.assertTrue(np.all(values.argmax(1) == target[:, t]))
+            state, s_obs, s_reward, s_done = higher_lower.step(
+                state, target[:, t], auto_reset=False
+            )
+            self.assertTrue(np.allclose(s_reward, reward[:, t]))
+            self.assertTrue(np.all(s_done == (t == 50)))
+            if t < 50:
+                self.assertTrue(np.all(s_obs == obs[:, t + 1]))
+
+    def test_repeat_backwards(self):
+        obs, target, reward = data.repeat_backwards(
+            np.random.default_rng(0), 4, game_len=5, num_buttons=3
+        )
+        vec = RepeatBackwardsVec(4, game_len=5, num_buttons=3)
+        vec.reset()
+        vec.state["seq"][:] = obs[:, :5, 1]
+        for t in range(9):
+            v_obs, v_reward, v_done, _ = vec.step(target[:, t])
+            self.assertTrue(np.allclose(v_reward, reward[:, t]))
+            self.assertTrue(np.all(v_done == (t == 8)))
+            if t < 8:
+                self.assertTrue(np.all(v_obs == obs[:, t + 1]))
+
+
+class TestStream(unittest.TestCase):
+    def test_contiguous(self):
+        batches = data.stream("RepeatFirst", 4, 30, seed=0)
+        obs, target, reward, done = [
+            np.concatenate(x, 1) for x in zip(*(next(batches) for i in range(5)))
+        ]
+        self.assertEqual(obs.shape, (4, 150, 2))
+        # An episode starts after every done, and lasts 51 steps
+        starts = np.flatnonzero(done[0][:-1]) + 1
+        self.assertTrue(np.all(obs[0, starts, 0] == 1))
+        self.assertTrue(np.all(np.diff(starts) == 51))
+        self.assertTrue(np.all(target[0, starts] == obs[0, starts, 1]))
+
+    def test_workers(self):
+        kwargs = dict(batch_size=3, seq_len=40, seed=1, k=4)
+        batches = data.stream("pogym-RepeatPrevious-v0", num_workers=0, **kwargs)
+        target = [next(batches) for i in range(3)]
+        batches.close()
+        batches = data.stream("RepeatPrevious", num_workers=2, prefetch=2, **kwargs)
+        for t in target:
+            for x, y in zip(t, next(batches)):
+                self.assertTrue(np.all(x == y))
+        batches.close()
@@ -12,6 +12,15 @@ class TestCore(unittest.TestCase):
         d = deck.Deck(num_decks=7)
         self.assertEqual(len(d.idx), 7 * 52)
 
+    def test_shared_tables(self):
+        a = deck.Deck(num_decks=3)
+        b = deck.Deck(num_decks=3)
+        self.assertIs(a.ranks_idx, b.ranks_idx)
+        self.assertIs(a.clone().suits, a.suits)
+        self.assertFalse(a.colors.flags.writeable)
+        self.assertTrue(np.all(a.ranks_idx == np.arange(3 * 52) % 52 // 4))
+        self.assertTrue(np.all(a.suits_idx == np.arange(3 * 52) % 4))
+
     def test_deal_discard_reset(self):
         d = deck.Deck(shuffle=False)
         orig_deck = d.idx.copy()
@@ -45,7 +54,18 @@ class TestCore(unittest.TestCase):
 
         target = d.idx[52 : 52 - num - 1 : -1].tolist()
         self.assertEqual(len(target), num)
-        self.assertTrue(d["a"] == target)
+        self.assertTrue(np.array_equal(d["a"], target))
+
+    def test_hand_evaluator_is_abstract(self):
+        class NoValue(deck.HandEvaluator):
+            def init(self):
+                return (0,)
+
+            def add(self, state, ranks_idx):
+                return state
+
+        with self.assertRaises(TypeError):
+            NoValue()
 
     def test_value(self):
         def vf(x):
@@ -77,3 +97,271 @@ class TestCore(unittest.TestCase):
         value = d.value("a")
         target = vf(d["ranks"][d["a"]])
         self.assertEquals(target, value)
+
+
+class TestBatchedDeck(unittest.TestCase):
+    def test_shuffle_rows(self):
+        d = deck.BatchedDeck(num_envs=8, num_decks=2)
+        self.assertEqual(d.idx.shape, (8, 2 * 52))
+        for row in d.idx:
+            self.assertTrue(np.all(np.sort(row) == np.arange(2 * 52)))
+        self.assertFalse(np.all(d.idx == d.idx[0]))
+
+    def test_deal_matches_deck(self):
+        d = deck.BatchedDeck(num_envs=4, shuffle=False)
+        single = deck.Deck(shuffle=False)
+        d.add_players("a")
+        single.add_players("a")
+        for num in [1, 3, 2]:
+            d.deal("a", num)
+            single.deal("a", num)
+        target = single.show("a", ["idx", "ranks_idx"])
+        shown = d.show("a", ["idx", "ranks_idx"])
+        self.assertEqual(shown.shape, (2, 4, 6))
+        for row in range(4):
+            self.assertTrue(np.all(shown[:, row] == target))
+        self.assertTrue(np.all(d.deck_len == 52 - 6))
+
+    def test_mask(self):
+        d = deck.BatchedDeck(num_envs=3)
+        d.add_players("a")
+        mask = np.array([True, False, True])
+        d.deal("a", 2, mask=mask)
+        self.assertTrue(np.all(d.hand_size("a") == [2, 0, 2]))
+        self.assertTrue(np.all(d.deck_len == [50, 52, 50]))
+        shown = d.show("a", ["idx"], pad_to=4)[0]
+        self.assertTrue(np.all(shown[:, 2:] == 0))
+        self.assertTrue(np.all(shown[1] == 0))
+
+        d.discard("a", 0, mask=mask)
+        self.assertTrue(np.all(d.hand_size("a") == [1, 0, 1]))
+        self.assertTrue(np.all(d["a"][0, :1] == shown[0, 1:2]))
+        self.assertTrue(np.all(d["a"] == d.hand_view("a")))
+        self.assertFalse(d.hand_view("a").flags.writeable)
+
+        d.reset(mask=mask)
+        self.assertTrue(np.all(d.hand_size("a") == 0))
+        self.assertTrue(np.all(d.deck_len == 52))
+
+    def test_discard_matches_deck(self):
+        d = deck.BatchedDeck(num_envs=3, max_hand_size=5)
+        d.add_players("a")
+        mask = np.array([True, False, True])
+        d.deal("a", 2)
+        d.deal("a", 3, mask=mask)
+        singles = []
+        for row in range(3):
+            single = deck.Deck(shuffle=False)
+            single.add_players("a")
+            single.idx[:] = d.idx[row]
+            single.deal("a", 2)
+            if mask[row]:
+                single.deal("a", 3)
+            singles.append(single)
+        for hand_idx, rows in [(-1, [0, 1, 2]), (0, [0, 1, 2]), (-2, [0, 2])]:
+            d.discard("a", hand_idx, mask=np.isin(np.arange(3), rows))
+            for row in rows:
+                singles[row].discard("a", hand_idx)
+            for row, single in enumerate(singles):
+                shown = d.show("a", ["idx"], pad_to=5)[0, row]
+                self.assertTrue(np.all(shown == single.show("a", ["idx"], pad_to=5)))
+        self.assertTrue(np.all(d.hand_size("a") == [2, 0, 2]))
+        with self.assertRaises(IndexError):
+            d.discard("a", -1)
+
+    def test_empty(self):
+        d = deck.BatchedDeck(num_envs=2)
+        d.add_players("a")
+        d.deal("a", 52)
+        with self.assertRaises(deck.DeckEmptyError):
+            d.deal("a", 1)
+
+
+class TestDeckHands(unittest.TestCase):
+    def test_show_pad_out(self):
+        d = deck.Deck()
+        d.add_players("a")
+        d.deal("a", 3)
+        shown = d.show("a", ["idx", "ranks_idx"], pad_to=6)
+        self.assertEqual(shown.shape, (2, 6))
+        self.assertTrue(np.all(shown[0, :3] == d["a"]))
+        self.assertTrue(np.all(shown[:, 3:] == 0))
+
+        out = np.full((2, 6), -1, dtype=np.int8)
+        result = d.show("a", ["idx", "ranks_idx"], pad_to=6, out=out)
+        self.assertIs(result, out)
+        self.assertTrue(np.all(out == shown))
+
+    def test_discard(self):
+        d = deck.Deck()
+        d.add_players("a")
+        d.deal("a", 4)
+        hand = d["a"]
+        d.discard("a", 1)
+        self.assertEqual(d["a"], [hand[0], hand[2], hand[3]])
+        d.discard("a", -1)
+        self.assertEqual(d["a"], [hand[0], hand[2]])
+        self.assertTrue(np.all(d.show("a", ["idx"], pad_to=4)[0, 2:] == 0))
+        with self.assertRaises(IndexError):
+            d.discard("a", 2)
+
+    def test_hand_copy_and_view(self):
+        d = deck.Deck(shuffle=False)
+        d.add_players("a")
+        d.deal("a", 2)
+        hand = d["a"]
+        view = d.hand_view("a")
+        self.assertIsInstance(hand, list)
+        self.assertFalse(view.flags.writeable)
+        hand.append(0)
+        self.assertEqual(d.hand_size("a"), 2)
+        d.discard("a", 0)
+        # The view reads the hand buffer, which the discard shifted
+        self.assertEqual(view[0], d["a"][0])
+        self.assertEqual(len(hand), 3)
+
+    def test_last_card(self):
+        d = deck.Deck()
+        d.add_players("a")
+        for i in range(5):
+            d.deal("a", 2)
+            self.assertEqual(d.last_card("a"), d["a"][-1])
+            self.assertEqual(d.last_card("a", "ranks_idx"), d["ranks_idx"][d["a"][-1]])
+
+
+class TestDeckCounts(unittest.TestCase):
+    def test_counts_track_deals(self):
+        d = deck.Deck(num_decks=2)
+        d.add_players("a")
+        self.assertTrue(np.all(d.remaining_counts("ranks") == 8))
+        for num in [1, 5, 17, 30]:
+            d.deal("a", num)
+            left = d.idx[: len(d)]
+            for field in ["ranks", "suits", "colors"]:
+                target = np.bincount(
+                    d[f"{field}_idx"][left], minlength=d.counts[field].size
+                )
+                self.assertTrue(np.all(d.remaining_counts(field) == target))
+
+        d.reset()
+        self.assertTrue(np.all(d.remaining_counts("suits") == 26))
+
+    def test_probs(self):
+        d = deck.Deck()
+        d.add_players("a")
+        d.deal("a", 10)
+        ranks = d.ranks_idx[d.idx[: len(d)]]
+        for r in range(13):
+            self.assertAlmostEqual(d.prob_rank_above(r), np.mean(ranks > r))
+            self.assertAlmostEqual(d.prob_rank_below(r), np.mean(ranks < r))
+            self.assertAlmostEqual(d.prob_rank_equal(r), np.mean(ranks == r))
+        self.assertAlmostEqual(d.remaining_probs("colors").sum(), 1.0)
+
+
+class TestDeckState(unittest.TestCase):
+    def test_restore(self):
+        d = deck.Deck(num_decks=2)
+        d.add_players("a", "b")
+        d.deal("a", 5)
+        d.deal("b", 3)
+        d.discard("a", 1)
+        state = d.get_state()
+        target = d.clone()
+
+        d.deal("a", 20)
+        d.discard_hands("b")
+        d.reset()
+        d.set_state(state)
+
+        self.assertEqual(len(d), len(target))
+        for p in ["a", "b"]:
+            self.assertTrue(np.all(d[p] == target[p]))
+            self.assertTrue(np.all(d.hands[p] == target.hands[p]))
+        self.assertTrue(np.all(d.idx == target.idx))
+        for field in ["ranks", "suits", "colors"]:
+            self.assertTrue(
+                np.all(d.remaining_counts(field) == target.remaining_counts(field))
+            )
+
+
+class TestLazyDeck(unittest.TestCase):
+    def test_permutation(self):
+        d = deck.Deck(num_decks=2, lazy=True)
+        d.add_players("a")
+        for i in range(3):
+            d.deal("a", 7)
+            d.deal("a", 1)
+            d.deal("a", 2 * 52 - 8)
+            self.assertTrue(np.all(np.sort(d["a"]) == np.arange(2 * 52)))
+            self.assertTrue(np.all(d.remaining_counts() == 0))
+            d.reset()
+
+    def test_uniform(self):
+        np.random.seed(0)
+        d = deck.Deck(lazy=True)
+        d.add_players("a")
+        trials = 5200
+        first = np.zeros(52)
+        third = np.zeros(52)
+        for i in range(trials):
+            d.reset()
+            d.deal("a", 1)
+            d.deal("a", 2)
+            first[d["a"][0]] += 1
+            third[d["a"][2]] += 1
+        # Each card is expected 100 times, with std 10
+        self.assertTrue(np.all(np.abs(first - 100) < 50))
+        self.assertTrue(np.all(np.abs(third - 100) < 50))
+
+    def test_peek(self):
+        d = deck.Deck(lazy=True)
+        d.add_players("a")
+        d.deal("a", 3)
+        upcoming = d.peek(5).copy()
+        for i in range(5):
+            d.deal("a", 1)
+        self.assertTrue(np.all(d["a"][3:] == upcoming))
+        self.assertEqual(d.peek(100).size, 52 - 8)
+
+    def test_deal_one_at_a_time(self):
+        d = deck.Deck(lazy=True)
+        d.add_players("a")
+        upcoming = d.peek(4).copy()
+        d.deal("a", 4, one_at_a_time=True)
+        self.assertTrue(np.all(d["a"] == upcoming))
+
+    def test_state(self):
+        d = deck.Deck(lazy=True)
+        d.add_players("a")
+        d.deal("a", 3)
+        hand = d["a"].copy()
+        state = d.get_state()
+        d.deal("a", 10)
+        d.set_state(state)
+        self.assertTrue(np.all(d["a"] == hand))
+        d.deal("a", 49)
+        self.assertTrue(np.all(np.sort(d["a"]) == np.arange(52)))
+
+
+class TestRankStream(unittest.TestCase):
+    def test_permutation(self):
+        s = deck.RankStream(num_decks=3, block_size=50)
+        for i in range(2):
+            ranks = [s.deal() for j in range(3 * 52)]
+            counts = np.bincount(ranks, minlength=13)
+            self.assertTrue(np.all(counts == deck.full_counts(3)["ranks"]))
+            self.assertEqual(len(s), 0)
+            self.assertRaises(deck.DeckEmptyError, s.deal)
+            s.reset()
+
+    def test_state(self):
+        s = deck.RankStream(num_decks=2, block_size=8)
+        for i in range(5):
+            s.deal()
+        state = s.get_state()
+        # Later blocks are drawn from the global generator
+        np.random.seed(0)
+        first = [s.deal() for i in range(20)]
+        s.set_state(state)
+        np.random.seed(0)
+        self.assertEqual(first, [s.deal() for i in range(20)])
@@ -0,0 +1,122 @@
+import copy
+import unittest
+
+import numpy as np
+
+import pogym.functional.higher_lower
+import pogym.functional.multiarmed_bandit
+import pogym.functional.repeat_backwards
+import pogym.functional.repeat_first
+import pogym.functional.repeat_previous
+import pogym.functional.stateless_cartpole
+import pogym.functional.stateless_pendulum
+from pogym.envs.repeat_first import RepeatFirst, RepeatFirstVec
+from pogym.envs.repeat_previous import RepeatPrevious, RepeatPreviousVec
+
+CORES = {
+    pogym.functional.repeat_first: lambda n: np.random.randint(13, size=n),
+    pogym.functional.repeat_previous: lambda n: np.random.randint(13, size=n),
+    pogym.functional.repeat_backwards: lambda n: np.random.randint(4, size=n),
+    pogym.functional.higher_lower: lambda n: np.random.randint(2, size=n),
+    pogym.functional.multiarmed_bandit: lambda n: np.random.randint(10, size=n),
+    pogym.functional.stateless_cartpole: lambda n: np.random.randint(2, size=n),
+    pogym.functional.stateless_pendulum: lambda n: np.random.uniform(-2, 2, size=n),
+}
+
+
+def make_rngs(seed, num):
+    return [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(num)]
+
+
+class TestFunctional(unittest.TestCase):
+    def test_replay(self):
+        for core, actions in CORES.items():
+            state = core.init(make_rngs(0, 3))
+            start = copy.deepcopy(state)
+            actions = [actions(3) for i in range(300)]
+            first, copies = [], []
+            for a in actions:
+                state, *out = core.step(state, a)
+                first.append(out)
+                copies.append(copy.deepcopy(out))
+            # Later steps do not change what earlier steps returned
+            for out, copied in zip(first, copies):
+                for x, y in zip(out, copied):
+                    self.assertTrue(np.all(x == y))
+            # Stepping from a copy of a state replays the same steps
+            state = start
+            for (obs, reward, done), a in zip(first, actions):
+                state, *out = core.step(state, a)
+                self.assertTrue(np.all(obs == out[0]))
+                self.assertTrue(np.all(reward == out[1]))
+                self.assertTrue(np.all(done == out[2]))
+
+    def test_seed(self):
+        for core, actions in CORES.items():
+            first = core.init(make_rngs(5, 3))
+            second = core.init(make_rngs(5, 3))
+            same_rows = True
+            for i in range(300):
+                a = actions(1).repeat(3)
+                first, *out = core.step(first, a)
+                second, *s_out = core.step(second, a)
+                for x, y in zip(out, s_out):
+                    self.assertTrue(np.all(x == y))
+                same_rows &= bool(np.all(out[0] == out[0][:1]))
+            # Rows are drawn independently, not copies of one another
+            self.assertFalse(same_rows)
+
+
+class TestRepeatVec(unittest.TestCase):
+    def play_singles(self, vec, singles, seed):
+        """Makes the single envs play the games of the rows of vec"""
+        obs = vec.reset(seed=seed)
+        for env, s in zip(singles, np.random.SeedSequence(seed).spawn(vec.num_envs)):
+            env.state = env.core.init([np.random.default_rng(s)], **env.params)
+        return obs
+
+    def test_repeat_first(self):
+        for long_horizon in [False, True]:
+            vec = RepeatFirstVec(4, long_horizon=long_horizon, block_size=16)
+            singles = [
+                RepeatFirst(long_horizon=long_horizon, block_size=16) for i in range(4)
+            ]
+            obs = self.play_singles(vec, singles, 0)
+            alive = np.ones(4, dtype=bool)
+            while alive.any():
+                # Mostly correct actions, so that episodes run for a while
+                correct = np.array([env.card for env in singles])
+                action = np.where(np.random.rand(4) < 0.99, correct, 13)
+                obs, reward, done, info = vec.step(action)
+                for i in np.flatnonzero(alive):
+                    s_obs, s_reward, s_done, _ = singles[i].step(action[i])
+                    self.assertEqual(s_reward, reward[i])
+                    self.assertEqual(s_done, done[i])
+                    if s_done:
+                        alive[i] = False
+                    else:
+                        self.assertTrue(np.all(s_obs == obs[i]))
+
+    def test_repeat_previous(self):
+        for long_horizon in [False, True]:
+            vec = RepeatPreviousVec(4, k=3, long_horizon=long_horizon, block_size=16)
+            singles = [
+                RepeatPrevious(k=3, long_horizon=long_horizon, block_size=16)
+                for i in range(4)
+            ]
+            obs = self.play_singles(vec, singles, 0)
+            cards = [[c] for c in obs[:, 1]]
+            alive = np.ones(4, dtype=bool)
+            while alive.any():
+                action = np.array([c[-3] if len(c) >= 3 else 0 for c in cards])
+                action[np.random.rand(4) < 0.01] = 13
+                obs, reward, done, info = vec.step(action)
+                for i in np.flatnonzero(alive):
+                    s_obs, s_reward, s_done, _ = singles[i].step(action[i])
+                    self.assertEqual(s_reward, reward[i])
+                    self.assertEqual(s_done, done[i])
+                    if s_done:
+                        alive[i] = False
+                    else:
+                        self.assertTrue(np.all(s_obs == obs[i]))
+                        cards[i].append(s_obs[1])
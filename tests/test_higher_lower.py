@@ -1,7 +1,10 @@
 import math
 import unittest
 
-from pogym.envs.higher_lower import HigherLower
+import numpy as np
+
+from pogym.core.deck import card_tables
+from pogym.envs.higher_lower import HigherLower, HigherLowerVec
 
 
 class TestHigherLower(unittest.TestCase):
@@ -25,3 +28,97 @@ class TestHigherLower(unittest.TestCase):
         actual_rew = sum(reward_list)
 
         self.assertTrue(math.isclose(pred_rew, actual_rew))
+
+    def test_get_set_state(self):
+        env = HigherLower()
+        env.reset()
+        for i in range(10):
+            env.step(0)
+        state = env.get_state()
+        first = [env.step(i % 2)[:3] for i in range(20)]
+        env.set_state(state)
+        second = [env.step(i % 2)[:3] for i in range(20)]
+        self.assertEqual(first, second)
+
+    def test_info_level(self):
+        env = HigherLower(info_level="none")
+        obs, info = env.reset(return_info=True)
+        self.assertEqual(info, {})
+        obs, reward, done, info = env.step(0)
+        self.assertEqual(info, {})
+        env = HigherLower(info_level="minimal")
+        env.reset()
+        obs, reward, done, info = env.step(0)
+        self.assertEqual(card_tables(1)["ranks_idx"][info["card_idx"]], obs)
+
+    def test_tape(self):
+        for info_level in ["none", "minimal", "debug"]:
+            envs = []
+            for tape in [False, True]:
+                np.random.seed(0)
+                envs.append(HigherLower(info_level=info_level, tape=tape))
+                envs[-1].reset()
+            done = False
+            while not done:
+                action = np.random.randint(2)
+                target, out = [env.step(action) for env in envs]
+                obs, reward, done, info = out
+                self.assertEqual(target[0], obs)
+                self.assertTrue(math.isclose(target[1], reward))
+                self.assertEqual(target[2], done)
+                for k in target[3]:
+                    self.assertTrue(np.all(target[3][k] == info[k]))
+
+    def test_oracle(self):
+        for tape in [False, True]:
+            np.random.seed(0)
+            env = HigherLower(info_level="none", tape=tape, regret=True)
+            env.reset()
+            # The cards left are those the oracle counts
+            shoe = card_tables(1)["ranks_idx"][env.state["shoes"][0]].tolist()
+            done = False
+            i = 0
+            while not done:
+                rest = shoe[i + 1 :]
+                higher = sum(r > shoe[i] for r in rest) - sum(r < shoe[i] for r in rest)
+                values = env.action_values()
+                self.assertTrue(math.isclose(values[0], higher / len(rest) / 52))
+                action = env.oracle_action() if i % 2 else 1 - env.oracle_action()
+                obs, reward, done, info = env.step(action)
+                regret = values.max() - values[action]
+                self.assertTrue(math.isclose(info["regret"], regret))
+                self.assertGreaterEqual(info["regret"], 0)
+                i += 1
+
+
+class TestHigherLowerVec(unittest.TestCase):
+    def test_matches_single(self):
+        num_envs = 8
+        singles = [HigherLower(info_level="none") for i in range(num_envs)]
+        vec = HigherLowerVec(num_envs)
+        obs = vec.reset(seed=0)
+        for env, seed in zip(singles, np.random.SeedSequence(0).spawn(num_envs)):
+            # Play the same shoes, from the Generators of the rows
+            env.state = env.core.init([np.random.default_rng(seed)], **env.params)
+        alive = np.ones(num_envs, dtype=bool)
+        while alive.any():
+            action = np.random.randint(2, size=num_envs)
+            obs, reward, done, info = vec.step(action)
+            for i in np.flatnonzero(alive):
+                s_obs, s_reward, s_done, _ = singles[i].step(action[i])
+                self.assertTrue(math.isclose(s_reward, reward[i]))
+                self.assertEqual(s_done, done[i])
+                if s_done:
+                    alive[i] = False
+                else:
+                    self.assertEqual(s_obs, obs[i])
+
+    def test_auto_reset(self):
+        vec = HigherLowerVec(4, num_decks=1)
+        vec.reset()
+        for i in range(51):
+            obs, reward, done, info = vec.step(np.zeros(4, dtype=int))
+        self.assertTrue(np.all(done))
+        self.assertTrue(np.all(vec.state["cursor"] == 0))
+        ranks = card_tables(1)["ranks_idx"][vec.state["shoes"][:, 0]]
+        self.assertTrue(np.all(obs == ranks))
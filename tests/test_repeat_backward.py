@@ -1,6 +1,9 @@
 import unittest
 
-from pogym.envs.repeat_backwards import RepeatBackwards
+import numpy as np
+
+from pogym.envs import repeat_backwards
+from pogym.envs.repeat_backwards import RepeatBackwards, RepeatBackwardsVec
 
 
 class TestRepeatBackwards(unittest.TestCase):
@@ -13,3 +16,59 @@ class TestRepeatBackwards(unittest.TestCase):
         done = False
         while not done:
             obs, reward, done, info = b.step(0)
+
+    def test_structured_obs(self):
+        b = RepeatBackwards(game_len=4, structured_obs=True)
+        obs = [b.reset()]
+        done = False
+        while not done:
+            o, reward, done, info = b.step(0)
+            obs.append(o)
+        obs = np.stack(obs)
+        self.assertEqual(obs.dtype, repeat_backwards.OBS_DTYPE)
+        self.assertEqual(obs["mode"].tolist(), [1, 1, 1, 1, 0, 0, 0, 0])
+
+    def test_long_horizon(self):
+        b = RepeatBackwards(game_len=10, num_buttons=3, long_horizon=True, block_size=4)
+        watched = [b.reset()[1]]
+        self.assertEqual(b.state["seq"].dtype, np.uint8)
+        for i in range(9):
+            obs, reward, done, info = b.step(0)
+            watched.append(obs[1])
+        self.assertEqual(b.mode, 0)
+        rewards = []
+        done = False
+        while not done:
+            obs, reward, done, info = b.step(watched[len(rewards)])
+            rewards.append(reward)
+        self.assertEqual(len(rewards), 10)
+        self.assertAlmostEqual(sum(rewards), 1.0)
+
+
+class TestRepeatBackwardsVec(unittest.TestCase):
+    def test_matches_single(self):
+        num_envs = 4
+        vec = RepeatBackwardsVec(num_envs, game_len=6, num_buttons=3)
+        obs = vec.reset(seed=0)
+        singles = [RepeatBackwards(game_len=6, num_buttons=3) for i in range(4)]
+        for env, seed in zip(singles, np.random.SeedSequence(0).spawn(num_envs)):
+            # Play the same sequences, from the Generators of the rows
+            env.state = env.core.init([np.random.default_rng(seed)], **env.params)
+        shown = obs[:, 1:].tolist()
+        for t in range(11):
+            # Mostly correct actions while playing
+            action = np.random.randint(3, size=num_envs)
+            if t >= 5:
+                correct = np.array([s[t - 5] for s in shown])
+                action = np.where(np.random.rand(num_envs) < 0.8, correct, action)
+            obs, reward, done, info = vec.step(action)
+            for i, env in enumerate(singles):
+                s_obs, s_reward, s_done, _ = env.step(action[i])
+                self.assertEqual(s_reward, reward[i])
+                self.assertEqual(s_done, done[i])
+                if t < 10:
+                    self.assertTrue(np.all(s_obs == obs[i]))
+                    shown[i].append(s_obs[1])
+        self.assertTrue(np.all(done))
+        self.assertTrue(np.all(obs[:, 0] == 1))
+        self.assertTrue(np.all(obs[:, 1] == vec.state["seq"][:, 0]))
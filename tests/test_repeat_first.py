@@ -1,6 +1,8 @@
 import unittest
 
-from pogym.envs.repeat_first import RepeatFirst
+import numpy as np
+
+from pogym.envs.repeat_first import OBS_DTYPE, RepeatFirst
 
 
 class TestRepeatFirst(unittest.TestCase):
@@ -11,3 +13,64 @@ class TestRepeatFirst(unittest.TestCase):
             _, _, done, _ = e.step(0)
             if done:
                 e.reset()
+
+    def test_structured_obs(self):
+        np.random.seed(0)
+        target = RepeatFirst()
+        targets = [target.reset()]
+        np.random.seed(0)
+        e = RepeatFirst(structured_obs=True)
+        obs = [e.reset()]
+        for i in range(5):
+            obs.append(e.step(obs[0]["card"])[0])
+            targets.append(target.step(targets[0][1])[0])
+        obs = np.stack(obs)
+        self.assertEqual(obs.dtype, OBS_DTYPE)
+        self.assertEqual(obs["is_start"].tolist(), [1, 0, 0, 0, 0, 0])
+        self.assertTrue(np.all(obs["card"] == np.stack(targets)[:, 1]))
+
+    def test_tape(self):
+        for structured_obs in [False, True]:
+            envs = []
+            for tape in [False, True]:
+                np.random.seed(0)
+                envs.append(RepeatFirst(structured_obs=structured_obs, tape=tape))
+                obs = envs[-1].reset()
+            cards = [obs["card"] if structured_obs else obs[1]]
+            done = False
+            while not done:
+                # Mostly correct actions, so that episodes run for a while
+                action = cards[0] if np.random.rand() < 0.98 else 0
+                target, out = [env.step(action) for env in envs]
+                obs, reward, done, info = out
+                self.assertTrue(np.all(target[0] == obs))
+                self.assertEqual(target[1:], out[1:])
+                cards.append(obs["card"] if structured_obs else obs[1])
+
+    def test_long_horizon(self):
+        e = RepeatFirst(num_decks=4, long_horizon=True, block_size=16)
+        obs = [e.reset()]
+        done = False
+        while not done:
+            o, reward, done, info = e.step(obs[0][1])
+            obs.append(o)
+            self.assertEqual(reward, 1 / (4 * 52))
+        self.assertEqual(len(obs), 4 * 52)
+        counts = np.bincount([o[1] for o in obs], minlength=13)
+        self.assertTrue(np.all(counts == 16))
+        e.reset()
+        self.assertTrue(e.step(e.card + 1)[2])
+
+    def test_get_set_state(self):
+        for long_horizon in [False, True]:
+            e = RepeatFirst(long_horizon=long_horizon)
+            # The state is defined before the first reset
+            e.get_state()
+            obs = e.reset()
+            for i in range(5):
+                e.step(obs[1])
+            state = e.get_state()
+            first = [e.step(obs[1])[:3] for i in range(10)]
+            e.set_state(state)
+            second = [e.step(obs[1])[:3] for i in range(10)]
+            self.assertEqual(str(first), str(second))
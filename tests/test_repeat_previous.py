@@ -1,6 +1,8 @@
 import unittest
 
-from pogym.envs.repeat_previous import RepeatPrevious
+import numpy as np
+
+from pogym.envs.repeat_previous import OBS_DTYPE, RepeatPrevious
 
 
 class TestRepeatPrevious(unittest.TestCase):
@@ -23,3 +25,80 @@ class TestRepeatPrevious(unittest.TestCase):
         self.assertFalse(done3)
         obs4, rew4, done4, info4 = e.step(100)
         self.assertTrue(done4)
+
+    def test_structured_obs(self):
+        e = RepeatPrevious(k=2, structured_obs=True)
+        obs = [e.reset()]
+        for i in range(4):
+            obs.append(e.step(obs[-2]["card"] if i >= 1 else 0)[0])
+        obs = np.stack(obs)
+        self.assertEqual(obs.dtype, OBS_DTYPE)
+        self.assertEqual(obs["has_prev"].tolist(), [1, 0, 1, 1, 1])
+
+    def test_tape(self):
+        for structured_obs in [False, True]:
+            envs = []
+            for tape in [False, True]:
+                np.random.seed(0)
+                envs.append(
+                    RepeatPrevious(k=4, structured_obs=structured_obs, tape=tape)
+                )
+                obs = envs[-1].reset()
+            cards = [obs["card"] if structured_obs else obs[1]]
+            done = False
+            while not done:
+                # Mostly correct actions, so that episodes run for a while
+                action = (
+                    cards[-4]
+                    if len(cards) >= 4
+                    else 0
+                    if np.random.rand() < 0.98
+                    else 0
+                )
+                target, out = [env.step(action) for env in envs]
+                obs, reward, done, info = out
+                self.assertTrue(np.all(target[0] == obs))
+                self.assertEqual(target[1:], out[1:])
+                cards.append(obs["card"] if structured_obs else obs[1])
+
+    def test_constant_memory(self):
+        e = RepeatPrevious(num_decks=20, k=3)
+        obs = [e.reset()]
+        done = False
+        while not done:
+            action = obs[-3][1] if len(obs) >= 3 else 0
+            o, reward, done, info = e.step(action)
+            obs.append(o)
+            self.assertEqual(e.state["ring"].shape, (1, 3))
+        self.assertEqual(len(obs), 20 * 52)
+
+    def test_long_horizon(self):
+        e = RepeatPrevious(num_decks=4, k=3, long_horizon=True, block_size=16)
+        obs = [e.reset()]
+        done = False
+        while not done:
+            action = obs[-3][1] if len(obs) >= 3 else 0
+            o, reward, done, info = e.step(action)
+            obs.append(o)
+        self.assertEqual(len(obs), 4 * 52)
+        self.assertEqual(e.state["ring"].shape, (1, 3))
+        self.assertEqual(e.state["block"].shape, (1, 16))
+        e.reset()
+        for i in range(3):
+            e.step(0)
+        self.assertTrue(e.step(13)[2])
+
+    def test_get_set_state(self):
+        for long_horizon in [False, True]:
+            e = RepeatPrevious(long_horizon=long_horizon)
+            # The state is defined before the first reset
+            e.get_state()
+            e.reset()
+            for i in range(5):
+                e.step(0)
+            state = e.get_state()
+            # Within the first k steps, so that no action ends the game
+            first = [e.step(0)[:3] for i in range(10)]
+            e.set_state(state)
+            second = [e.step(0)[:3] for i in range(10)]
+            self.assertEqual(str(first), str(second))
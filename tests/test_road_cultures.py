@@ -0,0 +1,73 @@
+import logging
+import unittest
+
+import numpy as np
+
+from pogym.envs.grid_drive import GridDrive
+from pogym.envs.grid_drive.lib import road_cultures
+from pogym.envs.grid_drive.lib.road_agent import RoadAgent
+from pogym.envs.grid_drive.lib.road_cell import RoadCell
+
+CULTURES = [
+    road_cultures.EasyRoadCulture,
+    road_cultures.MediumRoadCulture,
+    road_cultures.HardRoadCulture,
+]
+
+
+def random_pair(culture):
+    road = RoadCell()
+    road.set_culture(culture)
+    culture.initialise_random_road(road)
+    agent = RoadAgent()
+    agent.set_culture(culture)
+    culture.initialise_random_agent(agent)
+    agent.assign_property_value("Speed", 10 * np.random.randint(13))
+    return road, agent
+
+
+class TestCompiledCulture(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.WARNING)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def test_matches_dialogue(self):
+        np.random.seed(0)
+        for cls in CULTURES:
+            culture = cls()
+            for i in range(500):
+                road, agent = random_pair(culture)
+                for explanation_type in ["compact", "verbose"]:
+                    self.assertEqual(
+                        culture.run_compiled_dialogue(road, agent, explanation_type),
+                        culture.run_default_dialogue(road, agent, explanation_type),
+                    )
+            self.assertLessEqual(len(culture.dialogue_table), 500)
+
+    def test_compile(self):
+        np.random.seed(0)
+        culture = road_cultures.MediumRoadCulture()
+        culture.compile(speeds=range(0, 121, 10))
+        num_features = len(culture.properties) + len(culture.agent_properties) - 1
+        self.assertEqual(len(culture.dialogue_table), 2**num_features * 13)
+        for i in range(100):
+            road, agent = random_pair(culture)
+            key = (
+                road.binary_features(as_tuple=True),
+                agent.binary_features(as_tuple=True),
+                agent["Speed"],
+            )
+            self.assertIn(key, culture.dialogue_table)
+            culture.run_compiled_dialogue(road, agent, "compact", verify=True)
+
+    def test_grid_drive(self):
+        for culture_level in ["Easy", "Medium", "Hard"]:
+            env = GridDrive(culture_level=culture_level, verify_culture=True)
+            env.seed(0)
+            env.reset()
+            for i in range(200):
+                obs, reward, done, info = env.step(env.action_space.sample())
+                if done:
+                    env.reset()
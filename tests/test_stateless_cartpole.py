@@ -0,0 +1,99 @@
+import unittest
+
+import numpy as np
+from gym.envs.classic_control import CartPoleEnv
+
+from pogym.envs import stateless_cartpole
+from pogym.envs.stateless_cartpole import StatelessCartPole
+
+
+class TestStatelessCartPole(unittest.TestCase):
+    def test_matches_gym(self):
+        env = StatelessCartPole()
+        gym_env = CartPoleEnv()
+        for seed in range(5):
+            obs = env.reset(seed=seed)
+            g_obs = gym_env.reset(seed=seed)
+            self.assertTrue(np.all(obs == g_obs[::2]))
+            done = False
+            while not done:
+                action = np.random.randint(2)
+                obs, reward, done, info = env.step(action)
+                g_obs, g_reward, g_done, _ = gym_env.step(action)
+                self.assertTrue(np.all(obs == g_obs[::2]))
+                self.assertEqual(reward, g_reward)
+                self.assertEqual(done, g_done)
+                self.assertEqual(tuple(env.state), tuple(gym_env.state))
+
+    def test_step_after_done(self):
+        env = StatelessCartPole()
+        gym_env = CartPoleEnv()
+        env.reset(seed=0)
+        gym_env.reset(seed=0)
+        for i in range(30):
+            obs, reward, done, info = env.step(1)
+            g_obs, g_reward, g_done, _ = gym_env.step(1)
+            self.assertEqual(reward, g_reward)
+            self.assertEqual(done, g_done)
+        self.assertEqual(env.steps_beyond_done, gym_env.steps_beyond_done)
+        self.assertGreater(env.steps_beyond_done, 0)
+        env.reset()
+        self.assertIsNone(env.steps_beyond_done)
+
+
+class TestStatelessCartPoleVec(unittest.TestCase):
+    def test_matches_single(self):
+        num_envs = 4
+        vec = stateless_cartpole.StatelessCartPoleVec(num_envs)
+        singles = [StatelessCartPole() for i in range(num_envs)]
+        obs = vec.reset(seed=3)
+        for i, env in enumerate(singles):
+            # Row i is seeded like a single env with seed + i
+            self.assertTrue(np.all(env.reset(seed=3 + i) == obs[i].astype(np.float32)))
+        num_done = 0
+        for t in range(300):
+            action = np.random.randint(2, size=num_envs)
+            obs, reward, done, info = vec.step(action)
+            for i, env in enumerate(singles):
+                s_obs, s_reward, s_done, _ = env.step(int(action[i]))
+                self.assertEqual(s_reward, reward[i])
+                self.assertEqual(s_done, done[i])
+                if s_done:
+                    # The single env resets from the same Generator as the row
+                    s_obs = env.reset()
+                    num_done += 1
+                self.assertTrue(np.all(s_obs == obs[i].astype(np.float32)))
+        self.assertGreater(num_done, num_envs)
+
+    def test_matches_gym(self):
+        num_envs = 8
+        vec = stateless_cartpole.StatelessCartPoleVec(num_envs)
+        gym_envs = [CartPoleEnv() for i in range(num_envs)]
+        vec.reset(seed=3)
+        for i, env in enumerate(gym_envs):
+            env.reset()
+            env.state = vec.state["cart"][i].copy()
+        num_done = 0
+        for t in range(300):
+            action = np.random.randint(2, size=num_envs)
+            obs, reward, done, info = vec.step(action)
+            for i, env in enumerate(gym_envs):
+                g_obs, g_reward, g_done, _ = env.step(int(action[i]))
+                self.assertEqual(g_reward, reward[i])
+                self.assertEqual(g_done, done[i])
+                if g_done:
+                    # Continue from the state the cart was reset to
+                    env.reset()
+                    env.state = vec.state["cart"][i].copy()
+                    num_done += 1
+                else:
+                    self.assertTrue(np.all(g_obs[::2] == obs[i].astype(np.float32)))
+                self.assertEqual(tuple(env.state), tuple(vec.state["cart"][i]))
+        self.assertGreater(num_done, 0)
+
+    def test_obs_view(self):
+        vec = stateless_cartpole.StatelessCartPoleVec(4)
+        obs = vec.reset(seed=0)
+        self.assertEqual(obs.shape, (4, 2))
+        self.assertTrue(np.shares_memory(obs, vec.state["cart"]))
+        self.assertTrue(np.all(obs == vec.state["cart"][:, [0, 2]]))
@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+from gym.envs.classic_control import PendulumEnv
+
+from pogym.envs import stateless_pendulum
+from pogym.envs.stateless_pendulum import StatelessPendulum
+
+
+class TestStatelessPendulum(unittest.TestCase):
+    def test_matches_gym(self):
+        env = StatelessPendulum()
+        gym_env = PendulumEnv()
+        for seed in range(5):
+            obs = env.reset(seed=seed)
+            self.assertTrue(np.all(obs == gym_env.reset(seed=seed)[:-1]))
+            for t in range(200):
+                action = np.random.uniform(-3, 3, size=(1,))
+                obs, reward, done, info = env.step(action)
+                g_obs, g_reward, g_done, _ = gym_env.step(action)
+                self.assertTrue(np.all(obs == g_obs[:-1]))
+                self.assertEqual(reward, g_reward)
+                self.assertFalse(done)
+                self.assertEqual(tuple(env.state), tuple(gym_env.state))
+                self.assertEqual(env.last_u, gym_env.last_u)
+
+
+class TestStatelessPendulumVec(unittest.TestCase):
+    def test_matches_single(self):
+        num_envs = 4
+        vec = stateless_pendulum.StatelessPendulumVec(num_envs, episode_length=20)
+        singles = [StatelessPendulum() for i in range(num_envs)]
+        obs = vec.reset(seed=5)
+        for i, env in enumerate(singles):
+            # Row i is seeded like a single env with seed + i
+            self.assertTrue(np.all(env.reset(seed=5 + i) == obs[i]))
+        for t in range(50):
+            action = np.random.uniform(-3, 3, size=(num_envs, 1))
+            obs, reward, done, info = vec.step(action)
+            self.assertTrue(np.all(done == ((t + 1) % 20 == 0)))
+            for i, env in enumerate(singles):
+                s_obs, s_reward, s_done, _ = env.step(action[i])
+                self.assertEqual(s_reward, reward[i])
+                if done[i]:
+                    # The single env resets from the same Generator as the row
+                    s_obs = env.reset()
+                self.assertTrue(np.all(s_obs == obs[i]))
+
+    def test_matches_gym(self):
+        num_envs = 8
+        vec = stateless_pendulum.StatelessPendulumVec(num_envs, episode_length=20)
+        gym_envs = [PendulumEnv() for i in range(num_envs)]
+        vec.reset(seed=5)
+        for i, env in enumerate(gym_envs):
+            env.reset()
+            env.state = vec.state["pendulum"][i].copy()
+        for t in range(50):
+            action = np.random.uniform(-3, 3, size=(num_envs, 1))
+            obs, reward, done, info = vec.step(action)
+            self.assertTrue(np.all(done == ((t + 1) % 20 == 0)))
+            for i, env in enumerate(gym_envs):
+                g_obs, g_reward, g_done, _ = env.step(action[i])
+                self.assertEqual(g_reward, reward[i])
+                if done[i]:
+                    # Continue from the state the pendulum was reset to
+                    env.state = vec.state["pendulum"][i].copy()
+                else:
+                    self.assertTrue(np.all(g_obs[:-1] == obs[i]))
+                self.assertEqual(tuple(env.state), tuple(vec.state["pendulum"][i]))